@@ -41,12 +41,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'tasks',
     "storages",
     "widget_tweaks",
 ]
 
 MIDDLEWARE = [
+    # Outermost so that the queries of every other middleware are counted
+    'tasks.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tasks.context_processors.feature_flags',
             ],
         },
     },
@@ -158,6 +162,71 @@ CACHES = {
     }
 }
 
+# Lifetime, in seconds, of cached task versions and rendered task fragments
+# (see tasks.caching). Writes invalidate them immediately; the timeout only
+# bounds the memory held by fragments of tasks that are no longer read.
+TASK_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Lifetime, in seconds, of form idempotency keys and of the responses
+# replayed for duplicate submissions (see tasks.idempotency)
+IDEMPOTENCY_TTL = 60 * 60 * 24
+# Lifetime, in seconds, of a key whose submission is still being processed.
+# Must exceed the longest request: a key left pending by a worker killed
+# mid-request blocks the retries of the submission until then.
+IDEMPOTENCY_PENDING_TTL = 60
+
+# Recipient of the contact form messages
+CONTACT_EMAIL = os.getenv('CONTACT_EMAIL', 'your-email@example.com')
+
+# Delivery of the email outbox by the send_outbox worker (see tasks.outbox):
+# attempts per message, and delay before the first retry in seconds,
+# doubled after each further failure
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+
 
 MEDIA_ROOT = os.path.join(BASE_DIR, "media/")
-MEDIA_URL = "/media/"
\ No newline at end of file
+MEDIA_URL = "/media/"
+# Maximum number of tasks loaded per column of the home board
+TASK_BOARD_COLUMN_SIZE = 25
+
+# Page sizes of the cursor-paginated task list and its JSON endpoint
+TASK_LIST_PAGE_SIZE = 50
+TASK_LIST_MAX_PAGE_SIZE = 200
+
+# Maximum number of matches ranked by one task search (see tasks.search)
+TASK_SEARCH_MAX_CANDIDATES = 2000
+
+# Number of tasks edited per page of the epic formset (manage_epic_tasks)
+TASK_EPIC_PAGE_SIZE = 50
+
+# Feature flags, each enabled for the members of a group (see tasks.flags)
+TASK_FEATURE_FLAGS = {
+    'priority': 'Task Prioritization Beta Testers',
+}
+
+# Lifetime, in seconds, of the users' groups and permissions cached in the
+# shared cache, and in each process in front of it. Changes invalidate both
+# in the process making them; other processes see them after the local TTL.
+TASK_ACCESS_CACHE_TIMEOUT = 60 * 60
+TASK_ACCESS_LOCAL_TTL = 5
+
+# Maximum number of tasks claimed by one call of the claim queue endpoint
+TASK_CLAIM_MAX_COUNT = 50
+
+# Maximum number of tasks accepted by one call of the bulk endpoints
+TASK_BULK_MAX_ITEMS = 5000
+
+# Strategy of services.claim_task: "pessimistic", "optimistic" or "adaptive"
+# (see tasks.claims)
+TASK_CLAIM_STRATEGY = 'adaptive'
+
+# Admin changelists estimate their row count from planner statistics once a
+# result is expected to hold more rows than this (see EstimatedCountPaginator)
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Per-request SQL instrumentation (see tasks.middleware). Share of requests
+# instrumented, from 0 (disabled) to 1, and the number of identical-shape
+# queries in one request above which a view is flagged as a likely N+1.
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', '0'))
+SQL_INSTRUMENTATION_REPEAT_THRESHOLD = int(os.getenv('SQL_INSTRUMENTATION_REPEAT_THRESHOLD', '10'))
@@ -1,15 +1,52 @@
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from tasks import caching, flags, outbox, search
 from tasks.models import Epic, Task, Sprint
+from tasks.pagination import EstimatedCountPaginator
+from tasks.progress import refresh_progress_for_tasks
 from django.http import HttpRequest
 
 
-class TaskAdmin(admin.ModelAdmin):
+class HighVolumeAdminMixin:
+    """
+    Changelist settings for tables too large for exact counts.
+    """
+
+    # Estimate the row count from planner statistics instead of COUNT(*)
+    paginator = EstimatedCountPaginator
+    # Skip the second, unfiltered COUNT(*) shown next to filtered results
+    show_full_result_count = False
+
+
+class TaskAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     # Customize the display of tasks in the admin list
     list_display = ("title", "description", "status", "owner", "created_at", "updated_at")
+    # Join the owners in instead of querying them once per row
+    list_select_related = ("owner",)
     # Add filter options for task status
     list_filter = ("status",)
-    # Enable search functionality for task title, description, and owner
+    # Enable index-backed search, shared with the search API (tasks.search)
     search_fields = ("title", "description", "owner__username")
+    search_help_text = "Search the title and description, or a title or owner username close to the term."
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search tasks with the full-text and trigram indexes of tasks.search.
+
+        Owners are resolved first so the final query is an OR over indexed
+        conditions of the task table instead of a join.
+
+        Parameters:
+            - request: The HTTP request object.
+            - queryset: The queryset to filter.
+            - search_term: The text entered in the search box.
+
+        Returns:
+            tuple: The filtered queryset and whether it may contain duplicates.
+        """
+        return search.filter_tasks(queryset, search_term), False
 
     def mark_archived(self, request, queryset):
         """
@@ -24,7 +61,13 @@ class TaskAdmin(admin.ModelAdmin):
             None
         """
         # Update the status of selected tasks to "ARCHIVED"
-        queryset.update(status="ARCHIVED")
+        with transaction.atomic():
+            task_ids = list(queryset.values_list("id", flat=True))
+            queryset.update(status="ARCHIVED", version=F("version") + 1, updated_at=timezone.now())
+            caching.publish_versions(Task.objects.filter(id__in=task_ids))
+            outbox.notify_status_change(task_ids, "ARCHIVED")
+            # QuerySet.update() bypasses the signals maintaining the counters
+            refresh_progress_for_tasks(task_ids)
 
     # Set a short description for the custom action in the admin interface
     mark_archived.short_description = 'Mark selected tasks as archived'
@@ -40,7 +83,7 @@ class TaskAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.change_task')
+        return flags.has_perm(request.user, 'tasks.change_task')
 
     def has_add_permission(self, request: HttpRequest) -> bool:
         """
@@ -52,7 +95,7 @@ class TaskAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.add_task')
+        return flags.has_perm(request.user, 'tasks.add_task')
 
     def has_delete_permission(self, request: HttpRequest, obj=None) -> bool:
         """
@@ -65,17 +108,26 @@ class TaskAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.delete_task')
+        return flags.has_perm(request.user, 'tasks.delete_task')
 
 
-class EpicAdmin(admin.ModelAdmin):
+class EpicAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     # Customize the display of epics in the admin list
-    list_display = ("name", "description", "creator", "completion_status", "created_at", "updated_at")
+    list_display = ("name", "description", "creator", "completion", "created_at", "updated_at")
+    # Join the creators in instead of querying them once per row
+    list_select_related = ("creator",)
     # Add filter options for epic creator and completion status
     list_filter = ("creator", "completion_status")
     # Enable search functionality for epic name and creator
     search_fields = ("name", "creator__username")
 
+    @admin.display(description="Completion", ordering="completion_status")
+    def completion(self, obj: Epic) -> str:
+        """
+        Show the progress of an epic from its stored counters, without a query.
+        """
+        return f"{obj.completed_tasks_count}/{obj.tasks_count} ({obj.completion_percentage:.0f}%)"
+
     def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
         """
         Check if the user has permission to change epics.
@@ -87,7 +139,7 @@ class EpicAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.change_epic')
+        return flags.has_perm(request.user, 'tasks.change_epic')
 
     def has_add_permission(self, request: HttpRequest) -> bool:
         """
@@ -99,7 +151,7 @@ class EpicAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.add_epic')
+        return flags.has_perm(request.user, 'tasks.add_epic')
 
     def has_delete_permission(self, request: HttpRequest, obj=None) -> bool:
         """
@@ -112,17 +164,26 @@ class EpicAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.delete_epic')
+        return flags.has_perm(request.user, 'tasks.delete_epic')
 
 
-class SprintAdmin(admin.ModelAdmin):
+class SprintAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     # Customize the display of sprints in the admin list
-    list_display = ("name", "description", "start_date", "end_date", "creator", "created_at", "updated_at")
+    list_display = ("name", "description", "start_date", "end_date", "creator", "completion", "created_at", "updated_at")
+    # Join the creators in instead of querying them once per row
+    list_select_related = ("creator",)
     # Add filter options for sprint creator and start date
     list_filter = ("creator", "start_date")
     # Enable search functionality for sprint name and creator
     search_fields = ("name", "creator__username")
 
+    @admin.display(description="Completion")
+    def completion(self, obj: Sprint) -> str:
+        """
+        Show the progress of a sprint from its stored counters, without a query.
+        """
+        return f"{obj.completed_tasks}/{obj.total_tasks} ({obj.completion_percentage:.0f}%)"
+
     def has_change_permission(self, request: HttpRequest, obj=None) -> bool:
         """
         Check if the user has permission to change sprints.
@@ -134,7 +195,7 @@ class SprintAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.change_sprint')
+        return flags.has_perm(request.user, 'tasks.change_sprint')
 
     def has_add_permission(self, request: HttpRequest) -> bool:
         """
@@ -146,7 +207,7 @@ class SprintAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.add_sprint')
+        return flags.has_perm(request.user, 'tasks.add_sprint')
 
     def has_delete_permission(self, request: HttpRequest, obj=None) -> bool:
         """
@@ -159,7 +220,7 @@ class SprintAdmin(admin.ModelAdmin):
         Returns:
             bool: True if the user has permission, False otherwise.
         """
-        return request.user.has_perm('tasks.delete_sprint')
+        return flags.has_perm(request.user, 'tasks.delete_sprint')
 
 
 # Register the models with their respective admins
@@ -0,0 +1,212 @@
+"""
+Async variants of the task list, detail, board and claim endpoints.
+
+Under an ASGI server (see taskmanager/asgi.py), a sync view holds a thread
+of the thread-sensitive executor for its whole duration, so every request
+served by such views queues behind the others. These views await the async
+ORM (``aget``, ``aaggregate``, ``async for``) and run cache calls in worker
+threads, so the event loop keeps accepting requests while they wait.
+
+Claims run in transactions, which the async ORM does not support: they are
+delegated to the sync services with ``sync_to_async``. Templates are
+rendered the same way, since context processors and templates may query the
+database (e.g. ``request.user`` loads the session and the user).
+
+Responses are the same as those of the sync views in tasks/views.py; the
+``benchmark_async`` command compares both.
+"""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
+from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import caching, services
+from .conditional import acollection_validators, board_validators, conditional_view, make_etag
+from .exceptions import InvalidCursorException
+from .models import Task
+from .pagination import KeysetPaginator
+from .serializers import task_to_dict
+from .views import _list_limit, _optional_int
+
+
+async def _page_validators(name: str, queryset, per_page: int, cursor: str | None):
+    try:
+        window, _ = KeysetPaginator(queryset, per_page).window(cursor)
+    except InvalidCursorException:
+        return None
+    return await acollection_validators(window, name)
+
+
+async def _task_list_api_validators(request: HttpRequest):
+    limit = _list_limit(request)
+    if limit is None:
+        return None
+    return await _page_validators(
+        "task-list-api", Task.objects.all(), limit, request.GET.get("cursor")
+    )
+
+
+async def _task_validators(request: HttpRequest, pk: int):
+    version = await caching.aget_version(pk)
+    if version is None:
+        version = await Task.objects.filter(pk=pk).values_list("version", flat=True).afirst()
+        if version is None:
+            return None
+        await caching.aset_versions({pk: version})
+    return make_etag("task-detail", pk, version), None
+
+
+async def _task_home_validators(request: HttpRequest):
+    request._task_board = await services.aget_task_board()
+    return board_validators(request._task_board, "task-home")
+
+
+async def _task_board_column_validators(request: HttpRequest, status: str):
+    if status not in services.BOARD_STATUSES:
+        return None
+    return await _page_validators(
+        f"task-board-{status}",
+        Task.objects.filter(status=status),
+        services.BOARD_COLUMN_SIZE,
+        request.GET.get("cursor"),
+    )
+
+
+async def _is_authenticated(request: HttpRequest) -> bool:
+    # request.user loads the session and the user with sync queries on first
+    # access; once loaded, it can be read from async code
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+@conditional_view(_task_list_api_validators)
+async def task_list_api(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of ``views.task_list_api``.
+    """
+    limit = _list_limit(request)
+    if limit is None:
+        return JsonResponse({"error": "Invalid limit."}, status=400)
+
+    tasks = Task.objects.select_related("owner")
+    try:
+        page = await KeysetPaginator(tasks, limit).apaginate(request.GET.get("cursor"))
+    except InvalidCursorException:
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+    return JsonResponse(
+        {
+            "results": [task_to_dict(task) for task in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+    )
+
+
+@conditional_view(_task_validators)
+async def task_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Async version of ``views.TaskDetailView``, served from the same cached
+    fragments.
+    """
+    fragment = await caching.aget_fragment(pk, "detail")
+    if fragment is None:
+        try:
+            task = await Task.objects.prefetch_related("watchers").aget(pk=pk)
+        except Task.DoesNotExist:
+            raise Http404("No task found matching the query")
+        fragment = await sync_to_async(render_to_string)(
+            "tasks/_task_detail.html", {"task": task}, request=request
+        )
+        await caching.aset_fragment(task, "detail", fragment)
+    return await sync_to_async(render)(
+        request, "tasks/task_detail.html", {"task_html": mark_safe(fragment)}
+    )
+
+
+@conditional_view(_task_home_validators)
+async def task_home(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of ``views.task_home``.
+    """
+    columns = getattr(request, "_task_board", None) or await services.aget_task_board()
+    context = {"columns": columns}
+    return await sync_to_async(render)(request, "tasks/home.html", context)
+
+
+@conditional_view(_task_board_column_validators)
+async def task_board_column(request: HttpRequest, status: str) -> HttpResponse:
+    """
+    Async version of ``views.task_board_column``.
+    """
+    if status not in services.BOARD_STATUSES:
+        raise Http404("Unknown board column")
+    try:
+        page = await services.aget_task_board_column(status, cursor=request.GET.get("cursor"))
+    except InvalidCursorException:
+        return HttpResponseBadRequest("Invalid cursor.")
+
+    context = {"status": status, "tasks": page.object_list, "next_cursor": page.next_cursor}
+    return await sync_to_async(render)(request, "tasks/_board_column.html", context)
+
+
+async def claim_next_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Async version of ``views.claim_next_tasks_api``.
+    """
+    # require_POST only wraps sync views in Django 4.2
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not await _is_authenticated(request):
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    try:
+        count = int(request.POST.get("count", 1))
+        sprint_id = _optional_int(request.POST.get("sprint"))
+        epic_id = _optional_int(request.POST.get("epic"))
+        min_age = _optional_int(request.POST.get("min_age"))
+        max_age = _optional_int(request.POST.get("max_age"))
+    except ValueError:
+        return JsonResponse({"error": "Invalid parameters."}, status=400)
+    count = max(1, min(count, settings.TASK_CLAIM_MAX_COUNT))
+
+    tasks = await sync_to_async(services.claim_next_tasks)(
+        request.user.id,
+        count,
+        sprint_id=sprint_id,
+        epic_id=epic_id,
+        min_age=timedelta(seconds=min_age) if min_age is not None else None,
+        max_age=timedelta(seconds=max_age) if max_age is not None else None,
+    )
+    for task in tasks:
+        task.owner = request.user
+    return JsonResponse({"results": [task_to_dict(task) for task in tasks]})
+
+
+async def claim_task(request: HttpRequest, task_id: int) -> HttpResponse:
+    """
+    Claims a task for the current user with the configured claim engine.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    if not await _is_authenticated(request):
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    try:
+        await sync_to_async(services.claim_task)(request.user.id, task_id)
+    except Task.DoesNotExist:
+        return HttpResponse("Task does not exist.", status=404)
+    except services.TaskAlreadyClaimedException:
+        return HttpResponse("Task is already claimed or completed.", status=400)
+    except services.TaskClaimConflictException:
+        return HttpResponse("Task is being claimed concurrently, retry later.", status=409)
+    return JsonResponse({"message": "Task successfully claimed."})
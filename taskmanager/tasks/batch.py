@@ -0,0 +1,261 @@
+"""
+Batch creates, partial updates and status transitions of tasks.
+
+Used by the bulk JSON endpoints for integration scripts. A batch is handled
+in a fixed number of statements whatever its size:
+
+* every item is validated first, the references to tasks and owners being
+  checked with one query each instead of one per item;
+* the batch is then written with ``bulk_create``/``bulk_update`` in one
+  transaction, so either every item is applied or none is.
+
+Validation errors are reported per item, by index in the submitted array.
+The side effects of ``Task.save()`` that bulk writes bypass (versions, the
+sprint and epic counters, the watcher notifications) are applied once per
+batch.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching, outbox
+from .bulk import batched
+from .exceptions import BatchValidationException
+from .models import Task
+from .progress import refresh_progress_for_tasks
+
+BATCH_SIZE = 1000
+MAX_ITEMS = settings.TASK_BULK_MAX_ITEMS
+
+CREATE_FIELDS = ("title", "description", "status", "owner")
+UPDATE_FIELDS = ("title", "description", "owner")
+
+
+def _check_items(items) -> None:
+    if not isinstance(items, list):
+        raise BatchValidationException("Expected an array of tasks.")
+    if len(items) > MAX_ITEMS:
+        raise BatchValidationException(f"At most {MAX_ITEMS} tasks can be sent at once.")
+
+
+def _is_int(value) -> bool:
+    # JSON booleans are ints in Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _clean_fields(item, allowed: tuple[str, ...], keys: tuple[str, ...]) -> tuple[dict, dict]:
+    """
+    Validates the fields of one item without querying the database.
+
+    Args:
+        item: The submitted item.
+        allowed (tuple[str, ...]): The task fields the item may set.
+        keys (tuple[str, ...]): Other accepted keys, returned as is.
+
+    Returns:
+        tuple[dict, dict]: The cleaned values and the errors, by field.
+    """
+    if not isinstance(item, dict):
+        return {}, {"non_field_errors": ["Expected an object."]}
+    values, errors = {}, {}
+    for name, value in item.items():
+        if name in keys:
+            values[name] = value
+        elif name not in allowed:
+            errors[name] = ["Unknown field."]
+        elif name == "owner":
+            # The existence of owners is checked for the whole batch at once
+            if value is not None and not _is_int(value):
+                errors[name] = ["Expected a user id or null."]
+            else:
+                values["owner_id"] = value
+        else:
+            try:
+                values[name] = Task._meta.get_field(name).clean(value, None)
+            except ValidationError as exc:
+                errors[name] = exc.messages
+    return values, errors
+
+
+def _owners(values: list[dict], errors: dict[int, dict]) -> dict[int, User]:
+    """
+    Loads the owners referenced by the items with one query, recording an
+    error for the items referencing a missing user.
+    """
+    owner_ids = {item["owner_id"] for item in values if item.get("owner_id") is not None}
+    owners = User.objects.in_bulk(owner_ids) if owner_ids else {}
+    for index, item in enumerate(values):
+        if item.get("owner_id") is not None and item["owner_id"] not in owners:
+            errors.setdefault(index, {})["owner"] = ["User does not exist."]
+    return owners
+
+
+def _locked_tasks(values: list[dict], errors: dict[int, dict]) -> dict[int, Task]:
+    """
+    Locks the tasks targeted by the items with one query, recording an error
+    for the items targeting a missing or already targeted task, or a task
+    whose version is not the expected one.
+    """
+    # Ids may be any JSON value, e.g. an unhashable list or object
+    valid_ids = {item["id"] for item in values if _is_int(item.get("id"))}
+    tasks = Task.objects.select_for_update(of=("self",)).select_related("owner").in_bulk(valid_ids)
+
+    seen = set()
+    for index, item in enumerate(values):
+        pk, version = item.get("id"), item.get("version")
+        if not _is_int(pk):
+            errors.setdefault(index, {})["id"] = ["Expected a task id."]
+            continue
+        if pk not in tasks:
+            errors.setdefault(index, {})["id"] = ["Task does not exist."]
+        elif pk in seen:
+            errors.setdefault(index, {})["id"] = ["Task appears more than once."]
+        elif version is not None and not _is_int(version):
+            errors.setdefault(index, {})["version"] = ["Expected an integer or null."]
+        elif version is not None and version != tasks[pk].version:
+            errors.setdefault(index, {})["version"] = [
+                f"Task was modified since version {version} (now {tasks[pk].version})."
+            ]
+        seen.add(pk)
+    return tasks
+
+
+def _clean_items(items, allowed: tuple[str, ...], keys: tuple[str, ...] = ()) -> tuple[list[dict], dict[int, dict]]:
+    _check_items(items)
+    values, errors = [], {}
+    for index, item in enumerate(items):
+        cleaned, item_errors = _clean_fields(item, allowed, keys)
+        values.append(cleaned)
+        if item_errors:
+            errors[index] = item_errors
+    return values, errors
+
+
+def _require(values: list[dict], errors: dict[int, dict], name: str) -> None:
+    for index, item in enumerate(values):
+        item_errors = errors.get(index, {})
+        if name not in item and name not in item_errors and "non_field_errors" not in item_errors:
+            errors.setdefault(index, {})[name] = ["This field is required."]
+
+
+def _raise_errors(errors: dict[int, dict]) -> None:
+    if errors:
+        raise BatchValidationException(
+            f"{len(errors)} invalid tasks, nothing was saved.",
+            [{"index": index, "errors": errors[index]} for index in sorted(errors)],
+        )
+
+
+def create_tasks(items, creator: User) -> list[Task]:
+    """
+    Creates tasks from a list of ``{"title", "description", "status",
+    "owner"}`` items, of which only the title is required.
+
+    Returns:
+        list[Task]: The created tasks, in the order of the items.
+
+    Raises:
+        BatchValidationException: If any item is invalid; nothing is created.
+    """
+    values, errors = _clean_items(items, CREATE_FIELDS)
+    _require(values, errors, "title")
+    owners = _owners(values, errors)
+    _raise_errors(errors)
+
+    tasks = [Task(creator=creator, **item) for item in values]
+    with transaction.atomic():
+        for batch in batched(tasks, BATCH_SIZE):
+            Task.objects.bulk_create(batch)
+    for task in tasks:
+        # Serialized without a query per task
+        task.owner = owners.get(task.owner_id)
+    return tasks
+
+
+def update_tasks(items) -> list[Task]:
+    """
+    Applies partial updates from a list of ``{"id", "version", "title",
+    "description", "owner"}`` items, where ``version`` is optional (absent
+    or null) and rejects the update of a task modified in the meantime.
+
+    Returns:
+        list[Task]: The updated tasks, in the order of the items.
+
+    Raises:
+        BatchValidationException: If any item is invalid; nothing is updated.
+    """
+    values, errors = _clean_items(items, UPDATE_FIELDS, keys=("id", "version"))
+    owners = _owners(values, errors)
+    with transaction.atomic():
+        tasks = _locked_tasks(values, errors)
+        _raise_errors(errors)
+
+        now = timezone.now()
+        fields = {"version", "updated_at"}
+        updated = []
+        for item in values:
+            task = tasks[item["id"]]
+            for name, value in item.items():
+                if name not in ("id", "version"):
+                    setattr(task, name, value)
+                    fields.add("owner" if name == "owner_id" else name)
+            if "owner_id" in item:
+                task.owner = owners.get(item["owner_id"])
+            task.version += 1
+            task.updated_at = now
+            updated.append(task)
+
+        for batch in batched(updated, BATCH_SIZE):
+            Task.objects.bulk_update(batch, sorted(fields))
+        caching.publish({task.pk: task.version for task in updated})
+    return updated
+
+
+def transition_tasks(items) -> list[Task]:
+    """
+    Changes the status of tasks from a list of ``{"id", "status", "version"}``
+    items, ``version`` being optional (absent or null).
+
+    Tasks already in the requested status are left untouched. The sprint and
+    epic counters are refreshed and the watchers notified once per batch.
+
+    Returns:
+        list[Task]: The tasks, in the order of the items.
+
+    Raises:
+        BatchValidationException: If any item is invalid; nothing is changed.
+    """
+    values, errors = _clean_items(items, ("status",), keys=("id", "version"))
+    _require(values, errors, "status")
+    with transaction.atomic():
+        tasks = _locked_tasks(values, errors)
+        _raise_errors(errors)
+
+        now = timezone.now()
+        changed = []
+        done_changed = []
+        by_status = defaultdict(list)
+        for item in values:
+            task = tasks[item["id"]]
+            if task.status == item["status"]:
+                continue
+            if "DONE" in (task.status, item["status"]):
+                done_changed.append(task.pk)
+            task.status = item["status"]
+            task.version += 1
+            task.updated_at = now
+            changed.append(task)
+            by_status[task.status].append(task.pk)
+
+        for batch in batched(changed, BATCH_SIZE):
+            Task.objects.bulk_update(batch, ["status", "version", "updated_at"])
+        if done_changed:
+            refresh_progress_for_tasks(done_changed)
+        for status, task_ids in by_status.items():
+            outbox.notify_status_change(task_ids, status)
+        caching.publish({task.pk: task.version for task in changed})
+    return [tasks[item["id"]] for item in values]
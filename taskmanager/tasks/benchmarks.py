@@ -0,0 +1,342 @@
+"""
+Latency and query-count benchmarks for the tasks views and services.
+
+Used by the ``benchmark`` management command. Every scenario is a callable
+performing one request (or service call) against the current database; it
+is timed and its queries are counted with ``CaptureQueriesContext``.
+"""
+import asyncio
+import multiprocessing
+import random
+import statistics
+import time
+from typing import Callable
+
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import services
+from .claims import ClaimEngine
+from .exceptions import TaskAlreadyClaimedException, TaskClaimConflictException
+from .models import Epic, Task
+
+# Sampled ids are reused across iterations; claims consume one id each
+SAMPLE_SIZE = 1000
+BENCHMARK_USERNAME = "benchmark"
+
+
+class ScenarioExhausted(Exception):
+    """
+    Raised by a scenario that consumed all its data (e.g. the tasks left to
+    claim), so that no iteration is timed as a no-op.
+    """
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Returns the ``percent`` percentile of ``values`` (nearest-rank method).
+    """
+    ordered = sorted(values)
+    rank = max(1, round(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(latencies: list[float]) -> dict:
+    """
+    Summarizes latencies, given in seconds, as milliseconds.
+    """
+    return {
+        "iterations": len(latencies),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def measure(scenario: Callable[[], object], iterations: int, warmup: int = 1) -> dict:
+    """
+    Runs a scenario repeatedly and reports its latency and query count.
+
+    The query count is the maximum observed over all iterations, so that an
+    N+1 pattern hidden behind a random sample still shows up. A scenario
+    raising ``ScenarioExhausted`` stops early, and reports the iterations it
+    completed.
+
+    Raises:
+        ScenarioExhausted: If the scenario stopped before its first measured
+            iteration.
+    """
+    for _ in range(warmup):
+        scenario()
+
+    latencies = []
+    queries = 0
+    errors = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            try:
+                result = scenario()
+            except ScenarioExhausted:
+                if not latencies:
+                    raise
+                break
+            latencies.append(time.perf_counter() - started)
+        queries = max(queries, len(captured.captured_queries))
+        if getattr(result, "status_code", 200) >= 400:
+            errors += 1
+
+    return {**summarize(latencies), "queries": queries, "errors": errors}
+
+
+def _get(client: Client, url: str) -> Callable[[], object]:
+    return lambda: client.get(url)
+
+
+def build_scenarios(seed: int = 0) -> dict[str, Callable[[], object]]:
+    """
+    Builds the benchmark scenarios for the data currently in the database.
+
+    Args:
+        seed (int): Seed of the generator picking tasks, epics and dates.
+
+    Returns:
+        dict[str, Callable[[], object]]: The scenarios by name.
+    """
+    rng = random.Random(seed)
+    admin, _ = User.objects.get_or_create(
+        username=BENCHMARK_USERNAME, defaults={"is_staff": True, "is_superuser": True}
+    )
+    client = Client()
+    admin_client = Client()
+    admin_client.force_login(admin)
+
+    task_ids = list(Task.objects.order_by("?").values_list("id", flat=True)[:SAMPLE_SIZE])
+    epic_ids = list(Epic.objects.order_by("?").values_list("id", flat=True)[:SAMPLE_SIZE])
+    unclaimed = Task.objects.filter(status="UNASSIGNED", owner__isnull=True)
+    claimable_ids = list(unclaimed.order_by("id").values_list("id", flat=True)[: SAMPLE_SIZE * 2])
+    # Each claim scenario consumes its own half of the sample
+    claim_pools = {"claim_task": claimable_ids[::2], "claim_task_optimistically": claimable_ids[1::2]}
+    today = timezone.localdate()
+
+    def task_detail():
+        return client.get(reverse("tasks:task-detail", args=[rng.choice(task_ids)]))
+
+    def task_by_date():
+        day = today - timezone.timedelta(days=rng.randint(0, 30))
+        return client.get(reverse("tasks:task-get-by-date", args=[day]))
+
+    def manage_epic_tasks():
+        return client.get(reverse("tasks:task-batch-create", args=[rng.choice(epic_ids)]))
+
+    def claimable_id(pool: str) -> int:
+        if not claim_pools[pool]:
+            raise ScenarioExhausted(f"No task left to claim for {pool}.")
+        return claim_pools[pool].pop()
+
+    def claim_task():
+        services.claim_task(admin.id, claimable_id("claim_task"))
+
+    def claim_task_optimistically():
+        services.claim_task_optimistically(admin.id, claimable_id("claim_task_optimistically"))
+
+    def claim_next_tasks():
+        claimed = services.claim_next_tasks(admin.id, 10)
+        if not claimed:
+            raise ScenarioExhausted("No unclaimed task left.")
+        return claimed
+
+    scenarios = {
+        "task_home": _get(client, reverse("tasks:task-home")),
+        "task_list": _get(client, reverse("tasks:task-list")),
+        "task_list_api": _get(client, reverse("tasks:task-list-api")),
+        "admin_task_changelist": _get(admin_client, reverse("admin:tasks_task_changelist")),
+        "admin_epic_changelist": _get(admin_client, reverse("admin:tasks_epic_changelist")),
+        "admin_sprint_changelist": _get(admin_client, reverse("admin:tasks_sprint_changelist")),
+    }
+    if task_ids:
+        scenarios["task_detail"] = task_detail
+        scenarios["task_by_date"] = task_by_date
+    if epic_ids:
+        scenarios["manage_epic_tasks"] = manage_epic_tasks
+    if claimable_ids:
+        scenarios["claim_task"] = claim_task
+        scenarios["claim_task_optimistically"] = claim_task_optimistically
+        scenarios["claim_next_tasks"] = claim_next_tasks
+    return scenarios
+
+
+def _contend(strategy: str, task_ids: list[int], user_id: int, seed: int, start, results) -> None:
+    """
+    Body of one contention worker process: tries to claim every task of the
+    shared pool, in its own random order, as soon as ``start`` is set.
+    """
+    engine = ClaimEngine(strategy)
+    order = list(task_ids)
+    random.Random(seed).shuffle(order)
+    latencies = []
+    start.wait()
+    started = time.perf_counter()
+    for task_id in order:
+        claim_started = time.perf_counter()
+        try:
+            engine.claim(user_id, task_id)
+        except (TaskAlreadyClaimedException, TaskClaimConflictException):
+            pass
+        latencies.append(time.perf_counter() - claim_started)
+    results.put(
+        {"stats": engine.stats.snapshot(), "latencies": latencies, "elapsed": time.perf_counter() - started}
+    )
+    connections.close_all()
+
+
+def claim_contention(strategy: str, processes: int, task_ids: list[int], user_id: int, seed: int = 0) -> dict:
+    """
+    Measures a claim strategy with ``processes`` workers racing for the same
+    pool of tasks, which is reset to unclaimed beforehand.
+
+    Every worker attempts every task, so exactly ``len(task_ids)`` claims
+    succeed and the remaining attempts measure the cost of losing a race.
+
+    Returns:
+        dict: Claim latency percentiles, throughput and the summed engine
+        counters of all workers.
+    """
+    Task.objects.filter(id__in=task_ids).update(status="UNASSIGNED", owner=None)
+    # Forked workers must not share the parent's database connection
+    connections.close_all()
+
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(target=_contend, args=(strategy, task_ids, user_id, seed + index, start, results))
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    start.set()
+    reports = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    counters = {field: sum(report["stats"][field] for report in reports) for field in reports[0]["stats"]}
+    elapsed = max(report["elapsed"] for report in reports)
+    latencies = [latency for report in reports for latency in report["latencies"]]
+    return {
+        **summarize(latencies),
+        **counters,
+        "processes": processes,
+        "elapsed_s": round(elapsed, 3),
+        "claims_per_s": round(counters["claimed"] / elapsed, 1),
+        "attempts_per_s": round(counters["attempts"] / elapsed, 1),
+    }
+
+
+# Endpoints served by both a sync and an async view: (sync URL name, async URL name)
+ASGI_ENDPOINTS = {
+    "task_list_api": ("tasks:task-list-api", "tasks:task-list-api-async"),
+    "task_detail": ("tasks:task-detail", "tasks:task-detail-async"),
+    "task_home": ("tasks:task-home", "tasks:task-home-async"),
+    "claim_next_tasks": ("tasks:task-claim-next", "tasks:task-claim-next-async"),
+}
+
+
+def asgi_load(endpoint: str, mode: str, concurrency: int, requests: int, cookies=None, seed: int = 0) -> dict:
+    """
+    Measures the throughput and latency of the sync or async view of an
+    endpoint under ``concurrency`` concurrent clients.
+
+    Requests go through Django's ASGI handler in-process, as an ASGI server
+    such as uvicorn calls it, so sync views run in the thread-sensitive
+    executor and async views on the event loop.
+
+    Args:
+        endpoint (str): A key of ``ASGI_ENDPOINTS``.
+        mode (str): "sync" or "async".
+        concurrency (int): Number of clients sending requests concurrently.
+        requests (int): Total number of requests, shared by the clients.
+        cookies: Session cookies of the clients, for endpoints requiring
+            authentication.
+        seed (int): Seed of the generator picking tasks.
+
+    Returns:
+        dict: Latency percentiles, errors and requests per second.
+    """
+    rng = random.Random(seed)
+    url_name = ASGI_ENDPOINTS[endpoint][mode == "async"]
+    task_ids = list(Task.objects.order_by("?").values_list("id", flat=True)[:SAMPLE_SIZE])
+
+    def send(client: AsyncClient):
+        if endpoint == "task_detail":
+            return client.get(reverse(url_name, args=[rng.choice(task_ids)]))
+        if endpoint == "claim_next_tasks":
+            return client.post(reverse(url_name), {"count": 1})
+        return client.get(reverse(url_name))
+
+    async def run() -> tuple[list[float], int, float]:
+        latencies = []
+        errors = 0
+        # Shared by the clients, so that they stop after ``requests`` in total
+        remaining = iter(range(requests))
+
+        async def client_loop():
+            nonlocal errors
+            client = AsyncClient()
+            if cookies is not None:
+                client.cookies = cookies
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await send(client)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    latencies, errors, elapsed = asyncio.run(run())
+    return {
+        **summarize(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, slack_ms: float) -> list[str]:
+    """
+    Compares benchmark results against a baseline.
+
+    A scenario regresses when it runs more queries than in the baseline, or
+    when its p95 latency exceeds the baseline by more than ``tolerance``
+    (a ratio) plus ``slack_ms`` milliseconds of allowed noise.
+
+    Returns:
+        list[str]: One message per regression.
+    """
+    regressions = []
+    for size, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            if current["queries"] > previous["queries"]:
+                regressions.append(
+                    f"{name} @ {size} tasks: {current['queries']} queries "
+                    f"(baseline {previous['queries']})"
+                )
+            limit = previous["p95_ms"] * (1 + tolerance) + slack_ms
+            if current["p95_ms"] > limit:
+                regressions.append(
+                    f"{name} @ {size} tasks: p95 {current['p95_ms']:.1f} ms "
+                    f"(baseline {previous['p95_ms']:.1f} ms, limit {limit:.1f} ms)"
+                )
+    return regressions
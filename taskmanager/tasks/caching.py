@@ -0,0 +1,174 @@
+"""
+Version-keyed caching of rendered task fragments.
+
+Every write to a task increments ``Task.version``. The current version of
+each task is mirrored in the cache under a pointer key, and rendered
+fragments are stored under ``(task id, version)``: once a write publishes
+the new version, older fragments are simply never looked up again and
+expire on their own. A read served from the cache costs two cache lookups
+and no database query.
+
+Pointers only ever move forward (see ``_PUBLISH_SCRIPT``), so a reader
+filling a missing pointer with a version it read before a concurrent write
+cannot overwrite the newer version published by that write. Deleting a task
+moves its pointer to ``DELETED``, greater than any version, for the same
+reason: a reader that loaded the task before the delete cannot publish it
+again.
+"""
+from typing import Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from django_redis import get_redis_connection
+
+TIMEOUT = settings.TASK_CACHE_TIMEOUT
+
+# Pointer of a deleted task, read as "not cached"
+DELETED = 2**62
+
+# Sets KEYS[i] to ARGV[i] unless it already holds a greater version
+_PUBLISH_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local current = tonumber(redis.call('GET', key))
+    if not current or current < tonumber(ARGV[i]) then
+        redis.call('SET', key, ARGV[i], 'EX', ARGV[#ARGV])
+    end
+end
+"""
+
+
+def version_key(task_id: int) -> str:
+    return f"task:{task_id}:version"
+
+
+def fragment_key(task_id: int, version: int, name: str) -> str:
+    return f"task:{task_id}:v{version}:{name}"
+
+
+def _in_thread(func):
+    # The cache clients are synchronous and thread-safe. Unlike the default
+    # async cache methods, run them outside of the thread shared with the
+    # ORM so that cache calls do not queue behind database queries.
+    return sync_to_async(func, thread_sensitive=False)
+
+
+def get_version(task_id: int) -> int | None:
+    """
+    Returns the cached version of a task, or None if it is not cached or
+    the task was deleted.
+    """
+    version = cache.get(version_key(task_id))
+    return None if version == DELETED else version
+
+
+async def aget_version(task_id: int) -> int | None:
+    """
+    Async version of ``get_version``.
+    """
+    return await _in_thread(get_version)(task_id)
+
+
+def set_versions(versions: dict[int, int]) -> None:
+    """
+    Stores task versions in the cache, keeping any greater version already stored.
+    """
+    if not versions:
+        return
+    try:
+        client = get_redis_connection("default")
+    except NotImplementedError:
+        # Not a Redis cache (e.g. local memory in development): same rule,
+        # without the atomicity
+        for task_id, version in versions.items():
+            current = cache.get(version_key(task_id))
+            if current is None or current < version:
+                cache.set(version_key(task_id), version, TIMEOUT)
+        return
+    keys = [cache.make_key(version_key(task_id)) for task_id in versions]
+    client.eval(_PUBLISH_SCRIPT, len(keys), *keys, *versions.values(), TIMEOUT)
+
+
+async def aset_versions(versions: dict[int, int]) -> None:
+    """
+    Async version of ``set_versions``.
+    """
+    await _in_thread(set_versions)(versions)
+
+
+def publish(versions: dict[int, int]) -> None:
+    """
+    Publishes new task versions once the current transaction commits.
+    """
+    transaction.on_commit(lambda: set_versions(versions))
+
+
+def publish_versions(tasks: QuerySet) -> None:
+    """
+    Publishes the versions of tasks whose version was just incremented.
+
+    Must be called inside the transaction that wrote the tasks, after the
+    write, so that the versions read are the ones written.
+    """
+    publish(dict(tasks.values_list("id", "version")))
+
+
+def bump_versions(tasks: QuerySet) -> None:
+    """
+    Increments the version of tasks changed without ``Task.save()``, such as
+    edits to their watchers (see services.sync_watchers), and publishes the
+    new versions.
+    """
+    with transaction.atomic():
+        tasks.update(version=F("version") + 1, updated_at=timezone.now())
+        publish_versions(tasks)
+
+
+def forget(task_ids: Iterable[int]) -> None:
+    """
+    Marks the cached versions of deleted tasks as ``DELETED`` once the
+    transaction commits. Unlike a deleted pointer, the mark cannot be
+    replaced by a reader publishing the version it loaded before the delete.
+    """
+    keys = {version_key(task_id): DELETED for task_id in task_ids}
+    transaction.on_commit(lambda: cache.set_many(keys, TIMEOUT))
+
+
+def get_fragment(task_id: int, name: str) -> str | None:
+    """
+    Returns a rendered fragment of the current version of a task, or None
+    when the version or the fragment is not cached.
+    """
+    version = get_version(task_id)
+    if version is None:
+        return None
+    return cache.get(fragment_key(task_id, version, name))
+
+
+def set_fragment(task, name: str, content: str) -> None:
+    """
+    Caches a fragment rendered from ``task`` as loaded from the database.
+    """
+    cache.set(fragment_key(task.pk, task.version, name), content, TIMEOUT)
+    set_versions({task.pk: task.version})
+
+
+async def aget_fragment(task_id: int, name: str) -> str | None:
+    """
+    Async version of ``get_fragment``.
+    """
+    version = await aget_version(task_id)
+    if version is None:
+        return None
+    return await _in_thread(cache.get)(fragment_key(task_id, version, name))
+
+
+async def aset_fragment(task, name: str, content: str) -> None:
+    """
+    Async version of ``set_fragment``.
+    """
+    await _in_thread(cache.set)(fragment_key(task.pk, task.version, name), content, TIMEOUT)
+    await aset_versions({task.pk: task.version})
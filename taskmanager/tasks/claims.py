@@ -0,0 +1,214 @@
+"""
+Claim engine: assigns an unclaimed task to a user under concurrency.
+
+Three strategies are available:
+
+* ``pessimistic``: locks the row with ``SELECT ... FOR UPDATE NOWAIT``
+  before updating it. A row locked by another transaction is a conflict,
+  retried after a backoff instead of waited for.
+* ``optimistic``: a single compare-and-set ``UPDATE`` that only matches a
+  claimable row, with no read before the write.
+* ``adaptive``: uses the optimistic strategy while the observed conflict
+  rate stays under a threshold and switches to the pessimistic one above
+  it, so that losers back off instead of queueing on the row lock.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import caching, outbox
+from .exceptions import TaskAlreadyClaimedException, TaskClaimConflictException
+from .models import Task
+
+PESSIMISTIC = "pessimistic"
+OPTIMISTIC = "optimistic"
+ADAPTIVE = "adaptive"
+STRATEGIES = (PESSIMISTIC, OPTIMISTIC, ADAPTIVE)
+
+# A task can be claimed while it has no owner and is neither done nor archived
+CLOSED_STATUSES = ("DONE", "ARCHIVED")
+CLAIMABLE = Q(owner__isnull=True) & ~Q(status__in=CLOSED_STATUSES)
+
+
+class _Conflict(Exception):
+    """
+    Raised by a strategy when a concurrent transaction got in the way.
+    """
+
+
+class ClaimStats:
+    """
+    Thread-safe counters of a claim engine.
+    """
+
+    FIELDS = ("attempts", "claimed", "already_claimed", "conflicts", "retries", "exhausted")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def increment(self, field: str) -> None:
+        with self._lock:
+            self._counts[field] += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+class ClaimEngine:
+    """
+    Claims tasks with a pluggable strategy and bounded, jittered retries.
+
+    Args:
+        strategy (str): One of ``STRATEGIES``.
+        max_attempts (int): Attempts per claim before giving up on conflicts.
+        base_delay (float): Backoff before the first retry, in seconds.
+        max_delay (float): Upper bound of the backoff, in seconds.
+        conflict_threshold (float): Conflict rate above which the adaptive
+            strategy switches to pessimistic locking.
+        window (int): Number of recent attempts the conflict rate is
+            computed over.
+    """
+
+    def __init__(
+        self,
+        strategy: str = ADAPTIVE,
+        max_attempts: int = 5,
+        base_delay: float = 0.005,
+        max_delay: float = 0.2,
+        conflict_threshold: float = 0.2,
+        window: int = 100,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown claim strategy {strategy!r}.")
+        self.strategy = strategy
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.conflict_threshold = conflict_threshold
+        self.stats = ClaimStats()
+        self._outcomes = deque(maxlen=window)
+
+    @property
+    def conflict_rate(self) -> float:
+        """
+        Share of conflicts among the recent attempts.
+        """
+        outcomes = list(self._outcomes)
+        return sum(outcomes) / len(outcomes) if outcomes else 0.0
+
+    def current_strategy(self) -> str:
+        """
+        Returns the concrete strategy the next attempt will use.
+        """
+        if self.strategy != ADAPTIVE:
+            return self.strategy
+        return PESSIMISTIC if self.conflict_rate > self.conflict_threshold else OPTIMISTIC
+
+    def claim(self, user_id: int, task_id: int) -> None:
+        """
+        Assigns a task to a user and moves it to IN_PROGRESS.
+
+        Raises:
+            Task.DoesNotExist: If the task does not exist.
+            TaskAlreadyClaimedException: If the task is claimed or completed.
+            TaskClaimConflictException: If concurrent transactions kept
+                getting in the way for ``max_attempts`` attempts.
+        """
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self.stats.increment("retries")
+                time.sleep(self.backoff(attempt))
+            self.stats.increment("attempts")
+            strategy = self.current_strategy()
+            try:
+                if strategy == PESSIMISTIC:
+                    self._claim_pessimistically(user_id, task_id)
+                else:
+                    self._claim_optimistically(user_id, task_id)
+            except _Conflict:
+                self._record(conflict=True)
+                continue
+            except TaskAlreadyClaimedException:
+                self.stats.increment("already_claimed")
+                # Losing a compare-and-set is how contention shows up there
+                self._record(conflict=strategy == OPTIMISTIC)
+                raise
+            self.stats.increment("claimed")
+            self._record(conflict=False)
+            return
+
+        self.stats.increment("exhausted")
+        raise TaskClaimConflictException(
+            f"Task {task_id} could not be claimed after {self.max_attempts} attempts."
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Returns the delay before retry number ``attempt``: exponential with
+        full jitter, so that retrying workers spread out instead of
+        colliding again.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _record(self, conflict: bool) -> None:
+        self._outcomes.append(1 if conflict else 0)
+        if conflict:
+            self.stats.increment("conflicts")
+
+    @staticmethod
+    def _claim_updates(user_id: int) -> dict:
+        return {
+            "status": "IN_PROGRESS",
+            "owner_id": user_id,
+            "version": F("version") + 1,
+            "updated_at": timezone.now(),
+        }
+
+    def _claim_pessimistically(self, user_id: int, task_id: int) -> None:
+        try:
+            with transaction.atomic():
+                task = (
+                    Task.objects.select_for_update(nowait=True)
+                    .only("owner_id", "status", "version")
+                    .get(pk=task_id)
+                )
+                if task.owner_id or task.status in CLOSED_STATUSES:
+                    raise TaskAlreadyClaimedException("Task is already claimed or completed.")
+                # The status goes from a non-DONE one to IN_PROGRESS, so the
+                # completed-task counters of sprints and epics are unchanged
+                Task.objects.filter(pk=task_id).update(**self._claim_updates(user_id))
+                caching.publish({task_id: task.version + 1})
+                outbox.notify_status_change([task_id], "IN_PROGRESS")
+        except OperationalError as exc:
+            # Lock not available, deadlock or serialization failure
+            raise _Conflict from exc
+
+    def _claim_optimistically(self, user_id: int, task_id: int) -> None:
+        try:
+            with transaction.atomic():
+                updated = Task.objects.filter(CLAIMABLE, pk=task_id).update(
+                    **self._claim_updates(user_id)
+                )
+                if updated:
+                    caching.publish_versions(Task.objects.filter(pk=task_id))
+                    outbox.notify_status_change([task_id], "IN_PROGRESS")
+        except OperationalError as exc:
+            raise _Conflict from exc
+        if updated:
+            return
+        # Only failed claims pay for a read, to tell the two errors apart
+        if not Task.objects.filter(pk=task_id).exists():
+            raise Task.DoesNotExist(f"Task {task_id} does not exist.")
+        raise TaskAlreadyClaimedException("Task is already claimed or completed.")
+
@@ -0,0 +1,147 @@
+"""
+Conditional GET support: validators for tasks and task collections.
+
+Views declare how to compute their ``(etag, last_modified)`` validators with
+``conditional_view``. The validators are computed once per request, before
+the view runs, so a client polling an unchanged resource gets a 304 without
+the view building its queryset or rendering its template.
+"""
+import asyncio
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Callable
+
+from django.db.models import Count, Max, QuerySet, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+Validators = tuple[str | None, datetime | None]
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a compact ETag value from the parts identifying a representation.
+    """
+    return hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def collection_validators(queryset: QuerySet, name: str) -> Validators:
+    """
+    Computes the validators of a collection from its high-water marks.
+
+    Any update moves ``max(updated_at)`` forward (``updated_at`` is set on
+    every write), and any row entering or leaving the collection changes its
+    row count or the sum of its ids, all read with one aggregate query. For
+    a sliced queryset, such as a keyset page window, only the rows of the
+    slice are aggregated.
+
+    Args:
+        queryset (QuerySet): The tasks of the collection.
+        name (str): Name of the representation, so that views rendering the
+            same rows differently get different ETags.
+    """
+    marks = queryset.aggregate(
+        last_modified=Max("updated_at"), count=Count("id"), checksum=Sum("id")
+    )
+    return _collection_validators(marks, name)
+
+
+def _collection_validators(marks: dict, name: str) -> Validators:
+    last_modified = marks["last_modified"]
+    etag = make_etag(
+        name, marks["count"], marks["checksum"], last_modified.isoformat() if last_modified else ""
+    )
+    return etag, last_modified
+
+
+def board_validators(columns: list[dict], name: str) -> Validators:
+    """
+    Computes the validators of a status board from the capped columns it
+    renders (see ``services.get_task_board``), without a query of its own.
+
+    A column changes when its total changes or when a task of its window
+    is written (``updated_at`` moves forward), enters or leaves it.
+
+    Args:
+        columns (list[dict]): The columns of the board.
+        name (str): Name of the representation.
+    """
+    tasks = [task for column in columns for task in column["tasks"]]
+    last_modified = max((task.updated_at for task in tasks), default=None)
+    etag = make_etag(
+        name,
+        *(f"{column['status']}={column['count']}" for column in columns),
+        *(f"{task.pk}@{task.updated_at.isoformat()}" for task in tasks),
+    )
+    return etag, last_modified
+
+
+async def acollection_validators(queryset: QuerySet, name: str) -> Validators:
+    """
+    Async version of ``collection_validators``.
+    """
+    marks = await queryset.aaggregate(
+        last_modified=Max("updated_at"), count=Count("id"), checksum=Sum("id")
+    )
+    return _collection_validators(marks, name)
+
+
+def conditional_view(validators: Callable[..., Validators | None]):
+    """
+    Answers conditional GET and HEAD requests with 304 Not Modified when the
+    validators returned by ``validators(request, *args, **kwargs)`` still
+    match, and adds them as ``ETag`` and ``Last-Modified`` headers otherwise.
+
+    ``validators`` may return None (e.g. for a missing object or an invalid
+    parameter), in which case the view handles the request unconditionally.
+
+    Async views take an async ``validators`` function.
+    """
+
+    def compute(request, *args, **kwargs) -> Validators:
+        if not hasattr(request, "_validators"):
+            request._validators = validators(request, *args, **kwargs) or (None, None)
+        return request._validators
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            return _async_conditional(view, validators)
+        conditional = condition(
+            etag_func=lambda request, *args, **kwargs: compute(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs: compute(request, *args, **kwargs)[1],
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            return conditional(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _async_conditional(view, validators):
+    # Same as django.views.decorators.http.condition, which only wraps sync
+    # views in Django 4.2
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return await view(request, *args, **kwargs)
+        etag, last_modified = await validators(request, *args, **kwargs) or (None, None)
+        etag = quote_etag(etag) if etag is not None else None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        if timestamp and not response.has_header("Last-Modified"):
+            response.headers["Last-Modified"] = http_date(timestamp)
+        if etag:
+            response.headers.setdefault("ETag", etag)
+        return response
+
+    return wrapper
@@ -1,13 +1,18 @@
+from django.utils.functional import SimpleLazyObject
+
+from . import flags
+
+
 def feature_flags(request):
-    user = request.user
-    flags = {
-        "is_priority_feature_enabled": False,
-    }
-
-    # Ensure the user is authenticated before checking groups
-    if user.is_authenticated:
-        flags["is_priority_feature_enabled"] = user.groups.filter(
-            name="Task Prioritization Beta Testers"
-        ).exists()
-
-    return flags
+    """
+    Exposes every feature flag of ``TASK_FEATURE_FLAGS`` to the templates as
+    ``is_<flag>_feature_enabled``.
+
+    The flags are resolved when a template reads them, so renders that do not
+    read them do not look up the user's access, and those that do cost no
+    query once it is cached (see tasks.flags).
+    """
+    def lazy_flag(flag):
+        return SimpleLazyObject(lambda: flags.is_enabled(request.user, flag))
+
+    return {f"is_{flag}_feature_enabled": lazy_flag(flag) for flag in flags.FEATURE_FLAGS}
@@ -1,18 +1,25 @@
-from django.contrib.auth.models import Group, Permission
-from django.contrib.contenttypes.models import ContentType
-
 def create_groups(apps, schema_editor):
-    # Get the ContentType object for the Task model
-    task_content_type = ContentType.objects.get(app_label='tasks', model='task')
+    # Use the historical models: this runs as a migration
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Group = apps.get_model('auth', 'Group')
+    Permission = apps.get_model('auth', 'Permission')
+
+    # Get the ContentType object for the Task model, not created yet when
+    # migrating a new database (e.g. the test database)
+    task_content_type, _ = ContentType.objects.get_or_create(app_label='tasks', model='task')
 
     # Create "Creator" group with "add_task" permission
     creator_group, _ = Group.objects.get_or_create(name='Creator')
-    add_task_permission, _ = Permission.objects.get_or_create(codename='add_task', content_type=task_content_type)
+    add_task_permission, _ = Permission.objects.get_or_create(
+        codename='add_task', content_type=task_content_type, defaults={'name': 'Can add task'}
+    )
     creator_group.permissions.add(add_task_permission)
 
     # Create "Editor" group with "change_task" permission
     editor_group, _ = Group.objects.get_or_create(name='Editor')
-    change_task_permission, _ = Permission.objects.get_or_create(codename='change_task', content_type=task_content_type)
+    change_task_permission, _ = Permission.objects.get_or_create(
+        codename='change_task', content_type=task_content_type, defaults={'name': 'Can change task'}
+    )
     editor_group.permissions.add(change_task_permission)
 
     # Create "Admin" group with all permissions
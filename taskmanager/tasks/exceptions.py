@@ -1,2 +1,25 @@
 class TaskAlreadyClaimedException(Exception):
     pass
+
+
+class InvalidCursorException(Exception):
+    pass
+
+
+class TaskClaimConflictException(Exception):
+    pass
+
+
+class SubmissionInProgressException(Exception):
+    pass
+
+
+class BatchValidationException(Exception):
+    """
+    Raised when items of a batch are invalid; ``errors`` holds one
+    ``{"index", "errors"}`` entry per invalid item.
+    """
+
+    def __init__(self, message: str, errors: list[dict] = ()):
+        super().__init__(message)
+        self.errors = list(errors)
@@ -0,0 +1,217 @@
+"""
+Streaming CSV and NDJSON exports of tasks, sprints and epics.
+
+Rows are read with ``QuerySet.iterator()``, i.e. through a server-side
+cursor on PostgreSQL, and written out chunk by chunk, so the memory used by
+an export does not grow with the number of rows. Related data (sprint and
+epic memberships, watchers) is loaded with one query per chunk of rows
+rather than one per row.
+
+Users are exported by username and sprints and epics by id, the format read
+back by the ``import_data`` command.
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from typing import Callable, Iterable, Iterator
+
+from .bulk import batched
+from .models import Email, Epic, Sprint, Task
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 2000
+
+# Separator of the values of list columns in CSV exports
+LIST_SEPARATOR = ";"
+
+
+def _related(through_or_model, key: str, value: str, ids: list[int]) -> dict[int, list]:
+    """
+    Groups the ``value`` of the rows related to ``ids`` by ``key``, with one
+    query.
+    """
+    related = defaultdict(list)
+    rows = through_or_model.objects.filter(**{f"{key}__in": ids}).order_by(key, value)
+    for row_key, row_value in rows.values_list(key, value):
+        related[row_key].append(row_value)
+    return related
+
+
+def task_rows(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yields every task, with its owner, creator, sprints, epics and watchers.
+    """
+    rows = (
+        Task.objects.order_by("id")
+        .values(
+            "id",
+            "title",
+            "description",
+            "status",
+            "creator__username",
+            "owner__username",
+            "created_at",
+            "updated_at",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in batched(rows, chunk_size):
+        ids = [row["id"] for row in chunk]
+        sprints = _related(Sprint.tasks.through, "task_id", "sprint_id", ids)
+        epics = _related(Epic.tasks.through, "task_id", "epic_id", ids)
+        watchers = _related(Email, "task_id", "email", ids)
+        for row in chunk:
+            yield {
+                "id": row["id"],
+                "title": row["title"],
+                "description": row["description"],
+                "status": row["status"],
+                "creator": row["creator__username"],
+                "owner": row["owner__username"],
+                "created_at": row["created_at"].isoformat(),
+                "updated_at": row["updated_at"].isoformat(),
+                "sprints": sprints.get(row["id"], []),
+                "epics": epics.get(row["id"], []),
+                "watchers": watchers.get(row["id"], []),
+            }
+
+
+def sprint_rows(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yields every sprint, with its creator and epic.
+    """
+    rows = (
+        Sprint.objects.order_by("id")
+        .values(
+            "id",
+            "name",
+            "description",
+            "start_date",
+            "end_date",
+            "creator__username",
+            "epic_id",
+            "created_at",
+            "updated_at",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "start_date": row["start_date"].isoformat(),
+            "end_date": row["end_date"].isoformat(),
+            "creator": row["creator__username"],
+            "epic": row["epic_id"],
+            "created_at": row["created_at"].isoformat(),
+            "updated_at": row["updated_at"].isoformat(),
+        }
+
+
+def epic_rows(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yields every epic, with its creator.
+    """
+    rows = (
+        Epic.objects.order_by("id")
+        .values("id", "name", "description", "creator__username", "created_at", "updated_at")
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield {
+            "id": row["id"],
+            "name": row["name"],
+            "description": row["description"],
+            "creator": row["creator__username"],
+            "created_at": row["created_at"].isoformat(),
+            "updated_at": row["updated_at"].isoformat(),
+        }
+
+
+# Columns and rows of each export, in the order an import must load them
+EXPORTS: dict[str, tuple[tuple[str, ...], Callable[[int], Iterator[dict]]]] = {
+    "epics": (("id", "name", "description", "creator", "created_at", "updated_at"), epic_rows),
+    "sprints": (
+        (
+            "id",
+            "name",
+            "description",
+            "start_date",
+            "end_date",
+            "creator",
+            "epic",
+            "created_at",
+            "updated_at",
+        ),
+        sprint_rows,
+    ),
+    "tasks": (
+        (
+            "id",
+            "title",
+            "description",
+            "status",
+            "creator",
+            "owner",
+            "created_at",
+            "updated_at",
+            "sprints",
+            "epics",
+            "watchers",
+        ),
+        task_rows,
+    ),
+}
+
+
+def _csv_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(map(str, value))
+    return value
+
+
+def render_csv(columns: tuple[str, ...], rows: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    """
+    Renders rows as CSV, a header line first, one string per chunk of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in batched(rows, chunk_size):
+        writer.writerows([_csv_value(row[column]) for column in columns] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header of an empty export
+        yield buffer.getvalue()
+
+
+def render_ndjson(rows: Iterable[dict], chunk_size: int) -> Iterator[str]:
+    """
+    Renders rows as newline-delimited JSON, one string per chunk of rows.
+    """
+    for chunk in batched(rows, chunk_size):
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in chunk)
+
+
+def export(kind: str, format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Streams an export.
+
+    Args:
+        kind (str): A key of ``EXPORTS``.
+        format (str): One of ``FORMATS``.
+        chunk_size (int): Number of rows fetched and rendered at a time.
+
+    Returns:
+        Iterator[str]: The export, chunk by chunk.
+    """
+    columns, rows = EXPORTS[kind]
+    if format == "csv":
+        return render_csv(columns, rows(chunk_size), chunk_size)
+    return render_ndjson(rows(chunk_size), chunk_size)
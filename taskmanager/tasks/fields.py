@@ -16,4 +16,16 @@ class EmailsListField(forms.CharField):
         "Check if value consists only of valid emails."
         super().validate(value)
         for email in value:
-            email_validator(email)
\ No newline at end of file
+            email_validator(email)
+
+    def has_changed(self, initial, data):
+        "Compare the addresses rather than how the list was typed."
+        if self.disabled:
+            return False
+        return self.to_python(initial) != self.to_python(data)
+
+
+class MultilineTextField(forms.CharField):
+    def to_python(self, value):
+        "Normalize the CRLF line breaks that browsers submit to LF."
+        return super().to_python(value).replace("\r\n", "\n")
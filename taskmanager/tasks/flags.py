@@ -0,0 +1,222 @@
+"""
+Cached resolution of feature flags and permissions per user.
+
+A user's access (group names and permission names) is computed with two
+queries, then kept in two cache levels:
+
+* the shared cache (Redis), under ``access_key(user_id, generation)``, for
+  ``TASK_ACCESS_CACHE_TIMEOUT`` seconds;
+* a per-process dict in front of it, for ``TASK_ACCESS_LOCAL_TTL`` seconds,
+  so that the checks of a request (template renders, admin permission
+  hooks) cost neither a query nor a cache round trip.
+
+The signal handlers of tasks.signals invalidate the cached access of the
+users affected by a change of their groups or permissions once it commits,
+by giving them a new generation. A reader that loaded the access before the
+change stores it under the generation it read first, which is never read
+again, so it cannot cache the replaced access for the new generation. The
+other processes see the change when their local entry expires, i.e. within
+``TASK_ACCESS_LOCAL_TTL`` seconds.
+
+Feature flags are enabled per group, see ``TASK_FEATURE_FLAGS``.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Iterable, NamedTuple
+
+from django.conf import settings
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import transaction
+
+TIMEOUT = settings.TASK_ACCESS_CACHE_TIMEOUT
+LOCAL_TTL = settings.TASK_ACCESS_LOCAL_TTL
+FEATURE_FLAGS = settings.TASK_FEATURE_FLAGS
+
+# Maximum number of users whose access a process keeps
+LOCAL_MAX_ENTRIES = 10_000
+
+
+class Access(NamedTuple):
+    groups: frozenset[str]
+    permissions: frozenset[str]
+
+
+NO_ACCESS = Access(frozenset(), frozenset())
+
+
+class LocalCache:
+    """
+    Thread-safe in-process cache whose entries expire after ``ttl`` seconds,
+    the least recently used entries being evicted beyond ``max_entries``.
+
+    ``epoch`` changes on every deletion: a value computed from data read
+    before a deletion is not stored if the epoch read first has changed.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.epoch = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, epoch: int | None = None) -> None:
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable) -> None:
+        with self._lock:
+            self.epoch += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+
+
+local_cache = LocalCache(LOCAL_TTL, LOCAL_MAX_ENTRIES)
+
+
+def generation_key(user_id: int) -> str:
+    return f"access:{user_id}:generation"
+
+
+def access_key(user_id: int, generation: str) -> str:
+    return f"access:{user_id}:{generation}"
+
+
+def new_generation() -> str:
+    # Never reused, so that no entry of a former generation can be read again
+    return uuid.uuid4().hex
+
+
+def get_generation(user_id: int) -> str:
+    """
+    Returns the current generation of a user's cached access, starting one
+    if there is none.
+    """
+    key = generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, new_generation(), TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+
+def _load_access(user_id: int) -> Access:
+    """
+    Computes the access of a user with two queries.
+    """
+    groups = User.groups.through.objects.filter(user_id=user_id).values_list("group__name", flat=True)
+    permissions = (
+        Permission.objects.filter(user=user_id).union(Permission.objects.filter(group__user=user_id))
+        .values_list("content_type__app_label", "codename")
+    )
+    return Access(
+        frozenset(groups),
+        frozenset(f"{app_label}.{codename}" for app_label, codename in permissions),
+    )
+
+
+def get_access(user) -> Access:
+    """
+    Returns the cached access of a user, computing it on a miss of both
+    cache levels.
+
+    Args:
+        user: A user, possibly anonymous.
+
+    Returns:
+        Access: The user's access; ``NO_ACCESS`` for anonymous users.
+    """
+    if not user.is_authenticated:
+        return NO_ACCESS
+    access = local_cache.get(user.pk)
+    if access is not None:
+        return access
+    epoch = local_cache.epoch
+    # The generation is read before the access is loaded (see invalidate)
+    key = access_key(user.pk, get_generation(user.pk))
+    access = cache.get(key)
+    if access is None:
+        access = _load_access(user.pk)
+        cache.set(key, access, TIMEOUT)
+    local_cache.set(user.pk, access, epoch)
+    return access
+
+
+def has_perm(user, perm: str) -> bool:
+    """
+    Tells whether a user has a permission, like ``User.has_perm()`` with the
+    model backend: active superusers have every permission, inactive users
+    none.
+    """
+    if not user.is_active:
+        return False
+    return user.is_superuser or perm in get_access(user).permissions
+
+
+def in_group(user, group_name: str) -> bool:
+    """
+    Tells whether a user belongs to a group.
+    """
+    return group_name in get_access(user).groups
+
+
+def is_enabled(user, flag: str) -> bool:
+    """
+    Tells whether a feature flag of ``TASK_FEATURE_FLAGS`` is enabled for a
+    user, i.e. whether the user belongs to the flag's group.
+
+    Raises:
+        KeyError: If the flag is not defined.
+    """
+    return in_group(user, FEATURE_FLAGS[flag])
+
+
+def enabled_flags(user) -> dict[str, bool]:
+    """
+    Returns every feature flag of ``TASK_FEATURE_FLAGS`` with whether it is
+    enabled for a user.
+    """
+    groups = get_access(user).groups
+    return {flag: group_name in groups for flag, group_name in FEATURE_FLAGS.items()}
+
+
+def invalidate(user_ids: Iterable[int]) -> None:
+    """
+    Gives users a new generation of cached access once the current
+    transaction commits, so that their access is loaded again with the
+    change visible.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+
+    def drop():
+        cache.set_many({generation_key(user_id): new_generation() for user_id in user_ids}, TIMEOUT)
+        local_cache.delete_many(user_ids)
+
+    transaction.on_commit(drop)
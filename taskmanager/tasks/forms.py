@@ -1,17 +1,27 @@
 import uuid
 
 from django import forms
-from django.core.cache import cache
-from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
-from django.forms import modelformset_factory
-from tasks.fields import EmailsListField
+from django.conf import settings
+from django.forms import BaseModelFormSet, modelformset_factory
+from tasks.fields import EmailsListField, MultilineTextField
 
-from .models import Email, FormSubmission, Task
+from . import services
+from .models import Task
 
 
-class TaskFormWithModel(forms.ModelForm):
+class TaskWatchersForm(forms.ModelForm):
+    """
+    Task form editing the watchers' addresses as a comma-separated list.
+
+    The current addresses are read from the ``watcher_emails`` annotation
+    when the instance was loaded with ``services.with_watcher_emails``,
+    saving one watchers query per form.
+    """
+
+    # Idempotency key of the submission, checked by the view against the
+    # store named by ``idempotency_backend`` (see tasks.idempotency)
     uuid = forms.UUIDField(required=False, widget=forms.HiddenInput())
+    idempotency_backend = "cache"
 
     watchers = EmailsListField(required=False)
 
@@ -28,80 +38,135 @@ class TaskFormWithModel(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Check if an instance is provided and populate watchers field
+        self.current_watchers = None
         if self.instance and self.instance.pk:
-            self.fields["watchers"].initial = ", ".join(
-                email.email for email in self.instance.watchers.all()
-            )
-        self.fields["uuid"].initial = uuid.uuid4()
+            self.current_watchers = getattr(self.instance, "watcher_emails", None)
+            if self.current_watchers is None:
+                self.current_watchers = list(
+                    self.instance.watchers.values_list("email", flat=True)
+                )
+            self.fields["watchers"].initial = ", ".join(self.current_watchers)
+        if "uuid" in self.fields:
+            self.fields["uuid"].initial = uuid.uuid4()
 
-    def clean_uuid(self):
-        uuid_value = self.cleaned_data.get("uuid")
+    def _save_m2m(self):
+        # Runs on save(), or on save_m2m() after save(commit=False)
+        super()._save_m2m()
+        services.sync_watchers(self.instance, self.cleaned_data["watchers"], self.current_watchers)
 
-        with transaction.atomic():
-            # Try to record the form submission by UUID
-            try:
-                FormSubmission.objects.create(uuid=uuid_value)
-            except IntegrityError:
-                # The UUID already exists, so the form was already submitted
-                raise ValidationError("This form has already been submitted.")
 
-        return uuid_value
+class TaskFormWithModel(TaskWatchersForm):
+    idempotency_backend = "database"
 
-    def save(self, commit=True):
-        # First, save the Task instance
-        task = super().save(commit)
 
-        # If commit is True, save the associated emails
-        if commit:
-            # First, remove the old emails associated with this task
-            task.watchers.all().delete()
+class TaskFormWithRedis(TaskWatchersForm):
+    """
+    Task form whose submissions are deduplicated in the cache, the default
+    idempotency backend.
+    """
 
-            # Add the new emails to the Email model
-            for email_str in self.cleaned_data["watchers"]:
-                Email.objects.create(email=email_str, task=task)
 
-        return task
+class ContactForm(forms.Form):
+    from_email = forms.EmailField(required=True)
+    # Queued in OutboxMessage.subject
+    subject = forms.CharField(required=True, max_length=255)
+    message = forms.CharField(widget=forms.Textarea, required=True)
 
 
-class TaskFormWithRedis(forms.ModelForm):
-    uuid = forms.UUIDField(required=False, widget=forms.HiddenInput())
-    watchers = EmailsListField(required=False)
+class EpicTaskForm(TaskWatchersForm):
+    """
+    Row of the epic formset.
 
-    class Meta:
-        model = Task
-        fields = [
-            "title",
-            "description",
-            "status",
-            "watchers",
-            "file_upload",
-            "image_upload",
-        ]
+    Leaves out the per-form idempotency key, carried once by the formset
+    (its fresh initial value would also mark every row as changed), and the
+    file fields, which the bulk update of the formset does not store.
+    """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if self.instance and self.instance.pk:
-            self.fields["watchers"].initial = ", ".join(
-                email.email for email in self.instance.watchers.all()
-            )
-        self.fields["uuid"].initial = uuid.uuid4()
+    uuid = None
 
-    def clean_uuid(self):
-        uuid_value = str(self.cleaned_data.get("uuid"))
+    class Meta(TaskWatchersForm.Meta):
+        fields = ["title", "description", "status", "watchers"]
+        # An unedited multi-line description must not count as a change
+        field_classes = {"description": MultilineTextField}
 
-        was_set = cache.set(uuid_value, "submitted", nx=True)
-        if not was_set:
-            # If 'was_set' is False, the UUID already exists in the cache.
-            # This indicates a duplicate form submission.
-            raise ValidationError("This form has already been submitted.")
-        return uuid_value
+    @property
+    def changed_task_fields(self) -> list[str]:
+        """
+        The names of the edited task fields, the watchers left aside.
+        """
+        return [name for name in self.changed_data if name != "watchers"]
 
 
-class ContactForm(forms.Form):
-    from_email = forms.EmailField(required=True)
-    subject = forms.CharField(required=True)
-    message = forms.CharField(widget=forms.Textarea, required=True)
+class BaseEpicFormSet(BaseModelFormSet):
+    """
+    Formset over one page of an epic's tasks.
 
+    Bound to a POST, it only loads the tasks whose forms were submitted
+    instead of the whole epic, and checks the submitted ids against them
+    instead of querying each id separately.
 
-EpicFormSet = modelformset_factory(Task, form=TaskFormWithRedis, extra=0)
\ No newline at end of file
+    The idempotency key of the submission, ``uuid``, is rendered once for
+    the formset rather than once per row.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.uuid = uuid.uuid4()
+
+    def get_form_kwargs(self, index):
+        kwargs = super().get_form_kwargs(index)
+        # Rows left as rendered are neither validated nor saved, sparing the
+        # model validation queries (e.g. the status check constraint)
+        kwargs["empty_permitted"] = True
+        return kwargs
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            queryset = self.queryset
+            if self.is_bound:
+                queryset = queryset.filter(pk__in=self._submitted_ids()).order_by("-created_at", "-id")
+            self._queryset = queryset
+        return self._queryset
+
+    def _submitted_ids(self) -> list[int]:
+        ids = []
+        for index in range(min(self.initial_form_count(), self.absolute_max)):
+            value = self.data.get(f"{self.add_prefix(index)}-id", "")
+            if value.isdigit():
+                ids.append(int(value))
+        return ids
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk = form.instance.pk if form.instance.pk is not None else ""
+        form.fields["id"] = forms.TypedChoiceField(
+            choices=[(task.pk, task.pk) for task in self.get_queryset()],
+            coerce=int,
+            required=False,
+            initial=pk,
+            widget=forms.HiddenInput,
+            error_messages={"invalid_choice": "This task is not part of the epic."},
+        )
+
+    def changed_tasks(self) -> list[tuple[Task, list[str]]]:
+        """
+        Returns the tasks with edited fields, with the names of these fields,
+        after ``save(commit=False)``.
+        """
+        changes = []
+        for form in self.saved_forms:
+            fields = form.changed_task_fields
+            if fields:
+                changes.append((form.instance, fields))
+        return changes
+
+
+EpicFormSet = modelformset_factory(
+    Task,
+    form=EpicTaskForm,
+    formset=BaseEpicFormSet,
+    extra=0,
+    max_num=settings.TASK_EPIC_PAGE_SIZE,
+    absolute_max=settings.TASK_EPIC_PAGE_SIZE,
+    validate_max=True,
+)
\ No newline at end of file
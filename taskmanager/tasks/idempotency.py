@@ -0,0 +1,203 @@
+"""
+Idempotency keys for form submissions.
+
+Forms render a random UUID in a hidden field. The first POST carrying a key
+reserves it; once the view succeeds, its response is stored under the key
+and replayed for any duplicate of the submission (double clicks, retries
+after a timeout) instead of processing it again. Failed submissions release
+their key so that the corrected form can be posted again.
+
+Keys expire after ``IDEMPOTENCY_TTL`` seconds in both backends, and after
+``IDEMPOTENCY_PENDING_TTL`` seconds while their submission is processed, so
+that a worker dying mid-request does not block the retries for long:
+
+* ``cache``: the configured cache (Redis), with keys such as
+  ``idem:task:<22 characters>`` set with a TTL.
+* ``database``: ``FormSubmission`` rows, deleted in batches by the
+  ``prune_idempotency_keys`` command.
+"""
+import base64
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .exceptions import SubmissionInProgressException
+from .models import FormSubmission
+
+TTL = settings.IDEMPOTENCY_TTL
+PENDING_TTL = settings.IDEMPOTENCY_PENDING_TTL
+# Larger response bodies are not stored; their status and headers still are
+MAX_RESPONSE_SIZE = 64 * 1024
+# Headers replayed with a stored response
+STORED_HEADERS = ("Content-Type", "Location")
+
+PENDING = "pending"
+
+
+def parse_key(value: str | None) -> uuid.UUID | None:
+    """
+    Returns the UUID submitted as idempotency key, or None if it is invalid.
+    """
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def serialize_response(response: HttpResponse) -> dict:
+    stored = {
+        "status": response.status_code,
+        "headers": {name: response[name] for name in STORED_HEADERS if response.has_header(name)},
+    }
+    if not response.streaming and len(response.content) <= MAX_RESPONSE_SIZE:
+        stored["content"] = response.content.decode(response.charset)
+    return stored
+
+
+def deserialize_response(stored: dict) -> HttpResponse:
+    response = HttpResponse(stored.get("content", ""), status=stored["status"])
+    for name, value in stored["headers"].items():
+        response[name] = value
+    return response
+
+
+class CacheStore:
+    """
+    Idempotency keys in the cache, expiring with the cache TTL.
+    """
+
+    def key(self, namespace: str, key: uuid.UUID) -> str:
+        # 22 characters instead of the 36 of the canonical UUID form
+        compact = base64.urlsafe_b64encode(key.bytes).rstrip(b"=").decode()
+        return f"idem:{namespace}:{compact}"
+
+    def begin(self, namespace: str, key: uuid.UUID) -> dict | None:
+        cache_key = self.key(namespace, key)
+        if cache.add(cache_key, PENDING, PENDING_TTL):
+            return None
+        stored = cache.get(cache_key)
+        if stored is None:
+            # Expired between the two calls
+            return self.begin(namespace, key)
+        if stored == PENDING:
+            raise SubmissionInProgressException("This form is already being submitted.")
+        return stored
+
+    def complete(self, namespace: str, key: uuid.UUID, response: dict) -> None:
+        cache.set(self.key(namespace, key), response, TTL)
+
+    def release(self, namespace: str, key: uuid.UUID) -> None:
+        cache.delete(self.key(namespace, key))
+
+
+class DatabaseStore:
+    """
+    Idempotency keys stored as ``FormSubmission`` rows.
+
+    Expired rows, and rows still pending after ``PENDING_TTL``, are ignored
+    (and reclaimed on reuse) until the pruning job deletes them.
+    """
+
+    def begin(self, namespace: str, key: uuid.UUID) -> dict | None:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                FormSubmission.objects.create(namespace=namespace, uuid=key, created_at=now)
+            return None
+        except IntegrityError:
+            pass
+
+        submission = FormSubmission.objects.filter(namespace=namespace, uuid=key).first()
+        if submission is None:
+            # Pruned between the two queries
+            return self.begin(namespace, key)
+        ttl = PENDING_TTL if submission.response is None else TTL
+        if submission.created_at < now - timedelta(seconds=ttl):
+            # Reclaim the expired row, unless a concurrent request just did
+            reclaimed = FormSubmission.objects.filter(
+                pk=submission.pk, created_at=submission.created_at
+            ).update(created_at=now, response=None)
+            if reclaimed:
+                return None
+            raise SubmissionInProgressException("This form is already being submitted.")
+        if submission.response is None:
+            raise SubmissionInProgressException("This form is already being submitted.")
+        return submission.response
+
+    def complete(self, namespace: str, key: uuid.UUID, response: dict) -> None:
+        FormSubmission.objects.filter(namespace=namespace, uuid=key).update(response=response)
+
+    def release(self, namespace: str, key: uuid.UUID) -> None:
+        FormSubmission.objects.filter(namespace=namespace, uuid=key).delete()
+
+
+STORES = {"cache": CacheStore(), "database": DatabaseStore()}
+
+
+def prune(batch_size: int = 1000) -> int:
+    """
+    Deletes the expired rows of the database store, ``batch_size`` rows per
+    statement so that no long-running transaction holds their locks.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=TTL)
+    deleted = 0
+    while True:
+        pks = list(
+            FormSubmission.objects.filter(created_at__lt=cutoff).values_list("pk", flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += FormSubmission.objects.filter(pk__in=pks).delete()[0]
+
+
+def idempotent(namespace: str, backend: str = "cache", key_field: str = "uuid"):
+    """
+    Makes a view replay its response for duplicate POST submissions.
+
+    The key is read from the ``key_field`` POST parameter; requests without
+    a valid key are processed as usual. Redirects are stored and replayed;
+    any other response (e.g. a form re-rendered with errors) releases the key.
+
+    Args:
+        namespace (str): Short name of the submitted form, part of the keys.
+        backend (str): "cache" or "database".
+        key_field (str): The POST parameter holding the key.
+    """
+    store = STORES[backend]
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = parse_key(request.POST.get(key_field)) if request.method == "POST" else None
+            if key is None:
+                return view(request, *args, **kwargs)
+            try:
+                stored = store.begin(namespace, key)
+            except SubmissionInProgressException as exc:
+                return HttpResponse(str(exc), status=409)
+            if stored is not None:
+                return deserialize_response(stored)
+
+            try:
+                response = view(request, *args, **kwargs)
+            except BaseException:
+                store.release(namespace, key)
+                raise
+            if 300 <= response.status_code < 400:
+                store.complete(namespace, key, serialize_response(response))
+            else:
+                store.release(namespace, key)
+            return response
+
+        return wrapper
+
+    return decorator
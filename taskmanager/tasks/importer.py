@@ -0,0 +1,359 @@
+"""
+Streaming import of tasks, sprints and epics from CSV or NDJSON.
+
+Reads the format written by tasks.export: users are referenced by username,
+and sprints and epics by id. Records are read one at a time and written in
+batches: one ``bulk_create`` (or ``COPY`` on PostgreSQL) per batch for the
+rows, plus one per membership table and one for the watchers, so memory use
+and the number of statements per record stay constant.
+
+Ids present in the input are kept, so that memberships can reference the
+sprints and epics imported before the tasks. Import epics first, then
+sprints, then tasks.
+
+Each batch commits together with its ``ImportCheckpoint``, so an
+interrupted import resumed under the same checkpoint name skips exactly the
+records already imported.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, TextIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .bulk import allocate_ids, batched, copy_objects, copy_rows, supports_copy, suppress_auto_now
+from .export import LIST_SEPARATOR
+from .models import Email, Epic, ImportCheckpoint, Sprint, Task
+from .progress import adjust_progress
+
+KINDS = ("epics", "sprints", "tasks")
+MODELS = {"epics": Epic, "sprints": Sprint, "tasks": Task}
+DEFAULT_BATCH_SIZE = 5000
+
+
+def read_records(stream: TextIO, format: str) -> Iterator[dict]:
+    """
+    Yields the records of a CSV (with a header line) or NDJSON stream.
+    """
+    if format == "csv":
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class UserCache:
+    """
+    Resolves usernames to user ids, querying each unknown username once.
+
+    Args:
+        create_missing (bool): Create the users that do not exist, with an
+            unusable password, instead of reporting them.
+    """
+
+    def __init__(self, create_missing: bool = False):
+        self.create_missing = create_missing
+        self._ids: dict[str, int] = {}
+        self._missing: set[str] = set()
+
+    def load(self, usernames: Iterable[str]) -> None:
+        """
+        Loads the ids of a batch of usernames with at most one query (two
+        when missing users are created).
+        """
+        unknown = {name for name in usernames if name} - self._ids.keys() - self._missing
+        if not unknown:
+            return
+        if self.create_missing:
+            User.objects.bulk_create(
+                [User(username=name, password=make_password(None)) for name in unknown],
+                ignore_conflicts=True,
+            )
+        self._ids.update(User.objects.filter(username__in=unknown).values_list("username", "id"))
+        self._missing |= unknown - self._ids.keys()
+
+    def get(self, username: str) -> int:
+        """
+        Returns the id of a loaded username.
+
+        Raises:
+            ValidationError: If the user does not exist.
+        """
+        try:
+            return self._ids[username]
+        except KeyError:
+            raise ValidationError(f'User "{username}" does not exist.')
+
+
+def _list(value) -> list:
+    if isinstance(value, list):
+        return value
+    return [item for item in (value or "").split(LIST_SEPARATOR) if item]
+
+
+def _int(value, name: str) -> int | None:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"{name}: expected an integer, got {value!r}.")
+
+
+def _datetime(value, name: str, default: datetime) -> datetime:
+    if value in (None, ""):
+        return default
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValidationError(f"{name}: expected an ISO 8601 date and time, got {value!r}.")
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+def _date(value, name: str):
+    parsed = parse_date(value) if isinstance(value, str) else None
+    if parsed is None:
+        raise ValidationError(f"{name}: expected an ISO 8601 date, got {value!r}.")
+    return parsed
+
+
+def _clean(model, record: dict, name: str, default=""):
+    value = record.get(name)
+    try:
+        return model._meta.get_field(name).clean(default if value in (None, "") else value, None)
+    except ValidationError as exc:
+        raise ValidationError([f"{name}: {message}" for message in exc.messages])
+
+
+class Importer:
+    """
+    Imports the records of one kind in batches, under a named checkpoint.
+
+    Args:
+        kind (str): One of ``KINDS``.
+        checkpoint (str): Name of the checkpoint to resume from and update.
+        batch_size (int): Number of records written per transaction.
+        use_copy (bool): Load tasks and memberships with COPY (PostgreSQL).
+        users (UserCache): Resolves the creator and owner usernames.
+        skip_invalid (bool): Skip invalid records instead of failing.
+        on_skip: Called with the error message of each skipped record.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        checkpoint: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        use_copy: bool = False,
+        users: UserCache | None = None,
+        skip_invalid: bool = False,
+        on_skip=None,
+    ):
+        self.kind = kind
+        self.model = MODELS[kind]
+        self.batch_size = batch_size
+        self.use_copy = use_copy and supports_copy()
+        self.users = users or UserCache()
+        self.skip_invalid = skip_invalid
+        self.on_skip = on_skip
+        self.checkpoint, _ = ImportCheckpoint.objects.get_or_create(name=checkpoint, kind=kind)
+        # Ids of the sprints and epics known to exist, checked once each
+        self._existing: dict[type, set[int]] = {Sprint: set(), Epic: set()}
+
+    def run(self, records: Iterable[dict], on_batch=None) -> tuple[int, int]:
+        """
+        Imports the records following the checkpoint position.
+
+        Args:
+            records: The records, including those already imported.
+            on_batch: Called with the numbers of records imported and
+                skipped so far after each committed batch.
+
+        Returns:
+            tuple[int, int]: The numbers of imported and skipped records.
+
+        Raises:
+            ValidationError: On the first invalid record, unless invalid
+                records are skipped. The batches before it stay committed.
+        """
+        imported = skipped = 0
+        records = iter(records)
+        for _ in range(self.checkpoint.position):
+            if next(records, None) is None:
+                break
+        try:
+            with suppress_auto_now(self.model, "created_at", "updated_at"):
+                for batch in batched(records, self.batch_size):
+                    batch_imported, batch_skipped = self.import_batch(batch)
+                    imported += batch_imported
+                    skipped += batch_skipped
+                    if on_batch:
+                        on_batch(imported, skipped)
+        finally:
+            # Explicit ids do not advance the primary key sequence
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                    cursor.execute(sql)
+        return imported, skipped
+
+    def import_batch(self, records: list[dict]) -> tuple[int, int]:
+        """
+        Validates and writes a batch of records, and moves the checkpoint
+        past them, in one transaction. Records whose id is already taken are
+        invalid.
+
+        Returns:
+            tuple[int, int]: The numbers of imported and skipped records.
+        """
+        self.users.load(
+            username for record in records for username in (record.get("creator"), record.get("owner"))
+        )
+        if self.kind == "tasks":
+            self._load_existing(Sprint, (pk for record in records for pk in _list(record.get("sprints"))))
+            self._load_existing(Epic, (pk for record in records for pk in _list(record.get("epics"))))
+        elif self.kind == "sprints":
+            self._load_existing(Epic, (record.get("epic") for record in records))
+
+        # Ids already taken, by existing rows or earlier records of the batch
+        ids = {int(record["id"]) for record in records if str(record.get("id", "")).isdigit()}
+        taken = set(self.model.objects.filter(pk__in=ids).values_list("pk", flat=True)) if ids else set()
+        rows = []
+        for offset, record in enumerate(records):
+            try:
+                row = self.build(record)
+                pk = row[0].pk
+                if pk is not None:
+                    if pk in taken:
+                        raise ValidationError(f"id: {self.model._meta.verbose_name} {pk} already exists.")
+                    taken.add(pk)
+                rows.append(row)
+            except ValidationError as exc:
+                number = self.checkpoint.position + offset + 1
+                message = f"Record {number}: {' '.join(exc.messages)}"
+                if not self.skip_invalid:
+                    raise ValidationError(message)
+                if self.on_skip:
+                    self.on_skip(message)
+
+        with transaction.atomic():
+            self.write(rows)
+            skipped = len(records) - len(rows)
+            self.checkpoint.position += len(records)
+            self.checkpoint.imported += len(rows)
+            self.checkpoint.skipped += skipped
+            self.checkpoint.save()
+        return len(rows), skipped
+
+    def _load_existing(self, model, ids: Iterable) -> None:
+        ids = {int(pk) for pk in ids if str(pk).isdigit()} - self._existing[model]
+        if ids:
+            self._existing[model] |= set(model.objects.filter(pk__in=ids).values_list("pk", flat=True))
+
+    def _existing_id(self, model, value, name: str) -> int | None:
+        pk = _int(value, name)
+        if pk is not None and pk not in self._existing[model]:
+            raise ValidationError(f"{name}: {model._meta.verbose_name} {pk} does not exist.")
+        return pk
+
+    def build(self, record: dict) -> tuple[models.Model, list[int], list[int], list[str]]:
+        """
+        Builds the unsaved row of a record, with the sprint ids, epic ids and
+        watchers of a task.
+
+        Raises:
+            ValidationError: If the record is invalid.
+        """
+        now = timezone.now()
+        common = {
+            "id": _int(record.get("id"), "id"),
+            "description": _clean(self.model, record, "description"),
+            "creator_id": self.users.get(record.get("creator")),
+        }
+        common["created_at"] = _datetime(record.get("created_at"), "created_at", now)
+        common["updated_at"] = _datetime(record.get("updated_at"), "updated_at", common["created_at"])
+
+        if self.kind == "epics":
+            return Epic(name=_clean(Epic, record, "name"), **common), [], [], []
+
+        if self.kind == "sprints":
+            start_date = _date(record.get("start_date"), "start_date")
+            end_date = _date(record.get("end_date"), "end_date")
+            if end_date <= start_date:
+                raise ValidationError("end_date: must be after start_date.")
+            sprint = Sprint(
+                name=_clean(Sprint, record, "name"),
+                start_date=start_date,
+                end_date=end_date,
+                epic_id=self._existing_id(Epic, record.get("epic"), "epic"),
+                **common,
+            )
+            return sprint, [], [], []
+
+        owner = record.get("owner")
+        task = Task(
+            title=_clean(Task, record, "title"),
+            status=_clean(Task, record, "status", default="UNASSIGNED"),
+            owner_id=self.users.get(owner) if owner else None,
+            **common,
+        )
+        sprint_ids = {self._existing_id(Sprint, pk, "sprints") for pk in _list(record.get("sprints"))}
+        epic_ids = {self._existing_id(Epic, pk, "epics") for pk in _list(record.get("epics"))}
+        watchers = set()
+        for email in _list(record.get("watchers")):
+            try:
+                watchers.add(Email._meta.get_field("email").clean(email, None))
+            except ValidationError as exc:
+                raise ValidationError([f"watchers: {message}" for message in exc.messages])
+        return task, sorted(sprint_ids), sorted(epic_ids), sorted(watchers)
+
+    def write(self, rows: list[tuple]) -> None:
+        objs = [row[0] for row in rows]
+        if self.kind != "tasks":
+            self.model.objects.bulk_create(objs)
+            return
+
+        if self.use_copy:
+            missing = [obj for obj in objs if obj.pk is None]
+            for obj, pk in zip(missing, allocate_ids(Task, len(missing))):
+                obj.pk = pk
+            copy_objects(objs)
+        else:
+            Task.objects.bulk_create(objs)
+
+        # rows hold (task, sprint ids, epic ids, watchers)
+        for model, column in ((Sprint, 1), (Epic, 2)):
+            links = [(owner_id, row[0].pk) for row in rows for owner_id in row[column]]
+            self._link(model, links)
+            # Through-table inserts bypass the m2m_changed signal
+            deltas = {}
+            for row in rows:
+                for owner_id in row[column]:
+                    total, done = deltas.get(owner_id, (0, 0))
+                    deltas[owner_id] = (total + 1, done + (row[0].status == "DONE"))
+            adjust_progress(model, deltas)
+
+        Email.objects.bulk_create(
+            [Email(task_id=task.pk, email=email) for task, _, _, watchers in rows for email in watchers],
+            ignore_conflicts=True,
+        )
+
+    def _link(self, model, links: list[tuple[int, int]]) -> None:
+        """
+        Inserts ``(sprint or epic id, task id)`` rows into the through table
+        of ``model.tasks``.
+        """
+        through = model.tasks.through
+        owner_field = f"{model._meta.model_name}_id"
+        if self.use_copy:
+            copy_rows(through, [owner_field, "task_id"], links)
+        else:
+            through.objects.bulk_create(
+                [through(**{owner_field: owner_id, "task_id": task_id}) for owner_id, task_id in links]
+            )
@@ -0,0 +1,130 @@
+import io
+import json
+import platform
+from typing import Any, Dict, List
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from tasks.benchmarks import ScenarioExhausted, build_scenarios, compare, measure
+from tasks.bulk import supports_copy
+from tasks.models import Task
+
+# Constants for default values
+DEFAULT_SIZES: List[int] = [10_000, 100_000, 1_000_000]
+DEFAULT_ITERATIONS: int = 20
+DEFAULT_TOLERANCE: float = 0.25
+DEFAULT_SLACK_MS: float = 2.0
+DEFAULT_SEED: int = 42
+
+
+class Command(BaseCommand):
+    help: str = ('Seed datasets of increasing size, measure latency percentiles and query counts of the tasks '
+                 'views and services, and compare them against a baseline')
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                            help='The dataset sizes, in tasks, to benchmark (default: 10000 100000 1000000)')
+        parser.add_argument('-n', '--iterations', type=int, default=DEFAULT_ITERATIONS,
+                            help='The number of measured runs per scenario (default: 20)')
+        parser.add_argument('--scenarios', nargs='+', default=None,
+                            help='Only run the named scenarios')
+        parser.add_argument('-o', '--output', default=None,
+                            help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', default=None,
+                            help='Fail if the results regress against this JSON file from a previous run')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                            help='Allowed p95 latency increase over the baseline, as a ratio (default: 0.25)')
+        parser.add_argument('--slack-ms', type=float, default=DEFAULT_SLACK_MS,
+                            help='Allowed absolute p95 latency increase, in milliseconds (default: 2)')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                            help='Seed of the datasets and of the sampled requests (default: 42)')
+        parser.add_argument('--no-seed-data', action='store_true',
+                            help='Benchmark the data already in the database instead of seeding each size')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='Do not ask for confirmation before deleting the existing data')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        sizes: List[int] = kwargs['sizes']
+        seed_data: bool = not kwargs['no_seed_data']
+        self.verbosity: int = kwargs['verbosity']
+
+        if seed_data and kwargs['interactive']:
+            confirm: str = input('Seeding deletes every regular user, task, epic and sprint in the '
+                                 f'"{connection.settings_dict["NAME"]}" database. Type "yes" to continue: ')
+            if confirm != 'yes':
+                raise CommandError('Benchmark cancelled.')
+
+        results: Dict[str, Dict[str, dict]] = {}
+        for size in sizes if seed_data else [Task.objects.count()]:
+            if seed_data:
+                self.seed(size, kwargs['seed'])
+            results[str(size)] = self.run_scenarios(size, kwargs['iterations'], kwargs['scenarios'], kwargs['seed'])
+
+        report: dict = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': f'{connection.vendor} {connection.pg_version if connection.vendor == "postgresql" else ""}'.strip(),
+                'iterations': kwargs['iterations'],
+            },
+            'results': results,
+        }
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {kwargs["output"]}'))
+
+        if kwargs['baseline']:
+            with open(kwargs['baseline']) as baseline_file:
+                baseline: dict = json.load(baseline_file)['results']
+            regressions: List[str] = compare(results, baseline, kwargs['tolerance'], kwargs['slack_ms'])
+            if regressions:
+                raise CommandError('Performance regressions detected:\n  ' + '\n  '.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def seed(self, size: int, seed: int) -> None:
+        """
+        Replace the data in the database with a dataset of ``size`` tasks.
+
+        Args:
+            size (int): The number of tasks to create.
+            seed (int): Seed of the random generator, for identical datasets across runs.
+        """
+        self.stdout.write(f'Seeding {size} tasks...')
+        call_command(
+            'create_or_delete_users_or_tasks', bulk=True, delete=True, copy=supports_copy(), seed=seed,
+            tasks=size, users=max(size // 1000, 30), epics=max(size // 10_000, 10), sprints=max(size // 20_000, 5),
+            stdout=self.stdout if self.verbosity > 1 else io.StringIO(),
+        )
+
+    def run_scenarios(self, size: int, iterations: int, names: List[str] | None, seed: int) -> Dict[str, dict]:
+        """
+        Measure every scenario against the current dataset and print a summary line for each.
+
+        Returns:
+            Dict[str, dict]: The measurements by scenario name.
+        """
+        results: Dict[str, dict] = {}
+        # The test client talks to the "testserver" host
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            scenarios = build_scenarios(seed)
+            for name, scenario in scenarios.items():
+                if names and name not in names:
+                    continue
+                try:
+                    results[name] = measure(scenario, iterations)
+                except ScenarioExhausted as exc:
+                    self.stdout.write(self.style.WARNING(f'{size:>9} {name:<28} skipped: {exc}'))
+                    continue
+                stats: dict = results[name]
+                self.stdout.write(
+                    f'{size:>9} {name:<28} p50 {stats["p50_ms"]:>9.2f} ms  p95 {stats["p95_ms"]:>9.2f} ms  '
+                    f'p99 {stats["p99_ms"]:>9.2f} ms  {stats["queries"]:>4} queries'
+                    + (self.style.ERROR(f'  {stats["errors"]} errors') if stats['errors'] else '')
+                )
+        return results
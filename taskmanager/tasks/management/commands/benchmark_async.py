@@ -0,0 +1,64 @@
+import json
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.utils import timezone
+from tasks.benchmarks import ASGI_ENDPOINTS, BENCHMARK_USERNAME, asgi_load
+from tasks.models import Task
+
+# Constants for default values
+DEFAULT_CONCURRENCY: List[int] = [1, 16, 64, 256]
+DEFAULT_REQUESTS: int = 500
+DEFAULT_SEED: int = 42
+MODES: List[str] = ['sync', 'async']
+
+
+class Command(BaseCommand):
+    help: str = ('Compare the requests per second and latency percentiles of the sync and async views of the '
+                 'task list, detail, board and claim endpoints under concurrent ASGI clients')
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--concurrency', type=int, nargs='+', default=DEFAULT_CONCURRENCY,
+                            help='The numbers of concurrent clients to run (default: 1 16 64 256)')
+        parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                            help='The number of requests sent per endpoint, mode and concurrency (default: 500)')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ASGI_ENDPOINTS), default=list(ASGI_ENDPOINTS),
+                            help='The endpoints to benchmark (default: all)')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                            help='Seed of the tasks requested by the detail endpoint (default: 42)')
+        parser.add_argument('-o', '--output', default=None,
+                            help='Write the results as JSON to this file')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        if not Task.objects.exists():
+            raise CommandError('There are no tasks to request, seed some first.')
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+        # The claim endpoints require a session
+        client: Client = Client()
+        client.force_login(user)
+        started = timezone.now()
+
+        results: Dict[str, Dict[str, Dict[str, dict]]] = {}
+        try:
+            for endpoint in kwargs['endpoints']:
+                for concurrency in kwargs['concurrency']:
+                    for mode in MODES:
+                        stats: dict = asgi_load(
+                            endpoint, mode, concurrency, kwargs['requests'], client.cookies, kwargs['seed']
+                        )
+                        results.setdefault(endpoint, {}).setdefault(str(concurrency), {})[mode] = stats
+                        self.stdout.write(
+                            f'{endpoint:<18} {mode:<5} {concurrency:>4} clients '
+                            f'{stats["requests_per_s"]:>9.1f} req/s  p50 {stats["p50_ms"]:>8.2f} ms  '
+                            f'p99 {stats["p99_ms"]:>8.2f} ms  {stats["errors"]:>4} errors'
+                        )
+        finally:
+            # Hand the claimed tasks back
+            Task.objects.filter(owner=user, updated_at__gte=started).update(status='UNASSIGNED', owner=None)
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as output:
+                json.dump({'requests': kwargs['requests'], 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {kwargs["output"]}'))
@@ -0,0 +1,60 @@
+import json
+from typing import Any, Dict, List
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tasks.benchmarks import BENCHMARK_USERNAME, claim_contention
+from tasks.claims import STRATEGIES
+from tasks.models import Task
+
+# Constants for default values
+DEFAULT_PROCESSES: List[int] = [1, 4, 16]
+DEFAULT_TASKS: int = 200
+DEFAULT_SEED: int = 42
+
+
+class Command(BaseCommand):
+    help: str = ('Race several processes for the same unassigned tasks and compare the throughput, latency, '
+                 'conflicts and retries of the claim strategies')
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--processes', type=int, nargs='+', default=DEFAULT_PROCESSES,
+                            help='The numbers of concurrent worker processes to run (default: 1 4 16)')
+        parser.add_argument('--tasks', type=int, default=DEFAULT_TASKS,
+                            help='The number of unassigned tasks every worker races for (default: 200)')
+        parser.add_argument('--strategies', nargs='+', choices=STRATEGIES, default=list(STRATEGIES),
+                            help='The claim strategies to compare (default: all)')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                            help='Seed of the order in which workers attempt the tasks (default: 42)')
+        parser.add_argument('-o', '--output', default=None,
+                            help='Write the results as JSON to this file')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        task_ids: List[int] = list(
+            Task.objects.filter(status='UNASSIGNED', owner__isnull=True)
+            .order_by('id').values_list('id', flat=True)[:kwargs['tasks']]
+        )
+        if not task_ids:
+            raise CommandError('There are no unassigned tasks to claim, seed some first.')
+        user, _ = User.objects.get_or_create(username=BENCHMARK_USERNAME)
+
+        results: Dict[str, Dict[str, dict]] = {}
+        try:
+            for processes in kwargs['processes']:
+                for strategy in kwargs['strategies']:
+                    stats: dict = claim_contention(strategy, processes, task_ids, user.id, kwargs['seed'])
+                    results.setdefault(str(processes), {})[strategy] = stats
+                    self.stdout.write(
+                        f'{processes:>3} processes {strategy:<12} {stats["claims_per_s"]:>9.1f} claims/s  '
+                        f'p50 {stats["p50_ms"]:>8.2f} ms  p99 {stats["p99_ms"]:>8.2f} ms  '
+                        f'{stats["conflicts"]:>6} conflicts  {stats["retries"]:>6} retries  '
+                        f'{stats["exhausted"]:>4} exhausted'
+                    )
+        finally:
+            # Leave the pool as it was found
+            Task.objects.filter(id__in=task_ids).update(status='UNASSIGNED', owner=None)
+
+        if kwargs['output']:
+            with open(kwargs['output'], 'w') as output:
+                json.dump({'tasks': len(task_ids), 'results': results}, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Results written to {kwargs["output"]}'))
@@ -1,9 +1,14 @@
 import random
 import string
+import time
 
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.db import connection, transaction
+from tasks.bulk import allocate_ids, batched, copy_objects, supports_copy, suppress_auto_now
 from tasks.models import Task, Epic, Sprint
+from tasks.progress import PROGRESS_MODELS, refresh_progress
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import timezone
 from typing import Any, Dict, List
@@ -17,6 +22,14 @@ DEFAULT_EPIC_COUNT: int = 50
 DEFAULT_SPRINT_COUNT: int = 10
 DEFAULT_TASK_STATUSES: List[str] = ['UNASSIGNED', 'IN_PROGRESS', 'DONE', 'ARCHIVED']
 
+# Constants for the bulk mode
+DEFAULT_BATCH_SIZE: int = 5000
+DEFAULT_DAYS: int = 90
+DEFAULT_PASSWORD: str = 'password'
+# Share of tasks linked to an epic and to a sprint
+EPIC_LINK_RATIO: float = 0.7
+SPRINT_LINK_RATIO: float = 0.5
+
 class Command(BaseCommand):
     help: str = 'Create a specified number of users, tasks, epics, and sprints with random attributes'
 
@@ -31,6 +44,18 @@ class Command(BaseCommand):
                             help='The number of sprints to create (default: 10)')
         parser.add_argument('--delete', action='store_true',
                             help='Delete all existing regular users, tasks, epics, and sprints before creating new ones')
+        parser.add_argument('--bulk', action='store_true',
+                            help='Insert rows in batches (bulk_create or COPY) for large load-testing datasets')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='The number of rows inserted per batch in bulk mode (default: 5000)')
+        parser.add_argument('--copy', action='store_true',
+                            help='Load tasks and their memberships with COPY in bulk mode (PostgreSQL only)')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Seed of the random generator, for reproducible datasets')
+        parser.add_argument('--days', type=int, default=DEFAULT_DAYS,
+                            help='Spread task creation dates over this many past days in bulk mode (default: 90)')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD,
+                            help='The password shared by all users created in bulk mode (default: "password")')
 
     def handle(self, *args: Any, **kwargs: Any) -> None:
         num_users: int = kwargs['users']
@@ -39,6 +64,13 @@ class Command(BaseCommand):
         num_sprints: int = kwargs['sprints']
         should_delete: bool = kwargs['delete']
 
+        if kwargs['seed'] is not None:
+            random.seed(kwargs['seed'])
+
+        if kwargs['bulk']:
+            self.handle_bulk(num_users, num_tasks, num_epics, num_sprints, should_delete, **kwargs)
+            return
+
         if should_delete:
             self.stdout.write('Deleting all existing regular users, tasks, epics, and sprints...')
             self.delete_regular_users_tasks_epics_sprints()
@@ -49,6 +81,191 @@ class Command(BaseCommand):
         self.create_epics(num_epics)
         self.create_sprints(num_sprints)
 
+    def handle_bulk(self, num_users: int, num_tasks: int, num_epics: int, num_sprints: int,
+                    should_delete: bool, **kwargs: Any) -> None:
+        """
+        Create the dataset in batches, fast enough for millions of rows.
+
+        Users share one pre-hashed password, creators and owners are drawn from
+        an in-memory pool of user ids, and tasks are linked to epics and sprints
+        through bulk inserts into the M2M tables.
+        """
+        batch_size: int = kwargs['batch_size']
+        use_copy: bool = kwargs['copy']
+        if use_copy and not supports_copy():
+            self.stdout.write(self.style.WARNING('COPY is only supported on PostgreSQL, using bulk_create instead'))
+            use_copy = False
+
+        if should_delete:
+            self.stdout.write('Truncating all existing regular users, tasks, epics, and sprints...')
+            self.truncate_regular_users_tasks_epics_sprints()
+            self.stdout.write(self.style.SUCCESS('Successfully deleted all existing regular users, tasks, epics, and sprints'))
+
+        user_ids: List[int] = self.bulk_create_users(num_users, kwargs['password'], batch_size)
+        if not user_ids:
+            self.stdout.write(self.style.ERROR('Insufficient users for task assignment. Stopping task creation.'))
+            return
+        epic_ids: List[int] = self.bulk_create_epics(num_epics, user_ids, batch_size)
+        sprint_ids: List[int] = self.bulk_create_sprints(num_sprints, user_ids, epic_ids, kwargs['days'], batch_size)
+        self.bulk_create_tasks(num_tasks, user_ids, epic_ids, sprint_ids, kwargs['days'], batch_size, use_copy)
+
+        if connection.vendor == 'postgresql':
+            # Refresh planner statistics so the new rows get sensible query plans
+            self.stdout.write('Analyzing tables...')
+            with connection.cursor() as cursor:
+                for model in (User, Task, Epic, Sprint, Epic.tasks.through, Sprint.tasks.through):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+
+        self.stdout.write('Rebuilding sprint and epic counters...')
+        for model in PROGRESS_MODELS:
+            refresh_progress(model)
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt sprint and epic counters'))
+
+    def bulk_create_users(self, num_users: int, password: str, batch_size: int) -> List[int]:
+        """
+        Create users in batches and return the ids of all regular users.
+
+        The password is hashed once and shared, since hashing it per user
+        dominates the cost of creating users.
+
+        Args:
+            num_users (int): The number of users to create.
+            password (str): The password shared by the new users.
+            batch_size (int): The number of users inserted per batch.
+
+        Returns:
+            List[int]: The ids of every regular user, including existing ones.
+        """
+        self.stdout.write(f'Creating {num_users} users...')
+        hashed_password: str = make_password(password)
+        prefix: str = self._generate_username(size=4)
+        users = (
+            User(username=f'{prefix}_{index:07d}', email=f'{prefix}_{index:07d}@example.com',
+                 password=hashed_password)
+            for index in range(num_users)
+        )
+        for batch in batched(users, batch_size):
+            # Usernames repeat when a --seed is reused, keep the existing users
+            User.objects.bulk_create(batch, ignore_conflicts=True)
+        self.stdout.write(self.style.SUCCESS('Successfully created users'))
+        return list(User.objects.filter(is_superuser=False).values_list('id', flat=True))
+
+    def bulk_create_epics(self, num_epics: int, user_ids: List[int], batch_size: int) -> List[int]:
+        """
+        Create epics in batches and return their ids.
+        """
+        self.stdout.write(f'Creating {num_epics} epics...')
+        epics = (
+            Epic(name=f'Epic {index + 1}', description=f'Description of Epic {index + 1}',
+                 creator_id=random.choice(user_ids))
+            for index in range(num_epics)
+        )
+        epic_ids: List[int] = []
+        for batch in batched(epics, batch_size):
+            epic_ids.extend(epic.pk for epic in Epic.objects.bulk_create(batch))
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(epic_ids)} epics'))
+        return epic_ids
+
+    def bulk_create_sprints(self, num_sprints: int, user_ids: List[int], epic_ids: List[int], days: int,
+                            batch_size: int) -> List[int]:
+        """
+        Create sprints spread over the last ``days`` days and return their ids.
+        """
+        self.stdout.write(f'Creating {num_sprints} sprints...')
+        today = timezone.localdate()
+        sprints = []
+        for index in range(num_sprints):
+            start_date = today - timezone.timedelta(days=random.randint(0, max(days, 1)))
+            sprints.append(Sprint(
+                name=f'Sprint {index + 1}', description=f'Description of Sprint {index + 1}',
+                start_date=start_date, end_date=start_date + timezone.timedelta(days=random.randint(7, 14)),
+                creator_id=random.choice(user_ids), epic_id=random.choice(epic_ids) if epic_ids else None,
+            ))
+        sprint_ids: List[int] = []
+        for batch in batched(sprints, batch_size):
+            sprint_ids.extend(sprint.pk for sprint in Sprint.objects.bulk_create(batch))
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(sprint_ids)} sprints'))
+        return sprint_ids
+
+    def bulk_create_tasks(self, num_tasks: int, user_ids: List[int], epic_ids: List[int], sprint_ids: List[int],
+                          days: int, batch_size: int, use_copy: bool) -> None:
+        """
+        Create tasks and their epic and sprint memberships in batches.
+
+        Each batch is one transaction holding one insert for the tasks and one
+        per membership table. Creation dates are spread over the last ``days``
+        days, and unassigned tasks have no owner.
+        """
+        self.stdout.write(f'Creating {num_tasks} tasks...')
+        now = timezone.now()
+        span: float = days * 86400.0
+        created: int = 0
+        started: float = time.monotonic()
+
+        with suppress_auto_now(Task, 'created_at', 'updated_at'):
+            for batch_start in range(0, num_tasks, batch_size):
+                tasks: List[Task] = []
+                for index in range(batch_start, min(batch_start + batch_size, num_tasks)):
+                    status: str = random.choice(DEFAULT_TASK_STATUSES)
+                    created_at = now - timezone.timedelta(seconds=random.uniform(0, span))
+                    tasks.append(Task(
+                        title=f'Task {index + 1}', description=f'Description of Task {index + 1}', status=status,
+                        creator_id=random.choice(user_ids),
+                        owner_id=None if status == 'UNASSIGNED' else random.choice(user_ids),
+                        created_at=created_at, updated_at=created_at,
+                    ))
+
+                with transaction.atomic():
+                    if use_copy:
+                        for task, pk in zip(tasks, allocate_ids(Task, len(tasks))):
+                            task.pk = pk
+                        copy_objects(tasks)
+                    else:
+                        Task.objects.bulk_create(tasks)
+                    self._bulk_link(Epic, epic_ids, tasks, EPIC_LINK_RATIO, use_copy)
+                    self._bulk_link(Sprint, sprint_ids, tasks, SPRINT_LINK_RATIO, use_copy)
+
+                created += len(tasks)
+                rate: float = created / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f'  {created}/{num_tasks} tasks ({rate:,.0f} rows/s)')
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {created} tasks'))
+
+    def _bulk_link(self, model: Any, owner_ids: List[int], tasks: List[Task], ratio: float, use_copy: bool) -> None:
+        """
+        Link a share of the tasks to a random epic or sprint with one insert.
+        """
+        if not owner_ids:
+            return
+        through = model.tasks.through
+        owner_field: str = f'{model._meta.model_name}_id'
+        links = [
+            through(**{owner_field: random.choice(owner_ids), 'task_id': task.pk})
+            for task in tasks
+            if random.random() < ratio
+        ]
+        if use_copy:
+            for link, pk in zip(links, allocate_ids(through, len(links))):
+                link.pk = pk
+            copy_objects(links)
+        else:
+            through.objects.bulk_create(links)
+
+    def truncate_regular_users_tasks_epics_sprints(self) -> None:
+        """
+        Delete all regular users, tasks, epics, and sprints, using TRUNCATE on PostgreSQL.
+        """
+        if connection.vendor != 'postgresql':
+            self.delete_regular_users_tasks_epics_sprints()
+            return
+
+        tables: List[str] = [Task._meta.db_table, Epic._meta.db_table, Sprint._meta.db_table]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                # CASCADE also empties the M2M and watcher tables referencing them
+                cursor.execute('TRUNCATE {} RESTART IDENTITY CASCADE'.format(
+                    ', '.join(connection.ops.quote_name(table) for table in tables)))
+            User.objects.filter(is_superuser=False).delete()
+
     def create_users(self, num_users: int) -> None:
         """
         Create a specified number of users with random attributes.
@@ -103,8 +320,7 @@ class Command(BaseCommand):
                 break
             name: str = f'Epic {_ + 1}'
             description: str = f'Description of Epic {_ + 1}'
-            completion_status: float = round(random.uniform(0.0, 100.0), 2)
-            Epic.objects.create(name=name, description=description, completion_status=completion_status, creator=creator)
+            Epic.objects.create(name=name, description=description, creator=creator)
         self.stdout.write(self.style.SUCCESS(f'Successfully created {min(num_epics, _)} epics'))
 
     def create_sprints(self, num_sprints: int) -> None:
@@ -0,0 +1,30 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from tasks.export import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, export
+
+
+class Command(BaseCommand):
+    help: str = ('Export all the tasks (with their sprints, epics, owners and watchers), sprints or epics as '
+                 'CSV or NDJSON, streaming the rows so that memory use stays flat')
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('kind', choices=list(EXPORTS),
+                            help='What to export')
+        parser.add_argument('-f', '--format', choices=FORMATS, default='csv',
+                            help='The output format (default: csv)')
+        parser.add_argument('-o', '--output', default=None,
+                            help='Write the export to this file instead of the standard output')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='The number of rows fetched and written at a time (default: 2000)')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        chunks = export(kwargs['kind'], kwargs['format'], kwargs['chunk_size'])
+        if kwargs['output'] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(kwargs['output'], 'w', newline='', encoding='utf-8') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Exported {kwargs["kind"]} to {kwargs["output"]}'))
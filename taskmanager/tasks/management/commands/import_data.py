@@ -0,0 +1,65 @@
+import os
+import time
+from typing import Any
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from tasks.export import FORMATS
+from tasks.importer import DEFAULT_BATCH_SIZE, KINDS, Importer, UserCache, read_records
+
+
+class Command(BaseCommand):
+    help: str = ('Import tasks, sprints or epics from a CSV or NDJSON file in the export_data format, in '
+                 'batches, resuming from the last committed batch of a previous run')
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('kind', choices=KINDS,
+                            help='What to import; import epics, then sprints, then tasks')
+        parser.add_argument('path',
+                            help='The file to import')
+        parser.add_argument('-f', '--format', choices=FORMATS, default=None,
+                            help='The input format (default: guessed from the file extension)')
+        parser.add_argument('--checkpoint', default=None,
+                            help='The name of the checkpoint recording the progress of the import, '
+                                 'to resume it (default: the file name)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='The number of records written per transaction (default: 5000)')
+        parser.add_argument('--copy', action='store_true',
+                            help='Load tasks and their memberships with COPY (PostgreSQL only)')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create the creators and owners that do not exist, with unusable passwords')
+        parser.add_argument('--skip-invalid', action='store_true',
+                            help='Report and skip invalid records instead of stopping at the first one')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        path: str = kwargs['path']
+        format: str = kwargs['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        importer = Importer(
+            kwargs['kind'],
+            kwargs['checkpoint'] or os.path.basename(path),
+            batch_size=kwargs['batch_size'],
+            use_copy=kwargs['copy'],
+            users=UserCache(create_missing=kwargs['create_users']),
+            skip_invalid=kwargs['skip_invalid'],
+            on_skip=lambda message: self.stderr.write(f'Skipped: {message}'),
+        )
+        if importer.checkpoint.position:
+            self.stdout.write(f'Resuming after record {importer.checkpoint.position}')
+
+        started: float = time.monotonic()
+
+        def report(imported: int, skipped: int) -> None:
+            rate: float = (imported + skipped) / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f'  {imported} imported, {skipped} skipped ({rate:,.0f} rows/s)')
+
+        with open(path, newline='', encoding='utf-8') as stream:
+            try:
+                imported, skipped = importer.run(read_records(stream, format), on_batch=report)
+            except ValidationError as exc:
+                raise CommandError(
+                    f'{exc.messages[0]} Fix the record and run the command again to resume the import.'
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {imported} {kwargs["kind"]} ({skipped} skipped) '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
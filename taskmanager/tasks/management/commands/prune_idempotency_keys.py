@@ -0,0 +1,18 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from tasks.idempotency import prune
+
+DEFAULT_BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help: str = 'Delete the expired form submissions of the database idempotency store'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='The number of rows deleted per statement (default: 1000)')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        deleted: int = prune(kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully deleted {deleted} expired form submissions'))
@@ -0,0 +1,50 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from tasks.progress import PROGRESS_MODELS, refresh_progress
+
+DEFAULT_BATCH_SIZE: int = 1000
+
+
+class Command(BaseCommand):
+    help: str = 'Recompute the denormalized task counters of every sprint and epic'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='The number of sprints or epics updated per statement (default: 1000)')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        batch_size: int = kwargs['batch_size']
+
+        for model in PROGRESS_MODELS:
+            name: str = model._meta.verbose_name_plural
+            self.stdout.write(f'Rebuilding counters of {name}...')
+            updated: int = self.rebuild(model, batch_size)
+            self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt counters of {updated} {name}'))
+
+    def rebuild(self, model: Any, batch_size: int) -> int:
+        """
+        Recompute the counters of one model in primary key batches.
+
+        Each batch is one UPDATE in its own transaction, so row locks are only
+        held for a short time on large tables.
+
+        Args:
+            model: Sprint or Epic.
+            batch_size (int): The number of rows updated per statement.
+
+        Returns:
+            int: The number of rows updated.
+        """
+        updated: int = 0
+        last_pk: int = 0
+        while True:
+            pks = list(
+                model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not pks:
+                return updated
+            with transaction.atomic():
+                updated += refresh_progress(model, pks)
+            last_pk = pks[-1]
@@ -0,0 +1,39 @@
+import smtplib
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError
+from tasks.outbox import drain
+
+DEFAULT_BATCH_SIZE: int = 100
+DEFAULT_INTERVAL: float = 5.0
+
+
+class Command(BaseCommand):
+    help: str = 'Deliver the emails queued in the outbox, retrying failed ones with a backoff'
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='The number of messages locked and sent per transaction (default: 100)')
+        parser.add_argument('--once', action='store_true',
+                            help='Deliver the messages currently due and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                            help='Seconds between two polls of the outbox (default: 5)')
+
+    def handle(self, *args: Any, **kwargs: Any) -> None:
+        while True:
+            try:
+                sent, failed = drain(kwargs['batch_size'])
+            except (OSError, smtplib.SMTPException) as exc:
+                # The mail server is unreachable: the messages stay queued
+                if kwargs['once']:
+                    raise CommandError(f'Cannot connect to the mail server: {exc}')
+                self.stderr.write(f'Cannot connect to the mail server, retrying in {kwargs["interval"]}s: {exc}')
+                time.sleep(kwargs['interval'])
+                continue
+            if sent or failed:
+                self.stdout.write(self.style.SUCCESS(f'Sent {sent} messages') + (
+                    self.style.ERROR(f', {failed} failed') if failed else ''))
+            if kwargs['once']:
+                return
+            time.sleep(kwargs['interval'])
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("tasks.sql")
+
+# Literals and placeholder lists that vary between queries of the same shape
+_PLACEHOLDER_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Normalizes a SQL statement to its shape, so that queries differing only
+    by their parameters (e.g. one per row of an N+1 loop) compare equal.
+    """
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    return _NUMBER_LITERAL.sub("?", sql)
+
+
+class QueryRecorder:
+    """
+    Records the number, duration and shapes of the queries run while installed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    @contextmanager
+    def install(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Reports the SQL cost of a sample of requests.
+
+    For each sampled request, the query count and total database time are
+    added to the response as a ``Server-Timing`` header and logged on the
+    ``tasks.sql`` logger. When a single query shape runs more often than
+    ``SQL_INSTRUMENTATION_REPEAT_THRESHOLD`` times, a warning flags the view
+    as a likely N+1.
+
+    Requests are sampled at ``SQL_INSTRUMENTATION_SAMPLE_RATE`` (0 disables
+    the middleware, 1 instruments every request); unsampled requests only
+    pay for one random draw.
+
+    Database connections are per thread. Under ASGI, queries run in the
+    thread that runs the request's thread-sensitive ``sync_to_async`` calls
+    (sync views, the async ORM), so the recorder is installed on the
+    connections of that thread. Queries run with
+    ``sync_to_async(thread_sensitive=False)`` are not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        self.repeat_threshold = settings.SQL_INSTRUMENTATION_REPEAT_THRESHOLD
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryRecorder().install() as recorder:
+            response = self.get_response(request)
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        stack = ExitStack()
+        await sync_to_async(stack.enter_context)(recorder.install())
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        self.report(request, response, recorder, time.perf_counter() - started)
+        return response
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def report(self, request, response, recorder: QueryRecorder, duration: float) -> None:
+        """
+        Adds the Server-Timing header and logs the metrics of one request.
+        """
+        db_ms = recorder.duration * 1000
+        timing = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f"total;dur={duration * 1000:.1f}"
+        )
+        if response.has_header("Server-Timing"):
+            timing = f"{response['Server-Timing']}, {timing}"
+        response["Server-Timing"] = timing
+
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else None
+        metrics = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(db_ms, 1),
+            "total_ms": round(duration * 1000, 1),
+        }
+        logger.info(
+            "sql method=%(method)s path=%(path)s view=%(view)s status=%(status)s "
+            "queries=%(queries)s db_ms=%(db_ms)s total_ms=%(total_ms)s",
+            metrics,
+            extra={"sql_metrics": metrics},
+        )
+
+        for shape, repeats in recorder.shapes.most_common():
+            if repeats <= self.repeat_threshold:
+                break
+            shape_id = hashlib.sha1(shape.encode()).hexdigest()[:12]
+            logger.warning(
+                "sql possible N+1 view=%s path=%s repeats=%d fingerprint=%s sql=%.300s",
+                view,
+                request.path,
+                repeats,
+                shape_id,
+                shape,
+                extra={"sql_metrics": {**metrics, "repeats": repeats, "fingerprint": shape_id}},
+            )
@@ -11,6 +11,8 @@ class Migration(migrations.Migration):
 
     dependencies = [
         ('tasks', '0002_auto_20240407_1424'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
     ]
 
     operations = [
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.2 on 2026-10-18 10:05
+
+import django.core.validators
+from django.db import migrations, models
+
+
+# Fill the new counters for existing sprints and epics. Plain SQL, so that
+# the migration does not depend on the current models and tasks.progress.
+COUNT_TASKS = """
+UPDATE tasks_{owner} SET
+    tasks_total = (
+        SELECT count(*) FROM tasks_{owner}_tasks m
+        WHERE m.{owner}_id = tasks_{owner}.id
+    ),
+    tasks_done = (
+        SELECT count(*) FROM tasks_{owner}_tasks m
+        JOIN tasks_task t ON t.id = m.task_id
+        WHERE m.{owner}_id = tasks_{owner}.id AND t.status = 'DONE'
+    );
+"""
+
+REBUILD_PROGRESS_COUNTERS = (
+    COUNT_TASKS.format(owner="sprint")
+    + COUNT_TASKS.format(owner="epic")
+    + """
+UPDATE tasks_epic SET completion_status = coalesce(
+    round(tasks_done * 100.0 / nullif(tasks_total, 0), 2), 0
+);
+"""
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_task_task_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='epic',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Completed Tasks'),
+        ),
+        migrations.AddField(
+            model_name='epic',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total Tasks'),
+        ),
+        migrations.AddField(
+            model_name='sprint',
+            name='tasks_done',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Completed Tasks'),
+        ),
+        migrations.AddField(
+            model_name='sprint',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Total Tasks'),
+        ),
+        migrations.AlterField(
+            model_name='epic',
+            name='completion_status',
+            field=models.DecimalField(decimal_places=2, default=0.0, editable=False, max_digits=5, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(100.0)], verbose_name='Completion Status (percentage)'),
+        ),
+        migrations.RunSQL(REBUILD_PROGRESS_COUNTERS, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.2 on 2026-10-18 11:20
+
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0009_epic_tasks_done_epic_tasks_total_sprint_tasks_done_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(OpClass(django.db.models.functions.text.Upper('title'), name='text_pattern_ops'), name='task_title_upper_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.2 on 2026-10-18 16:55
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0010_task_task_title_upper_prefix_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='task_status_created_at_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(fields=['owner', 'status'], name='task_owner_status_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('owner__isnull', True), ('status', 'UNASSIGNED')), fields=['created_at', 'id'], name='task_unclaimed_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 'ARCHIVED'), _negated=True), fields=['created_at', 'id'], name='task_active_created_at_idx'),
+        ),
+    ]
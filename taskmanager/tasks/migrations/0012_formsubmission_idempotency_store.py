@@ -0,0 +1,43 @@
+# Generated by Django 4.2.2 on 2026-10-18 17:03
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_task_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='formsubmission',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='namespace',
+            field=models.CharField(default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='formsubmission',
+            name='response',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='formsubmission',
+            name='uuid',
+            field=models.UUIDField(),
+        ),
+        migrations.AddIndex(
+            model_name='formsubmission',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='formsubmission_created_brin'),
+        ),
+        migrations.AddConstraint(
+            model_name='formsubmission',
+            constraint=models.UniqueConstraint(fields=('namespace', 'uuid'), name='formsubmission_namespace_uuid'),
+        ),
+    ]
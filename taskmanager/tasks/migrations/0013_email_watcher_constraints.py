@@ -0,0 +1,33 @@
+# Generated by Django 4.2.2 on 2026-10-18 17:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_formsubmission_idempotency_store'),
+    ]
+
+    operations = [
+        # Drop duplicated watchers left by the former delete-and-recreate
+        # saves, keeping the oldest row of each (task, email) pair
+        migrations.RunSQL(
+            """
+            DELETE FROM tasks_email duplicate
+            USING tasks_email original
+            WHERE duplicate.task_id = original.task_id
+              AND duplicate.email = original.email
+              AND duplicate.id > original.id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='email',
+            index=models.Index(fields=['email', 'task'], name='email_email_task_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='email',
+            constraint=models.UniqueConstraint(fields=('task', 'email'), name='email_task_email_unique'),
+        ),
+    ]
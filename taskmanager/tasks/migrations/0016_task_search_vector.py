@@ -0,0 +1,50 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:40
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Must use the text search configuration of tasks.search.SEARCH_CONFIG
+SEARCH_VECTOR = """
+    setweight(to_tsvector('pg_catalog.english', coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('pg_catalog.english', coalesce({row}description, '')), 'B')
+"""
+
+CREATE_TRIGGER = f"""
+CREATE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+-- Also fires when search_vector itself is written, as by Model.save() and
+-- COPY, so that the column never holds a stale or NULL value
+CREATE TRIGGER tasks_task_search_vector_trigger
+BEFORE INSERT OR UPDATE OF title, description, search_vector ON tasks_task
+FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update();
+
+UPDATE tasks_task SET search_vector = {SEARCH_VECTOR.format(row="")};
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER tasks_task_search_vector_trigger ON tasks_task;
+DROP FUNCTION tasks_task_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_importcheckpoint'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.2 on 2026-10-18 21:45
+
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('tasks', '0016_task_search_vector'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='task',
+            index=GinIndex(fields=['search_vector'], name='task_search_vector_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='task',
+            index=GinIndex(OpClass('title', name='gin_trgm_ops'), name='task_title_trgm_idx'),
+        ),
+        # Fuzzy owner matching (username__trigram_similar); auth_user belongs
+        # to django.contrib.auth, so the index is created with plain SQL
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS auth_user_username_trgm_idx '
+            'ON auth_user USING gin (username gin_trgm_ops);',
+            'DROP INDEX CONCURRENTLY IF EXISTS auth_user_username_trgm_idx;',
+        ),
+    ]
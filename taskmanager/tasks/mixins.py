@@ -1,5 +1,8 @@
+from django.core.exceptions import BadRequest
 from django.http import HttpResponseBadRequest
 
+from tasks.exceptions import InvalidCursorException
+from tasks.pagination import KeysetPaginator
 from tasks.services import can_add_task_to_sprint
 from django.db import models
 
@@ -25,4 +28,20 @@ class SprintTaskMixin:
                     )
 
         return super().dispatch(request, *args, **kwargs)
-    
\ No newline at end of file
+    
+
+
+class KeysetPaginationMixin:
+    """
+    Mixin paginating a ListView newest first with a KeysetPaginator, driven
+    by the ``cursor`` query parameter: the cost of a page does not grow with
+    its depth.
+    """
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.paginate(self.request.GET.get("cursor"))
+        except InvalidCursorException:
+            raise BadRequest("Invalid cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -1,13 +1,81 @@
-from django.db import models
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from . import caching
+
 class VersionMixing:
     version = models.IntegerField(default=0)
 
-class Epic(models.Model):
+
+class ProgressQuerySet(models.QuerySet):
+    """
+    QuerySet for models with a ``tasks`` relation (sprints and epics).
+    """
+
+    def with_progress(self):
+        """
+        Annotates live task counts computed in the same aggregated query.
+
+        Adds ``progress_total``, ``progress_done`` and ``progress_percentage``
+        to every row, which the completion properties use instead of the
+        stored counters when present.
+
+        Returns:
+            ProgressQuerySet: The annotated queryset.
+        """
+        return self.annotate(
+            progress_total=models.Count("tasks"),
+            progress_done=models.Count("tasks", filter=models.Q(tasks__status="DONE")),
+        ).annotate(
+            progress_percentage=models.Case(
+                models.When(progress_total=0, then=models.Value(0.0)),
+                default=models.F("progress_done") * 100.0 / models.F("progress_total"),
+                output_field=models.FloatField(),
+            )
+        )
+
+
+# Denormalized counters kept up to date by tasks.progress
+PROGRESS_FIELDS = ("tasks_total", "tasks_done", "completion_status")
+
+
+class ProgressCountersMixin(models.Model):
+    """
+    Adds denormalized task counters to a model with a ``tasks`` relation.
+
+    The counters are maintained with atomic ``F()`` updates whenever tasks are
+    added, removed or change status (see ``tasks.progress``), so reading them
+    never costs a query.
+    """
+
+    tasks_total = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Total Tasks"))
+    tasks_done = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Completed Tasks"))
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """
+        Custom save method that never writes the counters back.
+
+        The in-memory counters may be stale, so updates of existing rows only
+        write the other fields and leave the counters to ``tasks.progress``.
+        """
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in PROGRESS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+class Epic(ProgressCountersMixin):
     """
     Represents a project epic.
 
@@ -18,10 +86,12 @@ class Epic(models.Model):
     description = models.TextField(verbose_name=_("Description"), blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated At"))
-    completion_status = models.DecimalField(max_digits=5, decimal_places=2, default=0.0, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)], verbose_name=_("Completion Status (percentage)"))
+    completion_status = models.DecimalField(max_digits=5, decimal_places=2, default=0.0, editable=False, validators=[MinValueValidator(0.0), MaxValueValidator(100.0)], verbose_name=_("Completion Status (percentage)"))
     creator = models.ForeignKey(User, related_name='created_epics', on_delete=models.CASCADE, verbose_name=_("Creator"))
     tasks = models.ManyToManyField("Task", related_name="epics", blank=True)
 
+    objects = ProgressQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Epic")
         verbose_name_plural = _("Epics")
@@ -39,22 +109,26 @@ class Epic(models.Model):
     @property
     def tasks_count(self) -> int:
         """
-        Calculates and returns the total number of tasks associated with this epic.
+        Returns the total number of tasks associated with this epic.
+
+        Uses the ``with_progress()`` annotation when present.
 
         Returns:
             int: Total number of tasks.
         """
-        return self.tasks.count()
+        return getattr(self, "progress_total", self.tasks_total)
 
     @property
     def completed_tasks_count(self) -> int:
         """
-        Calculates and returns the number of completed tasks associated with this epic.
+        Returns the number of completed tasks associated with this epic.
+
+        Uses the ``with_progress()`` annotation when present.
 
         Returns:
             int: Number of completed tasks.
         """
-        return self.tasks.filter(status='DONE').count()
+        return getattr(self, "progress_done", self.tasks_done)
 
     @property
     def completion_percentage(self) -> float:
@@ -64,6 +138,8 @@ class Epic(models.Model):
         Returns:
             float: Completion percentage.
         """
+        if hasattr(self, "progress_percentage"):
+            return self.progress_percentage
         if self.tasks_count == 0:
             return 0.0
         return (self.completed_tasks_count / self.tasks_count) * 100
@@ -107,11 +183,43 @@ class Task(VersionMixing, models.Model):
     version = models.IntegerField(default=0)
     file_upload = models.FileField(upload_to="tasks/files/", null=True, blank=True)
     image_upload = models.ImageField(upload_to="tasks/images/", null=True, blank=True)
+    # Weighted title and description lexemes, maintained by a database
+    # trigger (see migration 0016) so that bulk writes and COPY keep it current
+    search_vector = SearchVectorField(null=True, editable=False)
 
 
     class Meta:
         verbose_name = _("Task")
         verbose_name_plural = _("Tasks")
+        indexes = [
+            # Keyset pagination over the newest-first task list
+            models.Index(fields=["created_at", "id"], name="task_created_at_id_idx"),
+            # Board columns and status counts, newest first within a status
+            models.Index(fields=["status", "created_at", "id"], name="task_status_created_at_idx"),
+            # A user's tasks, optionally narrowed to a status
+            models.Index(fields=["owner", "status"], name="task_owner_status_idx"),
+            # Claim queue: only the unclaimed tasks, oldest first
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(owner__isnull=True, status="UNASSIGNED"),
+                name="task_unclaimed_idx",
+            ),
+            # Listings skipping archived tasks, which accumulate over time
+            models.Index(
+                fields=["created_at", "id"],
+                condition=~models.Q(status="ARCHIVED"),
+                name="task_active_created_at_idx",
+            ),
+            # Case-insensitive title prefix search (title__istartswith)
+            models.Index(
+                OpClass(Upper("title"), name="text_pattern_ops"),
+                name="task_title_upper_prefix_idx",
+            ),
+            # Full-text search over the title and description (tasks.search)
+            GinIndex(fields=["search_vector"], name="task_search_vector_idx"),
+            # Fuzzy title matching (title__trigram_similar)
+            GinIndex(OpClass("title", name="gin_trgm_ops"), name="task_title_trgm_idx"),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=models.Q(status="UNASSIGNED")
@@ -124,9 +232,56 @@ class Task(VersionMixing, models.Model):
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        """
+        Custom save method running in a transaction, so that the sprint and
+        epic counters updated by tasks.signals commit together with the task.
+
+        Updates increment ``version`` in the database, so that concurrent
+        writers never end up with the same version, and publish it to the
+        fragment cache (see tasks.caching).
+
+        Updates writing the status first lock the row and read the stored
+        status, so that concurrent saves of the same transition are counted
+        once by tasks.signals.
+        """
+        updating = not self._state.adding
+        if not updating:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+            return
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "version", "updated_at"}
+        version, self.version = self.version, models.F("version") + 1
+        try:
+            with transaction.atomic():
+                if update_fields is None or "status" in update_fields:
+                    self._loaded_status = (
+                        Task.objects.select_for_update()
+                        .filter(pk=self.pk)
+                        .values_list("status", flat=True)
+                        .first()
+                    )
+                super().save(*args, **kwargs)
+                self.refresh_from_db(fields=["version"])
+                caching.publish({self.pk: self.version})
+        except BaseException:
+            self.version = version
+            raise
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so that status transitions can be
+        # detected on save (see tasks.signals)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
     
 
-class Sprint(models.Model):
+class Sprint(ProgressCountersMixin):
     """
     Represents a sprint in the project management system.
     """
@@ -158,6 +313,9 @@ class Sprint(models.Model):
         related_name="sprints", 
         blank=True
     )
+
+    objects = ProgressQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Sprint")
         verbose_name_plural = _("Sprints")
@@ -184,22 +342,26 @@ class Sprint(models.Model):
     @property
     def total_tasks(self):
         """
-        Calculates the total number of tasks associated with the sprint.
+        Returns the total number of tasks associated with the sprint.
+
+        Uses the ``with_progress()`` annotation when present.
 
         Returns:
             int: Total number of tasks associated with the sprint.
         """
-        return self.tasks.count()
+        return getattr(self, "progress_total", self.tasks_total)
 
     @property
     def completed_tasks(self):
         """
-        Calculates the number of completed tasks associated with the sprint.
+        Returns the number of completed tasks associated with the sprint.
+
+        Uses the ``with_progress()`` annotation when present.
 
         Returns:
             int: Number of completed tasks associated with the sprint.
         """
-        return self.tasks.filter(status='DONE').count()
+        return getattr(self, "progress_done", self.tasks_done)
 
     @property
     def completion_percentage(self):
@@ -209,15 +371,102 @@ class Sprint(models.Model):
         Returns:
             float: Completion percentage of the sprint.
         """
+        if hasattr(self, "progress_percentage"):
+            return self.progress_percentage
         if self.total_tasks == 0:
             return 0.0
         return (self.completed_tasks / self.total_tasks) * 100
 
 
 class Email(models.Model):
+    """
+    A watcher of a task. Written through services.sync_watchers.
+    """
     email = models.EmailField()
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="watchers")
 
+    class Meta:
+        indexes = [
+            # Reverse lookup of the tasks an address watches
+            models.Index(fields=["email", "task"], name="email_email_task_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["task", "email"], name="email_task_email_unique"),
+        ]
+
 
 class FormSubmission(models.Model):
-    uuid = models.UUIDField(unique=True)
\ No newline at end of file
+    """
+    A submission recorded by the database idempotency store (see tasks.idempotency).
+    """
+    namespace = models.CharField(max_length=32, default="")
+    uuid = models.UUIDField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # The response to replay for duplicates, empty while the submission is processed
+    response = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Rows are inserted in created_at order, so a BRIN index stays tiny
+            # while letting the pruning job find expired rows by age
+            BrinIndex(fields=["created_at"], name="formsubmission_created_brin"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["namespace", "uuid"], name="formsubmission_namespace_uuid"),
+        ]
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting in the outbox for the send_outbox worker (see tasks.outbox).
+    """
+    kind = models.CharField(max_length=32)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    # Not delivered before this time; pushed back after each failed attempt
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # Set once the message ran out of attempts; delivered messages are deleted
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: pending messages by delivery time
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(failed_at__isnull=True),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.subject
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Progress of an import run by the import_data command (see tasks.importer).
+
+    Updated in the transaction of each imported batch, so that a resumed
+    import skips exactly the records already committed.
+    """
+    name = models.CharField(max_length=255)
+    kind = models.CharField(max_length=16)
+    # Number of input records consumed, imported or skipped
+    position = models.PositiveBigIntegerField(default=0)
+    imported = models.PositiveBigIntegerField(default=0)
+    skipped = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "kind"], name="importcheckpoint_name_kind"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.kind})"
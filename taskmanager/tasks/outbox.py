@@ -0,0 +1,189 @@
+"""
+Transactional email outbox.
+
+Emails are not sent during requests: they are written to ``OutboxMessage``
+in the same transaction as the change they report, so a message exists if
+and only if the change was committed. The ``send_outbox`` worker delivers
+them later over a single mail connection and retries failures with an
+exponential backoff.
+
+Delivery is at-least-once: a worker dying after sending a message but
+before committing its batch sends that message again on the next run.
+"""
+import smtplib
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Email, OutboxMessage, Task
+
+MAX_ATTEMPTS = settings.OUTBOX_MAX_ATTEMPTS
+RETRY_DELAY = settings.OUTBOX_RETRY_DELAY
+
+# Errors after which the connection is reopened before the next message
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+def enqueue(
+    kind: str,
+    subject: str,
+    body: str,
+    recipients: list[str],
+    reply_to: Iterable[str] = (),
+) -> OutboxMessage:
+    """
+    Adds an email to the outbox.
+    """
+    return OutboxMessage.objects.create(
+        kind=kind,
+        subject=subject,
+        body=body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipients=recipients,
+        reply_to=list(reply_to),
+    )
+
+
+def notify_status_change(task_ids: Iterable[int], status: str) -> int:
+    """
+    Queues one email per watcher of tasks that just moved to ``status``.
+
+    Reads the watchers and the task titles with one query and writes the
+    messages with one bulk INSERT. Call it in the transaction changing the
+    status.
+
+    Returns:
+        int: The number of queued messages.
+    """
+    label = dict(Task.STATUS_CHOICES).get(status, status)
+    watchers = Email.objects.filter(task_id__in=list(task_ids)).values_list(
+        "task_id", "task__title", "email"
+    )
+    messages = [
+        OutboxMessage(
+            kind="task_status",
+            subject=f'[Task #{task_id}] "{title}" is now {label}',
+            body=f'The task "{title}" you are watching moved to the status "{label}".',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipients=[email],
+        )
+        for task_id, title, email in watchers
+    ]
+    OutboxMessage.objects.bulk_create(messages)
+    return len(messages)
+
+
+def to_email_message(message: OutboxMessage, connection) -> EmailMessage:
+    return EmailMessage(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or None,
+        to=message.recipients,
+        reply_to=message.reply_to or None,
+        connection=connection,
+    )
+
+
+def reconnect(connection) -> bool:
+    """
+    Reopens a mail connection after a connection error.
+
+    Returns:
+        bool: Whether the connection could be reopened.
+    """
+    try:
+        connection.close()
+        connection.open()
+    except OSError:
+        # smtplib errors, refused connections and timeouts
+        return False
+    return True
+
+
+def deliver(connection, batch_size: int = 100) -> tuple[int, int, bool]:
+    """
+    Sends one batch of due messages over an open mail connection.
+
+    The batch is locked with ``FOR UPDATE SKIP LOCKED``, so several workers
+    can drain the outbox concurrently without sending a message twice.
+    Messages go out one ``send_messages()`` call each, over the same
+    connection, so that a failure is attributed to its own message. Sent
+    messages are then deleted with one statement and failed ones
+    rescheduled with one bulk UPDATE.
+
+    After a connection error the connection is reopened. If the mail server
+    is still unreachable, the batch stops there: the outcome of the messages
+    already tried is committed, and the others are left untouched for the
+    next run.
+
+    Returns:
+        tuple[int, int, bool]: The numbers of sent and failed messages, and
+        whether the batch stopped on an unreachable mail server.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.filter(failed_at__isnull=True, available_at__lte=now)
+            .order_by("available_at", "id")
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        sent, failed = [], []
+        unreachable = False
+        for message in batch:
+            try:
+                if connection.send_messages([to_email_message(message, connection)]) != 1:
+                    raise ValueError("The message has no recipients.")
+            except Exception as exc:
+                message.attempts += 1
+                message.last_error = f"{type(exc).__name__}: {exc}"
+                if message.attempts >= MAX_ATTEMPTS:
+                    message.failed_at = now
+                else:
+                    delay = RETRY_DELAY * 2 ** (message.attempts - 1)
+                    message.available_at = now + timedelta(seconds=delay)
+                failed.append(message)
+                if isinstance(exc, CONNECTION_ERRORS) and not reconnect(connection):
+                    unreachable = True
+                    break
+            else:
+                sent.append(message.pk)
+
+        OutboxMessage.objects.filter(pk__in=sent).delete()
+        OutboxMessage.objects.bulk_update(
+            failed, ["attempts", "last_error", "available_at", "failed_at"]
+        )
+    return len(sent), len(failed), unreachable
+
+
+def drain(batch_size: int = 100, connection=None) -> tuple[int, int]:
+    """
+    Delivers every due message, batch after batch, over one connection,
+    until none is left or the mail server becomes unreachable.
+
+    Raises:
+        OSError: If the connection to the mail server cannot be opened; no
+            message is tried then.
+
+    Returns:
+        tuple[int, int]: The numbers of sent and failed messages.
+    """
+    due = OutboxMessage.objects.filter(failed_at__isnull=True, available_at__lte=timezone.now())
+    if not due.exists():
+        # Do not connect to the mail server just to find nothing to send
+        return 0, 0
+    connection = connection or get_connection()
+    connection.open()
+    sent = failed = 0
+    try:
+        while True:
+            batch_sent, batch_failed, unreachable = deliver(connection, batch_size)
+            sent += batch_sent
+            failed += batch_failed
+            if unreachable or batch_sent + batch_failed < batch_size:
+                return sent, failed
+    finally:
+        connection.close()
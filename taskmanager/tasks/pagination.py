@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from tasks.exceptions import InvalidCursorException
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+def encode_cursor(created_at: datetime, pk: int, direction: str) -> str:
+    """
+    Encodes a position in a (created_at, id) ordering as an opaque token.
+
+    Args:
+        created_at (datetime): Creation date of the row the cursor points at.
+        pk (int): Primary key of the row the cursor points at.
+        direction (str): NEXT or PREVIOUS.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    payload = json.dumps([created_at.isoformat(), pk, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, str]:
+    """
+    Decodes a cursor produced by ``encode_cursor``.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(created_at)
+    except (binascii.Error, TypeError, ValueError) as exc:
+        raise InvalidCursorException("Invalid cursor.") from exc
+    if not isinstance(pk, int) or direction not in (NEXT, PREVIOUS):
+        raise InvalidCursorException("Invalid cursor.")
+    return created_at, pk, direction
+
+
+class KeysetPage:
+    """
+    A page of results returned by ``KeysetPaginator``.
+
+    Exposes the same ``has_next``/``has_previous``/``has_other_pages`` API as
+    Django's ``Page`` so templates can treat both alike.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Cursor-based paginator over a newest-first (created_at, id) ordering.
+
+    Unlike OFFSET pagination, every page is fetched with a range condition
+    that an index on (created_at, id) can seek to, so the cost of a page does
+    not depend on how deep it is.
+    """
+
+    def __init__(self, queryset: QuerySet, per_page: int):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def window(self, cursor: str | None = None) -> tuple[QuerySet, str]:
+        """
+        Returns the rows fetched for the page following (or preceding)
+        ``cursor``, plus one extra row telling whether more pages follow,
+        and the direction of the walk.
+
+        Raises:
+            InvalidCursorException: If the cursor is malformed.
+        """
+        queryset = self.queryset
+        direction = NEXT
+        if cursor:
+            created_at, pk, direction = decode_cursor(cursor)
+            # The leading range condition is the one the index seeks on;
+            # the exclude only drops the rows that share the same timestamp.
+            if direction == NEXT:
+                queryset = queryset.filter(created_at__lte=created_at).exclude(
+                    created_at=created_at, id__gte=pk
+                )
+            else:
+                queryset = queryset.filter(created_at__gte=created_at).exclude(
+                    created_at=created_at, id__lte=pk
+                )
+
+        if direction == NEXT:
+            return queryset.order_by("-created_at", "-id")[: self.per_page + 1], direction
+        return queryset.order_by("created_at", "id")[: self.per_page + 1], direction
+
+    def paginate(self, cursor: str | None = None) -> KeysetPage:
+        """
+        Returns the page that follows (or precedes) ``cursor``.
+
+        Args:
+            cursor (str | None): A cursor taken from a previous page, or None
+                for the first page.
+
+        Returns:
+            KeysetPage: The requested page.
+
+        Raises:
+            InvalidCursorException: If the cursor is malformed.
+        """
+        window, direction = self.window(cursor)
+        return self._page(list(window), direction, cursor)
+
+    async def apaginate(self, cursor: str | None = None) -> KeysetPage:
+        """
+        Async version of ``paginate``, fetching the rows with ``async for``.
+        """
+        window, direction = self.window(cursor)
+        return self._page([row async for row in window], direction, cursor)
+
+    def _page(self, rows: list, direction: str, cursor: str | None) -> KeysetPage:
+        if direction == NEXT:
+            has_next = len(rows) > self.per_page
+            has_previous = bool(cursor)
+            rows = rows[: self.per_page]
+        else:
+            # Walked backwards from the cursor, restore newest-first order
+            has_previous = len(rows) > self.per_page
+            has_next = True
+            rows = rows[: self.per_page][::-1]
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].pk, NEXT)
+        if rows and has_previous:
+            previous_cursor = encode_cursor(rows[0].created_at, rows[0].pk, PREVIOUS)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that reads the row count of large results from planner
+    statistics instead of running an exact ``COUNT(*)``.
+
+    Unfiltered querysets use the table statistics in ``pg_class`` and
+    filtered ones the row estimate of their query plan. Results estimated
+    below ``ESTIMATED_COUNT_THRESHOLD`` rows, and databases other than
+    PostgreSQL, are still counted exactly.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self.estimate_count()
+        if estimate is None or estimate < settings.ESTIMATED_COUNT_THRESHOLD:
+            return self.object_list.count()
+        return estimate
+
+    def estimate_count(self) -> int | None:
+        """
+        Returns the planner's estimate of the number of rows, or None when no
+        estimate is available.
+        """
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        with connection.cursor() as cursor:
+            if not queryset.query.where:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                # reltuples is -1 until the table has been analyzed
+                return row[0] if row and row[0] >= 0 else None
+
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,149 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import (
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Epic, Sprint
+
+# Models carrying denormalized task counters
+PROGRESS_MODELS = (Sprint, Epic)
+
+
+def _completion_status(done, total):
+    """
+    Builds the SQL expression of a completion percentage, rounded to the
+    precision of ``Epic.completion_status`` and 0 when there are no tasks.
+    """
+    percentage = ExpressionWrapper(
+        done * Value(100.0) / NullIf(total, 0), output_field=DecimalField()
+    )
+    return Coalesce(
+        Cast(percentage, DecimalField(max_digits=5, decimal_places=2)),
+        Value(0),
+        output_field=DecimalField(max_digits=5, decimal_places=2),
+    )
+
+
+def adjust_progress(model, deltas: dict[int, tuple[int, int]]) -> None:
+    """
+    Applies counter increments to sprints or epics.
+
+    Increments are applied with ``F()`` expressions, so concurrent
+    transactions serialize on the row lock instead of overwriting each other.
+    Rows sharing the same increments are updated by a single statement.
+
+    Args:
+        model: Sprint or Epic.
+        deltas (dict[int, tuple[int, int]]): ``{pk: (total_delta, done_delta)}``.
+    """
+    groups = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta != (0, 0):
+            groups[delta].append(pk)
+
+    for (total_delta, done_delta), pks in groups.items():
+        updates = {
+            "tasks_total": F("tasks_total") + total_delta,
+            "tasks_done": F("tasks_done") + done_delta,
+        }
+        if model is Epic:
+            updates["completion_status"] = _completion_status(
+                F("tasks_done") + done_delta, F("tasks_total") + total_delta
+            )
+        model.objects.filter(pk__in=pks).update(**updates)
+
+
+def refresh_progress(model, pks: Iterable[int] | None = None) -> int:
+    """
+    Recomputes the counters of sprints or epics from the ``tasks`` relation.
+
+    Args:
+        model: Sprint or Epic.
+        pks (Iterable[int] | None): Primary keys to refresh, or None for all.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    through = model.tasks.through
+    owner_field = f"{model._meta.model_name}_id"
+    memberships = through.objects.filter(**{owner_field: OuterRef("pk")})
+
+    def count(queryset):
+        counted = queryset.values(owner_field).annotate(count=Count("*")).values("count")
+        return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+    total = count(memberships)
+    done = count(memberships.filter(task__status="DONE"))
+    updates = {"tasks_total": total, "tasks_done": done}
+    if model is Epic:
+        updates["completion_status"] = _completion_status(done, total)
+
+    queryset = model.objects.all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(**updates)
+
+
+def refresh_progress_for_tasks(task_ids: Iterable[int]) -> None:
+    """
+    Recomputes the counters of every sprint and epic containing the tasks.
+
+    Used after bulk writes such as ``QuerySet.update()`` that bypass the
+    signals maintaining the counters incrementally.
+    """
+    task_ids = list(task_ids)
+    with transaction.atomic():
+        for model in PROGRESS_MODELS:
+            owner_ids = model.tasks.through.objects.filter(
+                task_id__in=task_ids
+            ).values_list(f"{model._meta.model_name}_id", flat=True)
+            refresh_progress(model, owner_ids)
+
+
+
+def attach_status_counts(owners: Iterable, known: dict | None = None) -> None:
+    """
+    Sets ``status_counts``, the number of tasks per status, on sprints and
+    epics, with one grouped query per model.
+
+    Args:
+        owners (Iterable): Sprints and/or epics; those already carrying
+            ``status_counts`` are skipped.
+        known (dict | None): Counts already loaded, by ``(model, pk)``, e.g.
+            during the current request. Reused, and completed with the
+            counts loaded here.
+    """
+    known = {} if known is None else known
+    missing = defaultdict(list)
+    for owner in owners:
+        if hasattr(owner, "status_counts"):
+            continue
+        if (type(owner), owner.pk) in known:
+            owner.status_counts = known[type(owner), owner.pk]
+        else:
+            missing[type(owner)].append(owner)
+
+    for model, objs in missing.items():
+        owner_field = f"{model._meta.model_name}_id"
+        counts = {obj.pk: {} for obj in objs}
+        rows = (
+            model.tasks.through.objects.filter(**{f"{owner_field}__in": list(counts)})
+            .values_list(owner_field, "task__status")
+            .annotate(count=Count("*"))
+            .order_by()
+        )
+        for owner_id, status, count in rows:
+            counts[owner_id][status] = count
+        for obj in objs:
+            obj.status_counts = known[model, obj.pk] = counts[obj.pk]
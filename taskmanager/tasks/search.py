@@ -0,0 +1,127 @@
+"""
+Ranked task search over PostgreSQL full-text and trigram indexes.
+
+A term matches a task when any of these index-backed conditions holds:
+
+* the ``search_vector`` column (title lexemes weighted above description
+  lexemes, maintained by a trigger) matches the term as a web search query,
+  through the ``task_search_vector_idx`` GIN index;
+* the title is similar to the term, or starts with it, through the
+  ``task_title_trgm_idx`` and ``task_title_upper_prefix_idx`` indexes;
+* the owner's username is similar to the term. The owners are resolved
+  first through the ``auth_user_username_trgm_idx`` index, so the task query
+  filters on ``owner_id`` instead of joining every task to its owner.
+
+Ranking reads the stored vectors of the matches, so it is bounded to
+``TASK_SEARCH_MAX_CANDIDATES`` matches: terms matching more tasks than that
+are ranked among the first matches found.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Case, F, FloatField, Q, QuerySet, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Task
+
+# Text search configuration, also used by the search_vector trigger
+# (migration 0016)
+SEARCH_CONFIG = "english"
+
+# Maximum number of owners whose tasks match a term by username similarity
+MAX_OWNERS = 20
+
+MAX_CANDIDATES = settings.TASK_SEARCH_MAX_CANDIDATES
+
+
+def search_query(term: str) -> SearchQuery:
+    """
+    Parses a term with the web search syntax: quoted phrases, ``or`` and
+    ``-excluded`` words.
+    """
+    return SearchQuery(term, search_type="websearch", config=SEARCH_CONFIG)
+
+
+def similar_owners(term: str) -> dict[int, float]:
+    """
+    Returns the ids of the users whose username is similar to the term, the
+    most similar first, with their similarity.
+    """
+    users = (
+        User.objects.filter(username__trigram_similar=term)
+        .annotate(similarity=TrigramSimilarity("username", term))
+        .order_by("-similarity", "id")
+        .values_list("id", "similarity")[:MAX_OWNERS]
+    )
+    return dict(users)
+
+
+def _matches(term: str, owners: dict[int, float]) -> Q:
+    condition = (
+        Q(search_vector=search_query(term))
+        | Q(title__trigram_similar=term)
+        | Q(title__istartswith=term)
+    )
+    if owners:
+        condition |= Q(owner_id__in=owners)
+    return condition
+
+
+def filter_tasks(queryset: QuerySet, term: str) -> QuerySet:
+    """
+    Narrows a queryset of tasks to those matching a search term, unordered.
+
+    Returns:
+        QuerySet: The matching tasks, or the queryset unchanged for a blank
+        term.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    return queryset.filter(_matches(term, similar_owners(term)))
+
+
+def search_tasks(term: str, limit: int, status: str | None = None) -> list[Task]:
+    """
+    Returns the tasks best matching a search term, with their owner.
+
+    Each task gets a ``rank`` between 0 and 1: the greatest of its full-text
+    rank, the similarity of its title and the similarity of its owner's
+    username to the term.
+
+    Args:
+        term (str): The search term.
+        limit (int): Maximum number of tasks returned.
+        status (str | None): Only return the tasks in this status.
+
+    Returns:
+        list[Task]: The matching tasks, best ranked first.
+    """
+    term = term.strip()
+    if not term:
+        return []
+    owners = similar_owners(term)
+    matches = Task.objects.filter(_matches(term, owners))
+    if status is not None:
+        matches = matches.filter(status=status)
+    candidates = matches.values("id")[:MAX_CANDIDATES]
+
+    owner_similarity = Case(
+        *(When(owner_id=owner_id, then=Value(similarity)) for owner_id, similarity in owners.items()),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    tasks = (
+        Task.objects.filter(id__in=candidates)
+        .select_related("owner")
+        .annotate(
+            rank=Greatest(
+                SearchRank(F("search_vector"), search_query(term)),
+                TrigramSimilarity("title", term),
+                owner_similarity,
+                output_field=FloatField(),
+            )
+        )
+        .order_by("-rank", "-id")
+    )
+    return list(tasks[:limit])
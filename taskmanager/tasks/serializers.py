@@ -0,0 +1,21 @@
+from .models import Task
+
+
+def task_to_dict(task: Task) -> dict:
+    """
+    Converts a task into a JSON-serializable dict.
+
+    The owner is read through ``task.owner``, so callers should join it in
+    with ``select_related("owner")`` when serializing many tasks.
+    """
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "status": task.status,
+        "owner": task.owner.username if task.owner_id else None,
+        "creator_id": task.creator_id,
+        "created_at": task.created_at.isoformat(),
+        "updated_at": task.updated_at.isoformat(),
+        "version": task.version,
+    }
@@ -1,16 +1,32 @@
 import datetime
-from datetime import date
+from datetime import date, timedelta
+from typing import Iterable
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.exceptions import ValidationError
-from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Count, F, Q, QuerySet, Value
 from django.db.models.functions import TruncDate
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from .models import Epic, Sprint, Task
-from tasks.exceptions import TaskAlreadyClaimedException
+from . import caching, outbox
+from .claims import OPTIMISTIC, ClaimEngine
+from .models import Email, Epic, Sprint, Task
+from .pagination import KeysetPage, KeysetPaginator
+from .progress import refresh_progress_for_tasks
+from tasks.exceptions import TaskAlreadyClaimedException, TaskClaimConflictException
+
+# Statuses rendered as columns on the home board, in display order.
+BOARD_STATUSES = ("UNASSIGNED", "IN_PROGRESS", "DONE")
+BOARD_COLUMN_SIZE = settings.TASK_BOARD_COLUMN_SIZE
+
+# Process-wide claim engines, so that their counters and the adaptive
+# conflict rate accumulate across requests
+claim_engine = ClaimEngine(settings.TASK_CLAIM_STRATEGY)
+optimistic_claim_engine = ClaimEngine(OPTIMISTIC)
 
 
 def can_add_task_to_sprint(task, sprint_id):
@@ -21,10 +37,145 @@ def can_add_task_to_sprint(task, sprint_id):
     return sprint.start_date <= task.created_at.date() <= sprint.end_date
 
 
+def local_date_range(first_day: date, last_day: date) -> tuple[datetime.datetime, datetime.datetime]:
+    """
+    Returns the half-open timestamp range [start, end) covering the given
+    days in the active time zone.
+
+    Filtering ``created_at`` on such a range, rather than on a truncated
+    date, lets the database use an index on ``created_at``.
+    """
+    current_timezone = timezone.get_current_timezone()
+    start = datetime.datetime.combine(first_day, datetime.time.min)
+    end = datetime.datetime.combine(last_day + timedelta(days=1), datetime.time.min)
+    return (
+        timezone.make_aware(start, current_timezone),
+        timezone.make_aware(end, current_timezone),
+    )
+
+
 def get_task_by_date(by_date: date) -> list[Task]:
-    return Task.objects.annotate(date_created=TruncDate("created_at")).filter(
-        date_created=by_date
+    start, end = local_date_range(by_date, by_date)
+    return Task.objects.filter(created_at__gte=start, created_at__lt=end)
+
+
+def get_task_calendar(first_day: date, last_day: date) -> dict[date, int]:
+    """
+    Counts the tasks created on each day of a date range with one grouped query.
+
+    Args:
+        first_day (date): First day of the range.
+        last_day (date): Last day of the range, inclusive.
+
+    Returns:
+        dict[date, int]: The number of tasks created per day, including days
+        without tasks.
+    """
+    start, end = local_date_range(first_day, last_day)
+    rows = (
+        Task.objects.filter(created_at__gte=start, created_at__lt=end)
+        .annotate(day=TruncDate("created_at"))
+        .values_list("day")
+        .annotate(count=Count("id"))
+        .order_by()
     )
+    counts = dict(rows)
+    days = (first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1))
+    return {day: counts.get(day, 0) for day in days}
+
+
+def get_task_board(column_size: int = BOARD_COLUMN_SIZE) -> list[dict]:
+    """
+    Builds the status board shown on the home page.
+
+    Each column holds at most ``column_size`` of the newest tasks for its
+    status, with owners joined in, so the cost of the page does not depend
+    on the size of the table: one capped query per column plus a single
+    grouped COUNT for the column totals.
+
+    Args:
+        column_size (int): Maximum number of tasks loaded per column.
+
+    Returns:
+        list[dict]: One dict per column with the keys ``status``, ``label``,
+        ``tasks``, ``count`` and ``next_cursor``.
+    """
+    counts = dict(_board_counts())
+    pages = {
+        status: get_task_board_column(status, column_size=column_size)
+        for status in BOARD_STATUSES
+        if counts.get(status)
+    }
+    return _board_columns(counts, pages)
+
+
+async def aget_task_board(column_size: int = BOARD_COLUMN_SIZE) -> list[dict]:
+    """
+    Async version of ``get_task_board``, with the same queries.
+    """
+    counts = {status: count async for status, count in _board_counts()}
+    pages = {}
+    for status in BOARD_STATUSES:
+        if counts.get(status):
+            pages[status] = await aget_task_board_column(status, column_size=column_size)
+    return _board_columns(counts, pages)
+
+
+def _board_counts() -> QuerySet:
+    return (
+        Task.objects.filter(status__in=BOARD_STATUSES)
+        .values_list("status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+
+
+def _board_columns(counts: dict[str, int], pages: dict[str, KeysetPage]) -> list[dict]:
+    labels = dict(Task.STATUS_CHOICES)
+    columns = []
+    for status in BOARD_STATUSES:
+        page = pages.get(status)
+        columns.append(
+            {
+                "status": status,
+                "label": labels[status],
+                "tasks": page.object_list if page else [],
+                "count": counts.get(status, 0),
+                "next_cursor": page.next_cursor if page else None,
+            }
+        )
+    return columns
+
+
+def get_task_board_column(
+    status: str, cursor: str | None = None, column_size: int = BOARD_COLUMN_SIZE
+) -> KeysetPage:
+    """
+    Returns one capped slice of a board column, newest tasks first.
+
+    Args:
+        status (str): The status of the column.
+        cursor (str | None): Cursor of the slice already shown ("load more").
+        column_size (int): Maximum number of tasks to return.
+
+    Returns:
+        KeysetPage: The tasks of the slice with their owners joined in.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+    """
+    tasks = Task.objects.filter(status=status).select_related("owner")
+    return KeysetPaginator(tasks, column_size).paginate(cursor)
+
+
+async def aget_task_board_column(
+    status: str, cursor: str | None = None, column_size: int = BOARD_COLUMN_SIZE
+) -> KeysetPage:
+    """
+    Async version of ``get_task_board_column``.
+    """
+    tasks = Task.objects.filter(status=status).select_related("owner")
+    return await KeysetPaginator(tasks, column_size).apaginate(cursor)
 
 
 def create_task_and_add_to_sprint(
@@ -63,67 +214,236 @@ def create_task_and_add_to_sprint(
     return task
 
 
-@transaction.atomic
-def claim_task(user_id, task_id):
-    # Lock the task row to prevent other transactions from claiming it simultaneously
-    task = Task.objects.select_for_update().get(id=task_id)
-
-    # Check if the task is already claimed
-    if task.owner_id:
-        raise TaskAlreadyClaimedException("Task is already claimed or completed.")
+def claim_task(user_id: int, task_id: int) -> None:
+    """
+    Claims a task for a user with the engine configured by ``TASK_CLAIM_STRATEGY``.
 
-    # Claim the task
-    task.status = "IN_PROGRESS"
-    task.owner_id = user_id
-    task.save()
+    Raises:
+        Task.DoesNotExist: If the task does not exist.
+        TaskAlreadyClaimedException: If the task is claimed or completed.
+        TaskClaimConflictException: If contention outlasted the retries.
+    """
+    claim_engine.claim(user_id, task_id)
 
 
 def claim_task_optimistically(user_id: int, task_id: int) -> None:
+    """
+    Claims a task with a single compare-and-set UPDATE.
+
+    Raises:
+        ValidationError: If the task does not exist, is already claimed or
+            completed, or contention outlasted the retries.
+    """
     try:
-        # Step 1: Read the task and its version
-        task = Task.objects.get(id=task_id)
-        original_version = task.version
+        optimistic_claim_engine.claim(user_id, task_id)
+    except Task.DoesNotExist:
+        raise ValidationError("Task does not exist.")
+    except TaskAlreadyClaimedException:
+        raise ValidationError("Task is already claimed or completed.")
+    except TaskClaimConflictException:
+        raise ValidationError("Task was updated by another transaction.")
+
+
+def claim_next_tasks(
+    user_id: int,
+    count: int = 1,
+    sprint_id: int | None = None,
+    epic_id: int | None = None,
+    min_age: timedelta | None = None,
+    max_age: timedelta | None = None,
+) -> list[Task]:
+    """
+    Claims up to ``count`` of the oldest unassigned tasks for a user.
+
+    Candidate rows are locked with ``FOR UPDATE SKIP LOCKED``: rows being
+    claimed by a concurrent worker are skipped instead of waited for, so
+    workers never block on each other nor claim the same task. Fewer than
+    ``count`` tasks are returned when the queue runs short.
+
+    Args:
+        user_id (int): The user claiming the tasks.
+        count (int): Maximum number of tasks to claim.
+        sprint_id (int | None): Only claim tasks of this sprint.
+        epic_id (int | None): Only claim tasks of this epic.
+        min_age (timedelta | None): Only claim tasks created at least this long ago.
+        max_age (timedelta | None): Only claim tasks created at most this long ago.
+
+    Returns:
+        list[Task]: The claimed tasks, oldest first.
+    """
+    tasks = Task.objects.filter(status="UNASSIGNED", owner__isnull=True)
+    if sprint_id is not None:
+        tasks = tasks.filter(sprints=sprint_id)
+    if epic_id is not None:
+        tasks = tasks.filter(epics=epic_id)
+    now = timezone.now()
+    if min_age is not None:
+        tasks = tasks.filter(created_at__lte=now - min_age)
+    if max_age is not None:
+        tasks = tasks.filter(created_at__gte=now - max_age)
 
-        # Step 2: Check if the task is already claimed
-        if task.owner_id:
-            raise ValidationError("Task is already claimed or completed.")
+    with transaction.atomic():
+        # Only lock the task rows, not the sprint or epic memberships joined in
+        claimed = list(
+            tasks.order_by("created_at", "id").select_for_update(skip_locked=True, of=("self",))[:count]
+        )
+        if not claimed:
+            return []
+        # UNASSIGNED -> IN_PROGRESS leaves the completed-task counters
+        # unchanged, so a single UPDATE can skip the save() signals
+        Task.objects.filter(id__in=[task.id for task in claimed]).update(
+            status="IN_PROGRESS", owner_id=user_id, version=F("version") + 1, updated_at=now
+        )
+        # The rows are locked, so their new versions are known without a read
+        caching.publish({task.id: task.version + 1 for task in claimed})
+        outbox.notify_status_change([task.id for task in claimed], "IN_PROGRESS")
 
-        # Step 3: Claim the task
+    for task in claimed:
         task.status = "IN_PROGRESS"
         task.owner_id = user_id
+        task.version += 1
+        task.updated_at = now
+        task._loaded_status = task.status
+    return claimed
+
 
-        # Step 4: Save the task and update the version,
-        # but only if the version hasn't changed
-        updated_rows = Task.objects.filter(id=task_id, version=original_version).update(
-            status=task.status,
-            owner_id=task.owner_id,
-            version=F("version") + 1,  # Increment version field
+def with_watcher_emails(tasks: QuerySet) -> QuerySet:
+    """
+    Annotates tasks with ``watcher_emails``, the list of their watchers'
+    addresses, aggregated in the same query as the tasks.
+    """
+    return tasks.annotate(
+        watcher_emails=ArrayAgg(
+            "watchers__email",
+            filter=Q(watchers__isnull=False),
+            ordering="watchers__id",
+            default=Value([]),
         )
+    )
 
-        # If no rows were updated,
-        # that means another transaction changed the task
-        if updated_rows == 0:
-            raise ValidationError("Task was updated by another transaction.")
 
-    except Task.DoesNotExist:
-        raise ValidationError("Task does not exist.")
+def sync_watchers(task: Task, emails: Iterable[str], current: Iterable[str] | None = None) -> bool:
+    """
+    Makes ``emails`` the watchers of a task.
+
+    Only the difference with the current watchers is written: one DELETE
+    for the removed addresses and one bulk INSERT for the added ones.
+
+    Args:
+        task (Task): The watched task.
+        emails (Iterable[str]): The addresses that should watch the task.
+        current (Iterable[str] | None): The current addresses, when already
+            loaded (see ``with_watcher_emails``); queried otherwise.
+
+    Returns:
+        bool: Whether the watchers changed.
+    """
+    wanted = set(emails)
+    if current is None:
+        current = task.watchers.values_list("email", flat=True)
+    current = set(current)
+    removed, added = current - wanted, wanted - current
+    if not removed and not added:
+        return False
+
+    with transaction.atomic():
+        if removed:
+            Email.objects.filter(task=task, email__in=removed).delete()
+        if added:
+            # A concurrent edit may have added the same addresses already
+            Email.objects.bulk_create(
+                [Email(task=task, email=email) for email in sorted(added)], ignore_conflicts=True
+            )
+        # Watchers are rendered with the task
+        caching.bump_versions(Task.objects.filter(pk=task.pk))
+    return True
+
+
+def get_tasks_watched_by(email: str) -> QuerySet:
+    """
+    Returns the tasks an address watches, found through the (email, task) index.
+    """
+    return Task.objects.filter(watchers__email=email).select_related("owner")
 
 
 def send_contact_email(
     subject: str, message: str, from_email: str, to_email: str
 ) -> None:
-    send_mail(subject, message, from_email, [to_email])
+    """
+    Queues a contact message for the outbox worker, replying to the sender.
+    """
+    outbox.enqueue("contact", subject, message, [to_email], reply_to=[from_email])
 
 
 def get_epic_by_id(epic_id: int) -> Epic | None:
     return Epic.objects.filter(pk=epic_id).first()
 
 
-def get_tasks_for_epic(epic: Epic) -> list[Task]:
-    return Task.objects.filter(epics=epic)
+def get_tasks_for_epic(epic: Epic) -> QuerySet:
+    return with_watcher_emails(Task.objects.filter(epics=epic))
 
 
-def save_tasks_for_epic(epic: Epic, tasks: list[Task]) -> None:
-    for task in tasks:
-        task.save()
-        task.epics.add(epic)
\ No newline at end of file
+def save_tasks_for_epic(epic: Epic, changes: list[tuple[Task, list[str]]]) -> set[int]:
+    """
+    Writes the tasks edited in the epic formset and keeps them in the epic.
+
+    Only the edited fields of each task are written, with one bulk UPDATE
+    per distinct set of edited fields, and the tasks are added to the epic
+    with one set-based insert. The side effects of ``Task.save()`` that the
+    bulk update bypasses (versions, sprint and epic counters, watcher
+    notifications) are applied once for all the tasks, against the status
+    read from the locked rows. Tasks deleted since the formset loaded them
+    are skipped.
+
+    Args:
+        epic (Epic): The edited epic.
+        changes (list[tuple[Task, list[str]]]): The edited tasks, with the
+            names of their edited fields.
+
+    Returns:
+        set[int]: The ids of the skipped tasks.
+    """
+    if not changes:
+        return set()
+
+    with transaction.atomic():
+        locked = {
+            pk: (version, status)
+            for pk, version, status in Task.objects.select_for_update(of=("self",))
+            .filter(pk__in=[task.pk for task, _ in changes])
+            .values_list("pk", "version", "status")
+        }
+        deleted = {task.pk for task, _ in changes if task.pk not in locked}
+        tasks = []
+        groups = {}
+        for task, task_fields in changes:
+            if task.pk in deleted:
+                continue
+            tasks.append(task)
+            fields = tuple(sorted({"version", "updated_at"}.union(task_fields)))
+            groups.setdefault(fields, []).append(task)
+        if not tasks:
+            return deleted
+
+        now = timezone.now()
+        done_changed = []
+        by_status = {}
+        for task in tasks:
+            version, status = locked[task.pk]
+            if task.status != status:
+                if "DONE" in (task.status, status):
+                    done_changed.append(task.pk)
+                by_status.setdefault(task.status, []).append(task.pk)
+            task._loaded_status = task.status
+            task.version = version + 1
+            task.updated_at = now
+
+        for fields, group in groups.items():
+            Task.objects.bulk_update(group, fields, batch_size=1000)
+        epic.tasks.add(*tasks)
+        if done_changed:
+            refresh_progress_for_tasks(done_changed)
+        for status, task_ids in by_status.items():
+            outbox.notify_status_change(task_ids, status)
+        caching.publish({task.pk: task.version for task in tasks})
+    return deleted
\ No newline at end of file
@@ -0,0 +1,183 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import caching, flags, outbox
+from .models import Epic, Sprint, Task
+from .progress import PROGRESS_MODELS, adjust_progress, refresh_progress_for_tasks
+
+
+def _memberships(through, owner_field, **filters) -> list[tuple[int, bool]]:
+    """
+    Returns ``(owner_id, is_done)`` for the through rows matching ``filters``.
+    """
+    rows = through.objects.filter(**filters).values_list(owner_field, "task__status")
+    return [(owner_id, status == "DONE") for owner_id, status in rows]
+
+
+def _deltas(memberships: list[tuple[int, bool]], sign: int) -> dict[int, tuple[int, int]]:
+    """
+    Sums the counter increments caused by adding (``sign=1``) or removing
+    (``sign=-1``) each membership.
+    """
+    deltas = {}
+    for owner_id, is_done in memberships:
+        total, done = deltas.get(owner_id, (0, 0))
+        deltas[owner_id] = (total + sign, done + (sign if is_done else 0))
+    return deltas
+
+
+@receiver(m2m_changed, sender=Sprint.tasks.through)
+@receiver(m2m_changed, sender=Epic.tasks.through)
+def track_task_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the sprint and epic task counters in sync with their ``tasks``.
+
+    Removed memberships are collected before the rows disappear, since the
+    ids passed to ``remove()`` are not guaranteed to be members.
+    """
+    owner_model = Sprint if sender is Sprint.tasks.through else Epic
+    owner_field = f"{owner_model._meta.model_name}_id"
+
+    if reverse:
+        filters = {"task_id": instance.pk}
+        if pk_set is not None:
+            filters[f"{owner_field}__in"] = pk_set
+    else:
+        filters = {owner_field: instance.pk}
+        if pk_set is not None:
+            filters["task_id__in"] = pk_set
+
+    if action in ("pre_remove", "pre_clear"):
+        instance._removed_memberships = _memberships(sender, owner_field, **filters)
+        return
+    if action in ("post_remove", "post_clear"):
+        deltas = _deltas(getattr(instance, "_removed_memberships", []), -1)
+        instance._removed_memberships = []
+    elif action == "post_add":
+        # ``pk_set`` only holds the newly added ids at this point
+        deltas = _deltas(_memberships(sender, owner_field, **filters), 1)
+    else:
+        return
+
+    adjust_progress(owner_model, deltas)
+    if not reverse and instance.pk in deltas:
+        total, done = deltas[instance.pk]
+        instance.tasks_total += total
+        instance.tasks_done += done
+
+
+@receiver(post_save, sender=Task)
+def track_task_status(sender, instance, created, update_fields, **kwargs):
+    """
+    Updates the completed-task counters when a task enters or leaves DONE,
+    and notifies the watchers of any status change.
+    """
+    previous = getattr(instance, "_loaded_status", None)
+    instance._loaded_status = instance.status
+    if created or (update_fields is not None and "status" not in update_fields):
+        return
+    if previous is None:
+        # The stored status is unknown, so recount instead of guessing
+        refresh_progress_for_tasks([instance.pk])
+        return
+
+    if previous != instance.status:
+        outbox.notify_status_change([instance.pk], instance.status)
+
+    was_done, is_done = previous == "DONE", instance.status == "DONE"
+    if was_done == is_done:
+        return
+    delta = (0, 1 if is_done else -1)
+    for model in PROGRESS_MODELS:
+        owner_field = f"{model._meta.model_name}_id"
+        owner_ids = model.tasks.through.objects.filter(task_id=instance.pk).values_list(
+            owner_field, flat=True
+        )
+        adjust_progress(model, {owner_id: delta for owner_id in owner_ids})
+
+
+@receiver(pre_delete, sender=Task)
+def untrack_deleted_task(sender, instance, **kwargs):
+    """
+    Removes a deleted task from the counters before its memberships cascade.
+    """
+    for model in PROGRESS_MODELS:
+        owner_field = f"{model._meta.model_name}_id"
+        memberships = _memberships(model.tasks.through, owner_field, task_id=instance.pk)
+        adjust_progress(model, _deltas(memberships, -1))
+
+
+@receiver(post_delete, sender=Task)
+def forget_deleted_task(sender, instance, **kwargs):
+    """
+    Drops the cached version of a deleted task, so its fragments stop being served.
+    """
+    caching.forget([instance.pk])
+
+
+def _members(group_ids) -> list[int]:
+    return list(User.groups.through.objects.filter(group_id__in=group_ids).values_list("user_id", flat=True))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_access(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drops the cached access (see tasks.flags) of the users whose groups or
+    permissions change.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        flags.invalidate([instance.pk])
+    elif action == "pre_clear":
+        # A group or permission loses all its users
+        owner_field = "group_id" if sender is User.groups.through else "permission_id"
+        flags.invalidate(sender.objects.filter(**{owner_field: instance.pk}).values_list("user_id", flat=True))
+    else:
+        flags.invalidate(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_access(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drops the cached access of the members of groups whose permissions change.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        flags.invalidate(_members([instance.pk]))
+    elif action == "pre_clear":
+        # A permission is removed from every group
+        flags.invalidate(_members(instance.group_set.values_list("pk", flat=True)))
+    else:
+        flags.invalidate(_members(pk_set))
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_renamed_group(sender, instance, **kwargs):
+    """
+    Drops the cached access of the members of a renamed or deleted group.
+    """
+    if not kwargs.get("created"):
+        flags.invalidate(_members([instance.pk]))
+
+
+@receiver(pre_delete, sender=Permission)
+def invalidate_deleted_permission(sender, instance, **kwargs):
+    """
+    Drops the cached access of the users granted a deleted permission.
+    """
+    user_ids = User.objects.filter(Q(user_permissions=instance) | Q(groups__permissions=instance))
+    flags.invalidate(user_ids.values_list("pk", flat=True).distinct())
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    """
+    Drops the cached access of a deleted user.
+    """
+    flags.invalidate([instance.pk])
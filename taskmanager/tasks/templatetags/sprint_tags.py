@@ -1,12 +1,38 @@
 from django import template
 from django.db.models import Count
 from tasks.models import Sprint
+from tasks.progress import attach_status_counts
 
 register = template.Library()
 
 
+@register.simple_tag(takes_context=True)
+def load_task_summaries(context, owners) -> str:
+    """
+    Loads the task counts per status of every sprint or epic of ``owners``
+    with one grouped query, for ``task_summary`` and ``percent_complete``.
+
+    The counts are kept on the request, so that later calls for the same
+    sprints or epics during the request cost no query.
+
+    Usage: ``{% load_task_summaries sprints %}`` before looping over them.
+    """
+    request = context.get("request")
+    known = None
+    if request is not None:
+        if not hasattr(request, "_task_status_counts"):
+            request._task_status_counts = {}
+        known = request._task_status_counts
+    attach_status_counts(list(owners), known)
+    return ""
+
+
 @register.simple_tag
 def task_summary(sprint: Sprint) -> dict:
+    # Counts loaded for the whole page by load_task_summaries
+    if hasattr(sprint, "status_counts"):
+        return sprint.status_counts
+
     # Group tasks by status and count each group
     task_counts = (
         sprint.tasks.values("status").annotate(count=Count("status")).order_by()
@@ -1,19 +1,49 @@
 from django import template
 from django.db.models import Case, Count, When
+from tasks.models import Task
+from tasks.progress import PROGRESS_MODELS
 
 register = template.Library()
 
 
+def _owner(tasks):
+    """
+    Returns the sprint or epic whose tasks are given, as a sprint or epic,
+    or its ``tasks`` manager; None for any other queryset.
+    """
+    if isinstance(tasks, PROGRESS_MODELS):
+        return tasks
+    owner = getattr(tasks, "instance", None)
+    if isinstance(owner, PROGRESS_MODELS):
+        return owner
+    return None
+
+
 @register.filter
 def percent_complete(tasks):
-    if tasks.exists():
+    owner = _owner(tasks)
+    if owner is not None:
+        # Counts loaded for the whole page by load_task_summaries, or the
+        # counters maintained by tasks.progress: no query either way
+        counts = getattr(owner, "status_counts", None)
+        if counts is not None:
+            total, done = sum(counts.values()), counts.get("DONE", 0)
+        else:
+            total, done = owner.tasks_total, owner.tasks_done
+    else:
         # Aggregate count of all tasks and count of completed tasks
         aggregation = tasks.aggregate(
             total=Count("id"), done=Count(Case(When(status="DONE", then=1)))
         )
+        total, done = aggregation["total"], aggregation["done"]
 
-        # Calculate the percentage
-        percent_done = (aggregation["done"] / aggregation["total"]) * 100
-        return percent_done
-    else:
+    if not total:
         return 0
+    # Calculate the percentage
+    return (done / total) * 100
+
+
+@register.filter
+def status_label(status: str) -> str:
+    # Display name of a task status, e.g. "Completed" for DONE
+    return dict(Task.STATUS_CHOICES).get(status, status)
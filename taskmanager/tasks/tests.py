@@ -1,3 +1,1331 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import smtplib
+import tempfile
+import threading
+import time
+import uuid
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group, User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseRedirect
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import caching, export, flags, idempotency, outbox, search, services
+from .claims import ADAPTIVE, OPTIMISTIC, PESSIMISTIC, STRATEGIES, ClaimEngine
+from .context_processors import feature_flags
+from .exceptions import (
+    InvalidCursorException,
+    SubmissionInProgressException,
+    TaskAlreadyClaimedException,
+    TaskClaimConflictException,
+)
+from .importer import Importer, UserCache, read_records
+from .models import Email, Epic, FormSubmission, ImportCheckpoint, OutboxMessage, Sprint, Task
+from .pagination import KeysetPaginator
+from .progress import refresh_progress
+
+
+class TaskFixturesMixin:
+    """
+    Creates a user, a sprint and an epic for the tests.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", "alice@example.com", "password")
+        cls.sprint = Sprint.objects.create(
+            name="Sprint 1",
+            start_date=datetime.date(2024, 1, 1),
+            end_date=datetime.date(2024, 1, 15),
+            creator=cls.user,
+        )
+        cls.epic = Epic.objects.create(name="Epic 1", creator=cls.user)
+
+    def create_task(self, status="UNASSIGNED", **kwargs) -> Task:
+        return Task.objects.create(title="Task", status=status, creator=self.user, **kwargs)
+
+
+class ProgressCountersTests(TaskFixturesMixin, TestCase):
+    def assertCounters(self, owner, total, done):
+        owner.refresh_from_db()
+        self.assertEqual((owner.tasks_total, owner.tasks_done), (total, done))
+
+    def test_adding_and_removing_tasks(self):
+        tasks = [self.create_task(), self.create_task("DONE"), self.create_task("DONE")]
+        self.sprint.tasks.add(*tasks)
+        self.assertCounters(self.sprint, 3, 2)
+
+        self.sprint.tasks.remove(tasks[1])
+        self.assertCounters(self.sprint, 2, 1)
+
+        # Removing a task that is not a member changes nothing
+        self.sprint.tasks.remove(tasks[1])
+        self.assertCounters(self.sprint, 2, 1)
+
+        tasks[0].sprints.clear()
+        self.assertCounters(self.sprint, 1, 1)
+
+    def test_status_transitions(self):
+        task = self.create_task("IN_PROGRESS")
+        self.sprint.tasks.add(task)
+        self.epic.tasks.add(task)
+
+        task.status = "DONE"
+        task.save()
+        self.assertCounters(self.sprint, 1, 1)
+        self.assertCounters(self.epic, 1, 1)
+        self.assertEqual(self.epic.completion_status, 100)
+
+        task.status = "ARCHIVED"
+        task.save()
+        self.assertCounters(self.sprint, 1, 0)
+        self.assertCounters(self.epic, 1, 0)
+        self.assertEqual(self.epic.completion_status, 0)
+
+    def test_stale_copies_count_a_transition_once(self):
+        task = self.create_task("IN_PROGRESS")
+        self.sprint.tasks.add(task)
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+
+        # Both copies were loaded IN_PROGRESS; the second save must read the
+        # stored status rather than its stale copy
+        for copy in (first, second):
+            copy.status = "DONE"
+            copy.save()
+        self.assertCounters(self.sprint, 1, 1)
+
+    def test_deleting_a_task(self):
+        task = self.create_task("DONE")
+        self.sprint.tasks.add(task)
+        self.epic.tasks.add(task)
+
+        task.delete()
+        self.assertCounters(self.sprint, 0, 0)
+        self.assertCounters(self.epic, 0, 0)
+
+    def test_reading_progress_costs_no_query(self):
+        self.sprint.tasks.add(self.create_task(), self.create_task("DONE"))
+        sprint = Sprint.objects.get(pk=self.sprint.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(sprint.total_tasks, 2)
+            self.assertEqual(sprint.completed_tasks, 1)
+            self.assertEqual(sprint.completion_percentage, 50)
+
+    def test_refresh_progress_recounts(self):
+        self.sprint.tasks.add(self.create_task("DONE"))
+        Sprint.objects.filter(pk=self.sprint.pk).update(tasks_total=7, tasks_done=7)
+
+        refresh_progress(Sprint, [self.sprint.pk])
+        self.assertCounters(self.sprint, 1, 1)
+
+
+class TaskBoardTests(TaskFixturesMixin, TestCase):
+    def test_columns_are_capped_with_their_totals(self):
+        unassigned = [self.create_task(owner=self.user) for _ in range(3)]
+        done = self.create_task("DONE")
+        self.create_task("ARCHIVED")
+
+        # The column totals, then one capped query per non-empty column
+        with self.assertNumQueries(3):
+            columns = services.get_task_board(column_size=2)
+            owners = [task.owner for column in columns for task in column["tasks"]]
+        self.assertEqual([column["status"] for column in columns], list(services.BOARD_STATUSES))
+        self.assertEqual([column["count"] for column in columns], [3, 0, 1])
+        self.assertEqual(owners, [self.user, self.user, None])
+
+        todo, in_progress, completed = columns
+        self.assertEqual(todo["label"], "Unassigned")
+        self.assertEqual(list(todo["tasks"]), [unassigned[2], unassigned[1]])
+        self.assertEqual((in_progress["tasks"], in_progress["next_cursor"]), ([], None))
+        self.assertEqual((list(completed["tasks"]), completed["next_cursor"]), ([done], None))
+
+        # "Load more" continues the column after the capped slice
+        page = services.get_task_board_column("UNASSIGNED", todo["next_cursor"], column_size=2)
+        self.assertEqual(list(page.object_list), [unassigned[0]])
+        self.assertIsNone(page.next_cursor)
+
+    async def test_async_board_matches(self):
+        await sync_to_async(self.create_task)()
+        await sync_to_async(self.create_task)("DONE")
+        expected = await sync_to_async(services.get_task_board)(column_size=1)
+        columns = await services.aget_task_board(column_size=1)
+        self.assertEqual(
+            [(column["count"], list(column["tasks"]), column["next_cursor"]) for column in columns],
+            [(column["count"], list(column["tasks"]), column["next_cursor"]) for column in expected],
+        )
+
+
+class TaskCalendarTests(TaskFixturesMixin, TestCase):
+    def create_task_at(self, created_at: str) -> Task:
+        task = self.create_task()
+        Task.objects.filter(pk=task.pk).update(created_at=datetime.datetime.fromisoformat(created_at))
+        return task
+
+    def test_days_are_half_open_ranges_in_the_active_time_zone(self):
+        # 2024-03-10 is the 23-hour day starting daylight saving time in New York
+        before = self.create_task_at("2024-03-10T04:59:59+00:00")  # 23:59:59 on the 9th
+        first = self.create_task_at("2024-03-10T05:00:00+00:00")  # midnight
+        last = self.create_task_at("2024-03-11T03:59:59+00:00")  # 23:59:59 EDT
+        after = self.create_task_at("2024-03-11T04:00:00+00:00")  # midnight on the 11th
+
+        with timezone.override("America/New_York"):
+            self.assertEqual(
+                services.local_date_range(datetime.date(2024, 3, 10), datetime.date(2024, 3, 10)),
+                (
+                    datetime.datetime(2024, 3, 10, 5, tzinfo=datetime.timezone.utc),
+                    datetime.datetime(2024, 3, 11, 4, tzinfo=datetime.timezone.utc),
+                ),
+            )
+            self.assertCountEqual(services.get_task_by_date(datetime.date(2024, 3, 10)), [first, last])
+            self.assertEqual(
+                services.get_task_calendar(datetime.date(2024, 3, 9), datetime.date(2024, 3, 11)),
+                {datetime.date(2024, 3, 9): 1, datetime.date(2024, 3, 10): 2, datetime.date(2024, 3, 11): 1},
+            )
+
+        # The same tasks fall on other days in UTC
+        self.assertCountEqual(services.get_task_by_date(datetime.date(2024, 3, 10)), [before, first])
+        self.assertCountEqual(services.get_task_by_date(datetime.date(2024, 3, 11)), [last, after])
+
+    def test_calendar_is_counted_with_one_query(self):
+        self.create_task_at("2024-02-01T10:00:00+00:00")
+        self.create_task_at("2024-02-29T23:59:59+00:00")
+        self.create_task_at("2024-02-29T23:59:59+00:00")
+        self.create_task_at("2024-03-01T00:00:00+00:00")
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("tasks:task-calendar-month", args=[2024, 2]))
+        data = response.json()
+        self.assertEqual((data["start"], data["end"]), ("2024-02-01", "2024-02-29"))
+        self.assertEqual(len(data["days"]), 29)
+        self.assertEqual((data["days"]["2024-02-01"], data["days"]["2024-02-29"]), (1, 2))
+        self.assertEqual(sum(data["days"].values()), 3)
+
+        self.assertEqual(self.client.get(reverse("tasks:task-calendar-month", args=[2024, 13])).status_code, 404)
+
+    def test_sprint_calendar(self):
+        self.create_task_at("2024-01-15T12:00:00+00:00")
+        self.create_task_at("2024-01-16T00:00:00+00:00")
+
+        data = self.client.get(reverse("tasks:task-calendar-sprint", args=[self.sprint.pk])).json()
+        self.assertEqual((data["start"], data["end"]), ("2024-01-01", "2024-01-15"))
+        self.assertEqual(len(data["days"]), 15)
+        self.assertEqual(sum(data["days"].values()), 1)
+
+
+class KeysetPaginationTests(TaskFixturesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Pairs of tasks sharing a creation date, to check the id tie-break
+        now = timezone.now()
+        tasks = Task.objects.bulk_create(
+            Task(title=f"Task {i}", creator=cls.user) for i in range(7)
+        )
+        for i, task in enumerate(tasks):
+            Task.objects.filter(pk=task.pk).update(created_at=now - datetime.timedelta(minutes=i // 2))
+        cls.newest_first = list(Task.objects.order_by("-created_at", "-id").values_list("pk", flat=True))
+
+    def walk(self, per_page):
+        paginator = KeysetPaginator(Task.objects.all(), per_page)
+        pages, cursor = [], None
+        while True:
+            page = paginator.paginate(cursor)
+            pages.append(page)
+            if not page.has_next():
+                return paginator, pages
+            cursor = page.next_cursor
+
+    def test_walking_forwards_visits_every_task_once(self):
+        _, pages = self.walk(3)
+        self.assertEqual([task.pk for page in pages for task in page], self.newest_first)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertFalse(pages[0].has_previous())
+
+    def test_walking_backwards_returns_the_same_pages(self):
+        paginator, pages = self.walk(3)
+        previous = paginator.paginate(pages[2].previous_cursor)
+        self.assertEqual([task.pk for task in previous], [task.pk for task in pages[1]])
+        first = paginator.paginate(previous.previous_cursor)
+        self.assertEqual([task.pk for task in first], [task.pk for task in pages[0]])
+        self.assertFalse(first.has_previous())
+
+    def test_a_page_costs_one_query(self):
+        paginator, pages = self.walk(3)
+        with self.assertNumQueries(1):
+            paginator.paginate(pages[1].next_cursor)
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursorException):
+            KeysetPaginator(Task.objects.all(), 3).paginate("not-a-cursor")
+        response = self.client.get(reverse("tasks:task-list-api"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_api(self):
+        response = self.client.get(reverse("tasks:task-list-api"), {"limit": 5})
+        data = response.json()
+        self.assertEqual([task["id"] for task in data["results"]], self.newest_first[:5])
+        self.assertIsNone(data["previous"])
+
+        data = self.client.get(reverse("tasks:task-list-api"), {"limit": 5, "cursor": data["next"]}).json()
+        self.assertEqual([task["id"] for task in data["results"]], self.newest_first[5:])
+        self.assertIsNone(data["next"])
+
+
+class ProgressListTests(TaskFixturesMixin, TestCase):
+    def create_owners(self, model, count, **kwargs):
+        for i in range(count):
+            owner = model.objects.create(name=f"{model.__name__} {i}", creator=self.user, **kwargs)
+            owner.tasks.add(self.create_task(), self.create_task("DONE"))
+
+    def count_queries(self, name) -> int:
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        return len(captured)
+
+    def test_summaries(self):
+        self.sprint.tasks.add(self.create_task(), self.create_task("DONE"), self.create_task("DONE"))
+        self.epic.tasks.add(self.create_task("IN_PROGRESS"))
+
+        response = self.client.get(reverse("tasks:sprint-list"))
+        self.assertContains(response, "67% complete")
+        self.assertContains(response, "Completed 2")
+        self.assertContains(response, "Unassigned 1")
+
+        response = self.client.get(reverse("tasks:epic-list"))
+        self.assertContains(response, "0% complete")
+        self.assertContains(response, "In Progress 1")
+
+    def test_queries_do_not_grow_with_the_page(self):
+        dates = {"start_date": datetime.date(2024, 1, 1), "end_date": datetime.date(2024, 1, 15)}
+        # One query for the page, one for the task counts of all its rows
+        with self.assertNumQueries(2):
+            self.client.get(reverse("tasks:sprint-list"))
+        self.create_owners(Sprint, 10, **dates)
+        self.assertEqual(self.count_queries("tasks:sprint-list"), 2)
+
+        with self.assertNumQueries(2):
+            self.client.get(reverse("tasks:epic-list"))
+        self.create_owners(Epic, 10)
+        self.assertEqual(self.count_queries("tasks:epic-list"), 2)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("tasks:sprint-list"), {"cursor": "nope"})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SQL_INSTRUMENTATION_SAMPLE_RATE=1)
+class QueryInstrumentationTests(TaskFixturesMixin, TestCase):
+    def test_sync_view(self):
+        self.create_task()
+        response = self.client.get(reverse("tasks:task-list-api"))
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    async def test_async_view_queries_are_counted(self):
+        await Task.objects.acreate(title="Task", creator=self.user)
+        response = await AsyncClient().get(reverse("tasks:task-list-api-async"))
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+
+class ClaimNextTasksTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        # Oldest first: tasks[0] is the first claimed
+        now = timezone.now()
+        self.tasks = [self.create_task() for _ in range(4)]
+        for i, task in enumerate(self.tasks):
+            Task.objects.filter(pk=task.pk).update(created_at=now - datetime.timedelta(hours=4 - i))
+        self.create_task("DONE")
+        self.create_task(owner=self.user)
+
+    def test_claims_the_oldest_unassigned_tasks(self):
+        claimed = services.claim_next_tasks(self.user.id, 2)
+        self.assertEqual([task.pk for task in claimed], [task.pk for task in self.tasks[:2]])
+        for task in claimed:
+            task.refresh_from_db()
+            self.assertEqual((task.status, task.owner_id, task.version), ("IN_PROGRESS", self.user.id, 1))
+
+        claimed = services.claim_next_tasks(self.user.id, 5)
+        self.assertEqual([task.pk for task in claimed], [task.pk for task in self.tasks[2:]])
+        self.assertEqual(services.claim_next_tasks(self.user.id, 5), [])
+
+    def test_filters(self):
+        self.sprint.tasks.add(self.tasks[2])
+        claimed = services.claim_next_tasks(self.user.id, 5, sprint_id=self.sprint.pk)
+        self.assertEqual([task.pk for task in claimed], [self.tasks[2].pk])
+
+        claimed = services.claim_next_tasks(self.user.id, 5, min_age=datetime.timedelta(hours=2, minutes=30))
+        self.assertEqual([task.pk for task in claimed], [task.pk for task in self.tasks[:2]])
+
+    def test_claiming_costs_a_constant_number_of_queries(self):
+        # SELECT ... FOR UPDATE SKIP LOCKED, one UPDATE and one read of the
+        # watchers to notify, whatever the count, within a savepoint
+        with self.assertNumQueries(5):
+            services.claim_next_tasks(self.user.id, 1)
+        with self.assertNumQueries(5):
+            services.claim_next_tasks(self.user.id, 3)
+
+    def test_api(self):
+        url = reverse("tasks:task-claim-next")
+        self.assertEqual(self.client.post(url).status_code, 401)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post(url, {"count": "many"}).status_code, 400)
+        data = self.client.post(url, {"count": 2}).json()
+        self.assertEqual([task["id"] for task in data["results"]], [task.pk for task in self.tasks[:2]])
+
+
+class ClaimEngineTests(TaskFixturesMixin, TestCase):
+    def test_strategies(self):
+        for strategy in STRATEGIES:
+            with self.subTest(strategy=strategy):
+                engine = ClaimEngine(strategy)
+                task = self.create_task()
+                engine.claim(self.user.id, task.pk)
+                task.refresh_from_db()
+                self.assertEqual((task.status, task.owner_id, task.version), ("IN_PROGRESS", self.user.id, 1))
+
+                with self.assertRaises(TaskAlreadyClaimedException):
+                    engine.claim(self.user.id, task.pk)
+                with self.assertRaises(TaskAlreadyClaimedException):
+                    engine.claim(self.user.id, self.create_task("DONE").pk)
+                with self.assertRaises(Task.DoesNotExist):
+                    engine.claim(self.user.id, 0)
+                stats = engine.stats.snapshot()
+                self.assertEqual((stats["claimed"], stats["already_claimed"]), (1, 2))
+
+    def test_optimistic_claim_writes_without_reading_first(self):
+        task = self.create_task()
+        # The compare-and-set UPDATE, then the reads of the new version to
+        # publish and of the watchers to notify, within a savepoint
+        with self.assertNumQueries(5):
+            ClaimEngine(OPTIMISTIC).claim(self.user.id, task.pk)
+
+    def test_adaptive_strategy_follows_the_conflict_rate(self):
+        engine = ClaimEngine(ADAPTIVE, conflict_threshold=0.2, window=10)
+        self.assertEqual(engine.current_strategy(), OPTIMISTIC)
+        for conflict in (1, 1, 1, 0, 0, 0, 0, 0, 0, 0):
+            engine._record(conflict=bool(conflict))
+        self.assertEqual(engine.current_strategy(), PESSIMISTIC)
+        for _ in range(10):
+            engine._record(conflict=False)
+        self.assertEqual(engine.current_strategy(), OPTIMISTIC)
+
+
+class ClaimConflictTests(TaskFixturesMixin, TransactionTestCase):
+    def setUp(self):
+        self.setUpTestData()
+
+    def test_locked_task_is_retried_then_reported(self):
+        task = self.create_task()
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with transaction.atomic():
+                Task.objects.select_for_update().get(pk=task.pk)
+                locked.set()
+                release.wait(5)
+            connection.close()
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        try:
+            locked.wait(5)
+            engine = ClaimEngine(PESSIMISTIC, max_attempts=3, base_delay=0.001)
+            with self.assertRaises(TaskClaimConflictException):
+                engine.claim(self.user.id, task.pk)
+        finally:
+            release.set()
+            holder.join()
+
+        stats = engine.stats.snapshot()
+        self.assertEqual((stats["attempts"], stats["conflicts"], stats["exhausted"]), (3, 3, 1))
+        # Once the lock is released the claim goes through
+        engine.claim(self.user.id, task.pk)
+        task.refresh_from_db()
+        self.assertEqual(task.owner_id, self.user.id)
+
+
+class TaskHomeConditionalTests(TaskFixturesMixin, TestCase):
+    def get(self, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        return self.client.get(reverse("tasks:task-home"), **headers)
+
+    def test_unchanged_board_is_not_modified(self):
+        self.create_task()
+        self.create_task("IN_PROGRESS")
+        etag = self.get()["ETag"]
+
+        # The column totals and one capped window per non-empty column: the
+        # queries of the board itself, with no scan of the table on top
+        with self.assertNumQueries(3):
+            response = self.get(etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        task = self.create_task()
+        etag = self.get()["ETag"]
+
+        task.title = "Renamed"
+        task.save()
+        self.assertEqual(self.get(etag).status_code, 200)
+
+        etag = self.get()["ETag"]
+        task.status = "DONE"
+        task.save()
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_tasks_beyond_the_window_change_the_totals(self):
+        tasks = Task.objects.bulk_create(
+            Task(title="Task", creator=self.user) for _ in range(services.BOARD_COLUMN_SIZE + 1)
+        )
+        etag = self.get()["ETag"]
+
+        # The oldest task is not shown, and update() leaves updated_at as is
+        Task.objects.filter(pk=tasks[0].pk).update(status="IN_PROGRESS")
+        self.assertEqual(self.get(etag).status_code, 200)
+
+
+class TaskFragmentCacheTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.task = Task.objects.create(title="Original", creator=self.user)
+        self.url = reverse("tasks:task-detail", args=[self.task.pk])
+        self.client.force_login(self.user)
+
+    def get(self):
+        return self.client.get(self.url)
+
+    def write(self, func, *args, **kwargs):
+        # Versions are published once the write commits
+        with self.captureOnCommitCallbacks(execute=True):
+            func(*args, **kwargs)
+
+    def post_bulk_update(self, *items):
+        response = self.client.post(
+            reverse("tasks:task-bulk-update"), json.dumps(list(items)), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+    def assertServes(self, text):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, text)
+
+    def test_cached_fragment_costs_no_query(self):
+        self.assertServes("Original")
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_writes_bump_the_version(self):
+        self.assertServes("Original")
+
+        def save():
+            self.task.title = "Saved"
+            self.task.save()
+
+        def bulk_update():
+            self.post_bulk_update({"id": self.task.pk, "title": "Bulk"})
+
+        writes = [
+            ("save", save, "Saved"),
+            ("watchers", lambda: services.sync_watchers(self.task, ["watcher@example.com"]), "watcher@example.com"),
+            ("claim", lambda: services.claim_task(self.user.id, self.task.pk), "Saved"),
+            ("bulk", bulk_update, "Bulk"),
+        ]
+        for name, func, text in writes:
+            with self.subTest(write=name):
+                version = Task.objects.get(pk=self.task.pk).version
+                self.write(func)
+                self.assertEqual(Task.objects.get(pk=self.task.pk).version, version + 1)
+                self.assertEqual(caching.get_version(self.task.pk), version + 1)
+                self.assertServes(text)
+
+    def test_deleted_task_is_not_served(self):
+        self.assertServes("Original")
+        stale = Task.objects.get(pk=self.task.pk)
+        self.write(self.task.delete)
+        self.assertEqual(self.get().status_code, 404)
+
+        # A reader that loaded the task before the delete cannot publish it again
+        caching.set_fragment(stale, "detail", "Stale")
+        self.assertIsNone(caching.get_fragment(stale.pk, "detail"))
+        self.assertEqual(self.get().status_code, 404)
+
+
+class IdempotencyTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def view(self, request):
+        self.calls += 1
+        if request.POST.get("valid") == "no":
+            return HttpResponse("Form errors", status=200)
+        return HttpResponseRedirect(f"/done/{self.calls}/")
+
+    def post(self, view, key, **data):
+        return view(RequestFactory().post("/", {"uuid": str(key), **data}))
+
+    def test_duplicates_replay_the_first_response(self):
+        for backend in idempotency.STORES:
+            with self.subTest(backend=backend):
+                self.calls = 0
+                view = idempotency.idempotent("test", backend)(self.view)
+                key = uuid.uuid4()
+                first = self.post(view, key)
+                duplicate = self.post(view, key)
+                self.assertEqual(self.calls, 1)
+                self.assertEqual((duplicate.status_code, duplicate["Location"]), (302, first["Location"]))
+
+                # Another key is another submission
+                self.post(view, uuid.uuid4())
+                self.assertEqual(self.calls, 2)
+
+    def test_stale_pending_keys_are_reclaimed(self):
+        def later(seconds):
+            # Ages the database rows, and moves the clock of the cache
+            FormSubmission.objects.update(created_at=timezone.now() - datetime.timedelta(seconds=seconds))
+            return mock.patch("time.time", return_value=time.time() + seconds)
+
+        for backend, store in idempotency.STORES.items():
+            with self.subTest(backend=backend):
+                key, completed = uuid.uuid4(), uuid.uuid4()
+                self.assertIsNone(store.begin("test", key))
+                self.assertIsNone(store.begin("test", completed))
+                store.complete("test", completed, {"status": 302, "headers": {}})
+                with self.assertRaises(SubmissionInProgressException):
+                    store.begin("test", key)
+
+                # The worker processing the submission died: its key no
+                # longer blocks the retries, unlike the completed key
+                with later(idempotency.PENDING_TTL + 1):
+                    self.assertIsNone(store.begin("test", key))
+                    self.assertEqual(store.begin("test", completed)["status"], 302)
+                    with self.assertRaises(SubmissionInProgressException):
+                        store.begin("test", key)
+
+    def test_failed_submissions_release_their_key(self):
+        for backend in idempotency.STORES:
+            with self.subTest(backend=backend):
+                self.calls = 0
+                view = idempotency.idempotent("test", backend)(self.view)
+                key = uuid.uuid4()
+                self.assertEqual(self.post(view, key, valid="no").status_code, 200)
+                self.assertEqual(self.post(view, key).status_code, 302)
+                self.assertEqual(self.calls, 2)
+
+    def test_submission_in_progress(self):
+        for backend, store in idempotency.STORES.items():
+            with self.subTest(backend=backend):
+                view = idempotency.idempotent("test", backend)(self.view)
+                key = uuid.uuid4()
+                store.begin("test", key)
+                self.assertEqual(self.post(view, key).status_code, 409)
+
+    def test_missing_or_invalid_key(self):
+        view = idempotency.idempotent("test")(self.view)
+        view(RequestFactory().post("/"))
+        view(RequestFactory().post("/"))
+        self.post(view, "not-a-uuid")
+        self.assertEqual(self.calls, 3)
+
+    def test_prune_deletes_expired_submissions(self):
+        expired = timezone.now() - datetime.timedelta(seconds=idempotency.TTL + 1)
+        FormSubmission.objects.bulk_create(
+            FormSubmission(uuid=uuid.uuid4(), created_at=expired) for _ in range(5)
+        )
+        FormSubmission.objects.create(uuid=uuid.uuid4())
+        self.assertEqual(idempotency.prune(batch_size=2), 5)
+        self.assertEqual(FormSubmission.objects.count(), 1)
+
+    def test_double_submitted_task_update_is_applied_once(self):
+        task = self.create_task()
+        data = {"title": "Renamed", "description": "", "status": "IN_PROGRESS", "uuid": str(uuid.uuid4())}
+        url = reverse("tasks:task-update", args=[task.pk])
+        first = self.client.post(url, data)
+        duplicate = self.client.post(url, data)
+        self.assertEqual(first.status_code, 302)
+        self.assertEqual(duplicate["Location"], first["Location"])
+        task.refresh_from_db()
+        self.assertEqual((task.title, task.version), ("Renamed", 1))
+
+
+class WatcherSyncTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.task = self.create_task()
+        services.sync_watchers(self.task, ["a@example.com", "b@example.com"])
+
+    def watchers(self, task=None) -> list[str]:
+        return sorted((task or self.task).watchers.values_list("email", flat=True))
+
+    def version(self) -> int:
+        return Task.objects.get(pk=self.task.pk).version
+
+    def test_only_the_difference_is_written(self):
+        self.assertEqual(self.watchers(), ["a@example.com", "b@example.com"])
+        version = self.version()
+
+        # One DELETE, one INSERT, then the version bump and the read of the
+        # version to publish, each within a savepoint
+        with self.assertNumQueries(8):
+            changed = services.sync_watchers(
+                self.task, ["b@example.com", "c@example.com"], current=["a@example.com", "b@example.com"]
+            )
+        self.assertTrue(changed)
+        self.assertEqual(self.watchers(), ["b@example.com", "c@example.com"])
+        self.assertEqual(self.version(), version + 1)
+
+        self.assertTrue(services.sync_watchers(self.task, []))
+        self.assertEqual(self.watchers(), [])
+
+    def test_unchanged_watchers_cost_no_write(self):
+        version = self.version()
+        with self.assertNumQueries(0):
+            changed = services.sync_watchers(
+                self.task, ["b@example.com", "a@example.com", "a@example.com"],
+                current=["a@example.com", "b@example.com"],
+            )
+        self.assertFalse(changed)
+        self.assertEqual(self.version(), version)
+
+    def test_duplicates_and_case(self):
+        services.sync_watchers(self.task, ["c@example.com", "c@example.com", "C@example.com"])
+        # Addresses are stored as typed: only exact duplicates are merged
+        self.assertEqual(self.watchers(), ["C@example.com", "c@example.com"])
+
+    def test_stale_current_watchers(self):
+        # A concurrent edit already added the address: the insert skips it
+        services.sync_watchers(self.task, ["a@example.com", "b@example.com", "c@example.com"])
+        changed = services.sync_watchers(
+            self.task, ["a@example.com", "b@example.com", "c@example.com"], current=["a@example.com", "b@example.com"]
+        )
+        self.assertTrue(changed)
+        self.assertEqual(self.watchers(), ["a@example.com", "b@example.com", "c@example.com"])
+
+    def test_update_form(self):
+        url = reverse("tasks:task-update", args=[self.task.pk])
+        data = {"title": "Task", "description": "", "status": "UNASSIGNED", "uuid": str(uuid.uuid4())}
+        version = self.version()
+
+        # The same addresses typed differently are not a change: only the
+        # save of the task bumps its version
+        self.client.post(url, {**data, "watchers": " b@example.com,a@example.com "})
+        self.assertEqual(self.watchers(), ["a@example.com", "b@example.com"])
+        self.assertEqual(self.version(), version + 1)
+
+        self.client.post(url, {**data, "watchers": "a@example.com, d@example.com", "uuid": str(uuid.uuid4())})
+        self.assertEqual(self.watchers(), ["a@example.com", "d@example.com"])
+
+    def test_watched_tasks_api(self):
+        other = self.create_task()
+        services.sync_watchers(other, ["a@example.com"])
+        self.create_task()
+        url = reverse("tasks:watched-task-list-api")
+
+        data = self.client.get(url, {"email": "a@example.com"}).json()
+        self.assertEqual([task["id"] for task in data["results"]], [other.pk, self.task.pk])
+        data = self.client.get(url, {"email": "a@example.com", "limit": 1}).json()
+        self.assertEqual([task["id"] for task in data["results"]], [other.pk])
+        data = self.client.get(url, {"email": "a@example.com", "limit": 1, "cursor": data["next"]}).json()
+        self.assertEqual([task["id"] for task in data["results"]], [self.task.pk])
+
+        self.assertEqual(self.client.get(url, {"email": "nobody@example.com"}).json()["results"], [])
+        self.assertEqual(self.client.get(url, {"email": "not an email"}).status_code, 400)
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """
+    Local memory backend refusing some recipients, and whose server goes
+    down when a message is sent to ``down@example.com``.
+    """
+
+    def __init__(self, refused=(), **kwargs):
+        super().__init__(**kwargs)
+        self.refused = set(refused)
+        self.down = False
+
+    def open(self):
+        if self.down:
+            raise ConnectionRefusedError("Connection refused")
+        return super().open()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if "down@example.com" in message.to:
+                self.down = True
+                raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+            if self.refused.intersection(message.to):
+                raise smtplib.SMTPRecipientsRefused({address: (550, b"No such user") for address in message.to})
+        return super().send_messages(messages)
+
+
+class OutboxTests(TaskFixturesMixin, TestCase):
+    def enqueue(self, *recipients):
+        return [outbox.enqueue("test", f"To {recipient}", "Body", [recipient]) for recipient in recipients]
+
+    def test_send(self):
+        self.enqueue("a@example.com", "b@example.com")
+        self.assertEqual(outbox.drain(), (2, 0))
+        self.assertEqual([message.to for message in mail.outbox], [["a@example.com"], ["b@example.com"]])
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_status_change_notifies_the_watchers(self):
+        task = self.create_task("IN_PROGRESS")
+        Email.objects.create(task=task, email="watcher@example.com")
+        task.status = "DONE"
+        task.save()
+        # Nothing is sent before the worker runs
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["watcher@example.com"])
+        self.assertIn("is now Completed", mail.outbox[0].subject)
+
+    def test_retry_with_backoff_then_fail(self):
+        message, = self.enqueue("refused@example.com")
+        connection = FlakyEmailBackend(refused=["refused@example.com"])
+
+        for attempt in range(1, outbox.MAX_ATTEMPTS + 1):
+            started = timezone.now()
+            self.assertEqual(outbox.drain(connection=connection), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.attempts, attempt)
+            self.assertIn("SMTPRecipientsRefused", message.last_error)
+            if attempt < outbox.MAX_ATTEMPTS:
+                delay = datetime.timedelta(seconds=outbox.RETRY_DELAY * 2 ** (attempt - 1))
+                self.assertGreaterEqual(message.available_at, started + delay)
+                # Not due yet
+                self.assertEqual(outbox.drain(connection=connection), (0, 0))
+                OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+
+        self.assertIsNotNone(message.failed_at)
+        self.assertEqual(outbox.drain(connection=connection), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    def test_unreachable_server_stops_the_batch(self):
+        sent, down, untried = self.enqueue("a@example.com", "down@example.com", "c@example.com")
+        connection = FlakyEmailBackend()
+
+        self.assertEqual(outbox.deliver(connection), (1, 1, True))
+        # The outcome of the messages tried is kept, the others are untouched
+        self.assertFalse(OutboxMessage.objects.filter(pk=sent.pk).exists())
+        down.refresh_from_db()
+        untried.refresh_from_db()
+        self.assertEqual((down.attempts, untried.attempts), (1, 0))
+        self.assertIn("SMTPServerDisconnected", down.last_error)
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Once the server is back, the next run sends the rest
+        self.assertEqual(outbox.drain(connection=locmem.EmailBackend()), (1, 0))
+        self.assertEqual([message.to for message in mail.outbox], [["a@example.com"], ["c@example.com"]])
+
+    def test_contact_form(self):
+        data = {"from_email": "visitor@example.com", "subject": "Hello", "message": "Body"}
+        response = self.client.post(reverse("tasks:contact"), data)
+        self.assertRedirects(response, reverse("tasks:contact-success"))
+        self.assertEqual(OutboxMessage.objects.get().subject, "Hello")
+
+        # Longer subjects are rejected rather than overflowing the outbox
+        response = self.client.post(reverse("tasks:contact"), {**data, "subject": "x" * 256})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("subject", response.context["form"].errors)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_worker_survives_an_unreachable_server(self):
+        self.enqueue("a@example.com")
+        down = FlakyEmailBackend()
+        down.down = True
+        stderr = io.StringIO()
+
+        # The first poll cannot connect, the second one sends, the loop is
+        # then stopped by its next sleep
+        with (
+            mock.patch("tasks.outbox.get_connection", side_effect=[down, locmem.EmailBackend()]),
+            mock.patch("time.sleep", side_effect=[None, InterruptedError]) as sleep,
+            self.assertRaises(InterruptedError),
+        ):
+            call_command("send_outbox", interval=7, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn("Cannot connect to the mail server", stderr.getvalue())
+        sleep.assert_called_with(7)
+        self.assertEqual([message.to for message in mail.outbox], [["a@example.com"]])
+
+        self.enqueue("b@example.com")
+        with mock.patch("tasks.outbox.get_connection", return_value=down), self.assertRaises(CommandError):
+            call_command("send_outbox", once=True, stdout=io.StringIO())
+        self.assertEqual(OutboxMessage.objects.get().attempts, 0)
+
+
+class AsyncViewsTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.task = self.create_task()
+        # Rendering loads the session and the user with sync queries
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    async def test_pages_render_for_a_logged_in_user(self):
+        urls = [
+            reverse("tasks:task-home-async"),
+            reverse("tasks:task-detail-async", args=[self.task.pk]),
+            reverse("tasks:task-board-column-async", args=["UNASSIGNED"]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, self.task.title)
+
+    async def test_responses_match_the_sync_views(self):
+        pairs = [
+            (reverse("tasks:task-home"), reverse("tasks:task-home-async")),
+            (reverse("tasks:task-list-api"), reverse("tasks:task-list-api-async")),
+        ]
+        for sync_url, async_url in pairs:
+            with self.subTest(url=async_url):
+                expected = await sync_to_async(self.client.get)(sync_url)
+                response = await self.async_client.get(async_url)
+                self.assertEqual(response.content, expected.content)
+
+
+class FeatureFlagsTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.task = self.create_task()
+        group = Group.objects.create(name=flags.FEATURE_FLAGS["priority"])
+        self.user.groups.add(group)
+        self.addCleanup(self.clear_access)
+        self.clear_access()
+        self.client.force_login(self.user)
+        self.async_client.cookies = self.client.cookies
+
+    def clear_access(self):
+        flags.local_cache.clear()
+        cache.delete(flags.generation_key(self.user.pk))
+
+    def test_flags_are_resolved_when_read(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        with self.assertNumQueries(0):
+            context = feature_flags(request)
+        with self.assertNumQueries(2):
+            self.assertTrue(context["is_priority_feature_enabled"])
+        with self.assertNumQueries(0):
+            self.assertTrue(feature_flags(request)["is_priority_feature_enabled"])
+
+    def test_readers_cannot_cache_a_replaced_access(self):
+        load_access = flags._load_access
+
+        def load_then_leave_the_group(user_id):
+            access = load_access(user_id)
+            # The user leaves the group while the reader loads the access
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.groups.clear()
+            return access
+
+        with mock.patch.object(flags, "_load_access", side_effect=load_then_leave_the_group):
+            self.assertTrue(flags.is_enabled(self.user, "priority"))
+        self.assertFalse(flags.is_enabled(self.user, "priority"))
+        # Nor in the shared cache, read by the other processes
+        flags.local_cache.clear()
+        self.assertFalse(flags.is_enabled(self.user, "priority"))
+
+    async def test_async_views_resolve_the_flags_of_a_logged_in_user(self):
+        # The access is not cached: reading the flags queries the database
+        urls = [
+            reverse("tasks:task-home-async"),
+            reverse("tasks:task-detail-async", args=[self.task.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                await sync_to_async(self.clear_access)()
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                # Flags not read by the template are resolved here, off the
+                # event loop like the renders
+                enabled = await sync_to_async(bool)(response.context["is_priority_feature_enabled"])
+                self.assertTrue(enabled)
+
+
+class BulkApiTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def post(self, name, items):
+        return self.client.post(reverse(name), json.dumps(items), content_type="application/json")
+
+    def count_queries(self, name, items) -> int:
+        with CaptureQueriesContext(connection) as captured:
+            response = self.post(name, items)
+        self.assertLess(response.status_code, 300, response.content)
+        return len(captured)
+
+    def test_authentication_required(self):
+        self.client.logout()
+        self.assertEqual(self.post("tasks:task-bulk-create", []).status_code, 401)
+
+    def test_create(self):
+        response = self.post("tasks:task-bulk-create", [{"title": "A"}, {"title": "B", "owner": self.user.pk}])
+        self.assertEqual(response.status_code, 201)
+        results = response.json()["results"]
+        self.assertEqual([task["title"] for task in results], ["A", "B"])
+        self.assertEqual(Task.objects.filter(creator=self.user).count(), 2)
+
+    def test_invalid_items_are_reported_and_nothing_is_saved(self):
+        response = self.post(
+            "tasks:task-bulk-create",
+            [{"title": "A"}, {"owner": 0}, {"title": "C", "status": "LATER"}, "task"],
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = {error["index"]: error["errors"] for error in response.json()["errors"]}
+        self.assertEqual(sorted(errors), [1, 2, 3])
+        self.assertEqual(set(errors[1]), {"title", "owner"})
+        self.assertIn("status", errors[2])
+        self.assertFalse(Task.objects.exists())
+
+    def test_queries_do_not_grow_with_the_batch(self):
+        small = [{"title": f"Task {i}", "owner": self.user.pk} for i in range(2)]
+        large = [{"title": f"Task {i}", "owner": self.user.pk} for i in range(20)]
+        self.assertEqual(
+            self.count_queries("tasks:task-bulk-create", small),
+            self.count_queries("tasks:task-bulk-create", large),
+        )
+
+        tasks = list(Task.objects.order_by("id"))
+        small = [{"id": task.pk, "title": "Renamed"} for task in tasks[:2]]
+        large = [{"id": task.pk, "title": "Renamed again"} for task in tasks[2:]]
+        self.assertEqual(
+            self.count_queries("tasks:task-bulk-update", small),
+            self.count_queries("tasks:task-bulk-update", large),
+        )
+
+    def test_update_checks_versions(self):
+        first, second = self.create_task(), self.create_task()
+        response = self.post(
+            "tasks:task-bulk-update",
+            [{"id": first.pk, "version": 0, "title": "One"}, {"id": second.pk, "version": None, "title": "Two"}],
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        first.refresh_from_db()
+        self.assertEqual((first.title, first.version), ("One", 1))
+
+        response = self.post("tasks:task-bulk-update", [{"id": first.pk, "version": 0, "title": "Stale"}])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("version", response.json()["errors"][0]["errors"])
+
+    def test_malformed_ids_and_versions(self):
+        task = self.create_task()
+        # Unhashable and boolean ids, a string version, then a valid item
+        # repeating the task of the previous one
+        keys = [
+            {"id": [task.pk]},
+            {"id": {"pk": task.pk}},
+            {"id": True},
+            {"id": task.pk, "version": "1"},
+            {"id": task.pk},
+        ]
+        endpoints = (("tasks:task-bulk-update", {"title": "A"}), ("tasks:task-bulk-status", {"status": "DONE"}))
+        for name, fields in endpoints:
+            with self.subTest(name=name):
+                response = self.post(name, [{**item, **fields} for item in keys])
+                self.assertEqual(response.status_code, 400)
+                errors = {error["index"]: list(error["errors"]) for error in response.json()["errors"]}
+                self.assertEqual(errors, {0: ["id"], 1: ["id"], 2: ["id"], 3: ["version"], 4: ["id"]})
+
+    def test_transitions_update_the_counters_and_notify_the_watchers(self):
+        tasks = [self.create_task("IN_PROGRESS") for _ in range(3)]
+        self.sprint.tasks.add(*tasks)
+        Email.objects.create(task=tasks[0], email="watcher@example.com")
+
+        response = self.post("tasks:task-bulk-status", [{"id": task.pk, "status": "DONE"} for task in tasks])
+        self.assertEqual(response.status_code, 200, response.content)
+        self.sprint.refresh_from_db()
+        self.assertEqual((self.sprint.tasks_total, self.sprint.tasks_done), (3, 3))
+        self.assertEqual(OutboxMessage.objects.filter(recipients=["watcher@example.com"]).count(), 1)
+
+
+class SaveTasksForEpicTests(TaskFixturesMixin, TestCase):
+    def test_only_the_edited_fields_of_each_task_are_written(self):
+        first, second = self.create_task(), self.create_task()
+        first.title = "Renamed"
+        second.description = "Described"
+        # Concurrent edits of the fields each task did not edit
+        Task.objects.filter(pk=first.pk).update(description="Kept")
+        Task.objects.filter(pk=second.pk).update(title="Kept")
+
+        services.save_tasks_for_epic(self.epic, [(first, ["title"]), (second, ["description"])])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, first.description), ("Renamed", "Kept"))
+        self.assertEqual((second.title, second.description), ("Kept", "Described"))
+        self.assertEqual((first.version, second.version), (1, 1))
+        self.assertCountEqual(self.epic.tasks.all(), [first, second])
+
+    def test_transitions_are_read_from_the_locked_rows(self):
+        task = self.create_task("IN_PROGRESS")
+        self.epic.tasks.add(task)
+        Email.objects.create(task=task, email="watcher@example.com")
+        stale = Task.objects.get(pk=task.pk)
+        task.status = "DONE"
+        task.save()
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+        # The stale copy was loaded IN_PROGRESS but the stored task is DONE:
+        # the edit is not a transition and notifies nobody
+        stale.status = "DONE"
+        stale.title = "Renamed"
+        services.save_tasks_for_epic(self.epic, [(stale, ["status", "title"])])
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+        self.epic.refresh_from_db()
+        self.assertEqual((self.epic.tasks_total, self.epic.tasks_done), (1, 1))
+
+    def test_deleted_tasks_are_skipped(self):
+        kept, deleted = self.create_task(), self.create_task()
+        kept.title = deleted.title = "Renamed"
+        Task.objects.filter(pk=deleted.pk).delete()
+
+        skipped = services.save_tasks_for_epic(self.epic, [(kept, ["title"]), (deleted, ["title"])])
+        self.assertEqual(skipped, {deleted.pk})
+        self.assertEqual(Task.objects.get(pk=kept.pk).title, "Renamed")
+        self.assertEqual(list(self.epic.tasks.all()), [kept])
+
+        self.assertEqual(services.save_tasks_for_epic(self.epic, [(deleted, ["title"])]), {deleted.pk})
+
+    def test_queries_do_not_grow_with_the_tasks(self):
+        def count_queries(tasks) -> int:
+            for task in tasks:
+                task.title = "Renamed"
+            with CaptureQueriesContext(connection) as captured:
+                services.save_tasks_for_epic(self.epic, [(task, ["title"]) for task in tasks])
+            return len(captured)
+
+        small = [self.create_task() for _ in range(2)]
+        large = [self.create_task() for _ in range(20)]
+        self.assertEqual(count_queries(small), count_queries(large))
+
+
+class ExportFixturesMixin(TaskFixturesMixin):
+    def create_dataset(self):
+        owner = User.objects.create_user("bob")
+        self.sprint.epic = self.epic
+        self.sprint.save()
+        tasks = [
+            self.create_task("DONE", owner=owner, description="Line 1\nLine 2, \"quoted\""),
+            self.create_task(),
+            self.create_task("IN_PROGRESS"),
+        ]
+        self.sprint.tasks.add(*tasks[:2])
+        self.epic.tasks.add(tasks[0])
+        Email.objects.create(task=tasks[0], email="b@example.com")
+        Email.objects.create(task=tasks[0], email="a@example.com")
+        return tasks
+
+    def export_all(self, format: str) -> dict[str, str]:
+        return {kind: "".join(export.export(kind, format)) for kind in export.EXPORTS}
+
+
+class ExportTests(ExportFixturesMixin, TestCase):
+    def test_access(self):
+        url = reverse("tasks:export", args=["tasks", "csv"])
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.assertEqual(self.client.get(reverse("tasks:export", args=["users", "csv"])).status_code, 404)
+
+    def test_streamed_csv(self):
+        tasks = self.create_dataset()
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("tasks:export", args=["tasks", "csv"]))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="tasks.csv"')
+        rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual([int(row["id"]) for row in rows], [task.pk for task in tasks])
+        self.assertEqual(rows[0]["description"], tasks[0].description)
+        self.assertEqual(rows[0]["owner"], "bob")
+        self.assertEqual(rows[0]["watchers"], "a@example.com;b@example.com")
+        self.assertEqual((rows[0]["sprints"], rows[0]["epics"]), (str(self.sprint.pk), str(self.epic.pk)))
+        self.assertEqual((rows[2]["owner"], rows[2]["sprints"]), ("", ""))
+
+    def test_ndjson(self):
+        self.create_dataset()
+        sprints = [json.loads(line) for line in export.export("sprints", "ndjson")]
+        self.assertEqual(sprints[0]["epic"], self.epic.pk)
+        self.assertEqual(sprints[0]["creator"], "alice")
+
+    def test_queries_per_chunk_do_not_grow_with_the_rows(self):
+        self.create_dataset()
+
+        def count(chunk_size):
+            with CaptureQueriesContext(connection) as captured:
+                "".join(export.export("tasks", "ndjson", chunk_size=chunk_size))
+            return len(captured)
+
+        # The rows, then the sprints, epics and watchers of each chunk
+        self.assertEqual(count(chunk_size=100), 4)
+        self.assertEqual(count(chunk_size=1), 3 * 3 + 1)
+
+    def test_command(self):
+        self.create_dataset()
+        expected = "".join(export.export("tasks", "ndjson"))
+        stdout = io.StringIO()
+        call_command("export_data", "tasks", format="ndjson", stdout=stdout)
+        self.assertEqual(stdout.getvalue(), expected)
+
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/tasks.csv"
+        call_command("export_data", "tasks", output=path, stdout=io.StringIO())
+        with open(path, newline="", encoding="utf-8") as stream:
+            self.assertEqual(stream.read(), "".join(export.export("tasks", "csv")))
+
+
+class ImportTests(ExportFixturesMixin, TestCase):
+    def run_import(self, kind, content, format="ndjson", checkpoint="test", **kwargs):
+        importer = Importer(kind, checkpoint, **kwargs)
+        return importer.run(read_records(io.StringIO(content), format))
+
+    def test_round_trip(self):
+        self.create_dataset()
+        for format in export.FORMATS:
+            for use_copy in (False, True):
+                with self.subTest(format=format, use_copy=use_copy):
+                    exported = self.export_all(format)
+                    Task.objects.all().delete()
+                    Sprint.objects.all().delete()
+                    Epic.objects.all().delete()
+
+                    checkpoint = f"{format}-{use_copy}"
+                    for kind in ("epics", "sprints", "tasks"):
+                        self.run_import(kind, exported[kind], format, checkpoint, use_copy=use_copy)
+                    self.assertEqual(self.export_all(format), exported)
+                    sprint = Sprint.objects.get()
+                    self.assertEqual((sprint.tasks_total, sprint.tasks_done), (2, 1))
+
+    def test_resume_after_an_invalid_record(self):
+        self.create_dataset()
+        lines = self.export_all("ndjson")["tasks"].splitlines(keepends=True)
+        Task.objects.all().delete()
+        invalid = json.loads(lines[2]) | {"status": "LATER"}
+        content = "".join(lines[:2]) + json.dumps(invalid) + "\n"
+
+        with self.assertRaisesMessage(ValidationError, "Record 3"):
+            self.run_import("tasks", content, batch_size=2)
+        # The first batch stays committed
+        self.assertEqual(Task.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get(name="test").position, 2)
+
+        self.assertEqual(self.run_import("tasks", "".join(lines), batch_size=2), (1, 0))
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_skip_invalid_records(self):
+        skipped = []
+        content = json.dumps({"title": "Task", "creator": "alice"}) + "\n"
+        content += json.dumps({"title": "Task", "creator": "nobody"}) + "\n"
+        imported = self.run_import("tasks", content, skip_invalid=True, on_skip=skipped.append)
+        self.assertEqual(imported, (1, 1))
+        self.assertEqual(skipped, ['Record 2: User "nobody" does not exist.'])
+
+    def test_taken_ids_are_invalid_records(self):
+        existing = self.create_task()
+        lines = [
+            json.dumps({"id": existing.pk, "title": "Taken", "creator": "alice"}),
+            json.dumps({"id": existing.pk + 100, "title": "New", "creator": "alice"}),
+            json.dumps({"id": existing.pk + 100, "title": "Duplicate", "creator": "alice"}),
+        ]
+        content = "\n".join(lines) + "\n"
+        with self.assertRaisesMessage(ValidationError, f"Record 1: id: Task {existing.pk} already exists."):
+            self.run_import("tasks", content)
+
+        skipped = []
+        imported = self.run_import("tasks", content, checkpoint="skip", skip_invalid=True, on_skip=skipped.append)
+        self.assertEqual(imported, (1, 2))
+        self.assertEqual(len(skipped), 2)
+        self.assertEqual(Task.objects.get(pk=existing.pk + 100).title, "New")
+        self.assertEqual(Task.objects.get(pk=existing.pk).title, "Task")
+
+    def test_command(self):
+        path = self.enterContext(tempfile.TemporaryDirectory()) + "/tasks.ndjson"
+        with open(path, "w", encoding="utf-8") as stream:
+            stream.write(json.dumps({"title": "Café ☕", "creator": "alice"}, ensure_ascii=False) + "\n")
+        stdout = io.StringIO()
+        call_command("import_data", "tasks", path, stdout=stdout)
+        self.assertIn("Successfully imported 1 tasks", stdout.getvalue())
+        self.assertEqual(Task.objects.get().title, "Café ☕")
+
+    def test_missing_users_can_be_created(self):
+        content = json.dumps({"title": "Task", "creator": "alice", "owner": "carol"}) + "\n"
+        self.run_import("tasks", content, users=UserCache(create_missing=True))
+        self.assertEqual(Task.objects.get().owner.username, "carol")
+        self.assertFalse(User.objects.get(username="carol").has_usable_password())
+
+
+class SearchTests(TaskFixturesMixin, TestCase):
+    def setUp(self):
+        self.title_match = self.create_task(title="Deploy the release", status="DONE")
+        self.description_match = self.create_task(title="Write notes", description="Deploy checklist")
+        self.other = self.create_task(title="Buy milk")
+
+    def create_task(self, status="UNASSIGNED", **kwargs) -> Task:
+        return Task.objects.create(status=status, creator=self.user, **kwargs)
+
+    def search(self, **params):
+        response = self.client.get(reverse("tasks:task-search-api"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    def test_title_matches_rank_first(self):
+        results = self.search(q="deploying")
+        self.assertEqual(
+            [task["id"] for task in results], [self.title_match.pk, self.description_match.pk]
+        )
+        self.assertGreater(results[0]["rank"], results[1]["rank"])
+        self.assertTrue(all(0 < task["rank"] <= 1 for task in results))
+
+    def test_title_prefix(self):
+        ids = [task["id"] for task in self.search(q="depl")]
+        self.assertIn(self.title_match.pk, ids)
+        self.assertNotIn(self.other.pk, ids)
+
+    def test_web_search_syntax(self):
+        ids = [task["id"] for task in self.search(q="deploy -checklist")]
+        self.assertIn(self.title_match.pk, ids)
+        self.assertNotIn(self.description_match.pk, ids)
+
+    def test_status_filter(self):
+        results = self.search(q="deploy", status="DONE")
+        self.assertEqual([task["id"] for task in results], [self.title_match.pk])
+
+        response = self.client.get(reverse("tasks:task-search-api"), {"q": "deploy", "status": "LATER"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_limit(self):
+        self.create_task(title="Deploy again")
+        self.assertEqual(len(self.search(q="deploy", limit=2)), 2)
+        # Out of range limits are clamped
+        self.assertEqual(len(self.search(q="deploy", limit=0)), 1)
+        self.assertEqual(len(self.search(q="deploy", limit=10_000)), 3)
+
+        response = self.client.get(reverse("tasks:task-search-api"), {"q": "deploy", "limit": "all"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_blank_term(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(search.search_tasks("  ", 10), [])
+        self.assertEqual(self.search(q=""), [])
+
+        tasks = Task.objects.all()
+        self.assertIs(search.filter_tasks(tasks, " "), tasks)
+        self.assertEqual(list(search.filter_tasks(tasks, "milk")), [self.other])
 
-# Create your tests here.
@@ -1,18 +1,31 @@
 from django.urls import path, register_converter
 from django.views.generic import TemplateView
 
-from . import converters
+from . import async_views, converters
 from .views import (
     ContactFormView,
+    EpicListView,
+    SprintListView,
     TaskCreateView,
     TaskDeleteView,
     TaskDetailView,
     TaskListView,
     TaskUpdateView,
+    bulk_create_tasks_api,
+    bulk_transition_tasks_api,
+    bulk_update_tasks_api,
+    claim_next_tasks_api,
     create_task_on_sprint,
+    export_view,
     manage_epic_tasks,
+    task_board_column,
     task_by_date,
+    task_calendar_month,
+    task_calendar_sprint,
     task_home,
+    task_list_api,
+    task_search_api,
+    watched_tasks_api,
 )
 
 app_name = "tasks"
@@ -22,6 +35,7 @@ handler404 = "tasks.views.custom_404"
 
 urlpatterns = [
     path("", task_home, name="task-home"),
+    path("board/<str:status>/", task_board_column, name="task-board-column"),
     path("contact/", ContactFormView.as_view(), name="contact"),
     path(
         "contact-success/",
@@ -35,6 +49,18 @@ urlpatterns = [
     ),
     path("help/", TemplateView.as_view(template_name="tasks/help.html"), name="help"),
     path("tasks/", TaskListView.as_view(), name="task-list"),  # GET
+    path("sprints/", SprintListView.as_view(), name="sprint-list"),  # GET
+    path("epics/", EpicListView.as_view(), name="epic-list"),  # GET
+    path("api/tasks/", task_list_api, name="task-list-api"),  # GET
+    path("api/tasks/search/", task_search_api, name="task-search-api"),  # GET
+    path("api/tasks/claim/", claim_next_tasks_api, name="task-claim-next"),  # POST
+    path("export/<str:kind>.<str:format>", export_view, name="export"),  # GET
+    path("api/tasks/bulk/", bulk_create_tasks_api, name="task-bulk-create"),  # POST
+    path("api/tasks/bulk/update/", bulk_update_tasks_api, name="task-bulk-update"),  # POST
+    path(
+        "api/tasks/bulk/status/", bulk_transition_tasks_api, name="task-bulk-status"
+    ),  # POST
+    path("api/watchers/tasks/", watched_tasks_api, name="watched-task-list-api"),  # GET
     path("tasks/new/", TaskCreateView.as_view(), name="task-create"),  # POST
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),  # GET
     path(
@@ -43,11 +69,40 @@ urlpatterns = [
     path(
         "tasks/<int:pk>/delete/", TaskDeleteView.as_view(), name="task-delete"
     ),  # DELETE
-    path("tasks/<yyyymmdd:date>/", task_by_date, name="task-get-by-date"),
+    path("tasks/<yyyymmdd:by_date>/", task_by_date, name="task-get-by-date"),
+    path(
+        "tasks/calendar/<int:year>/<int:month>/",
+        task_calendar_month,
+        name="task-calendar-month",
+    ),
+    path(
+        "sprints/<int:sprint_id>/calendar/",
+        task_calendar_sprint,
+        name="task-calendar-sprint",
+    ),
     path(
         "tasks/sprint/add_task/<int:pk>/",
         create_task_on_sprint,
         name="task-add-to-sprint",
     ),
     path("epic/<int:epic_pk>/", manage_epic_tasks, name="task-batch-create"),
+    # Async variants, for ASGI deployments
+    path("async/", async_views.task_home, name="task-home-async"),
+    path(
+        "async/board/<str:status>/",
+        async_views.task_board_column,
+        name="task-board-column-async",
+    ),
+    path("async/api/tasks/", async_views.task_list_api, name="task-list-api-async"),  # GET
+    path(
+        "async/api/tasks/claim/",
+        async_views.claim_next_tasks_api,
+        name="task-claim-next-async",
+    ),  # POST
+    path("async/tasks/<int:pk>/", async_views.task_detail, name="task-detail-async"),  # GET
+    path(
+        "async/tasks/<int:task_id>/claim/",
+        async_views.claim_task,
+        name="task-claim-async",
+    ),  # POST
 ]
\ No newline at end of file
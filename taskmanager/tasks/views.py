@@ -1,38 +1,369 @@
 # Code for tasks/views.py
-from collections import defaultdict
-from datetime import date
-
+import calendar
+import json
+from datetime import date, timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import BadRequest, ValidationError
 from django.http import (
     Http404,
     HttpRequest,
     HttpResponse,
+    HttpResponseBadRequest,
     HttpResponseRedirect,
     JsonResponse,
+    StreamingHttpResponse,
 )
-from django.shortcuts import redirect, render
+from django.shortcuts import get_object_or_404, redirect, render
 from django.template import loader
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
+from django.views.decorators.http import require_POST
 from django.views.generic import DetailView, FormView, ListView
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
+from tasks.fields import email_validator
 from tasks.forms import ContactForm, EpicFormSet, TaskFormWithRedis
 
-from . import services
-from .mixins import SprintTaskMixin
-from .models import Sprint, Task
+from . import batch, caching, export, search, services
+from .conditional import board_validators, collection_validators, conditional_view, make_etag
+from .exceptions import BatchValidationException, InvalidCursorException
+from .idempotency import idempotent
+from .mixins import KeysetPaginationMixin, SprintTaskMixin
+from .models import Epic, Sprint, Task
+from .pagination import KeysetPaginator
+from .serializers import task_to_dict
+
+
+def _list_limit(request: HttpRequest) -> int | None:
+    """
+    Returns the page size requested with ``limit``, or None if it is invalid.
+    """
+    try:
+        limit = int(request.GET.get("limit", settings.TASK_LIST_PAGE_SIZE))
+    except ValueError:
+        return None
+    return max(1, min(limit, settings.TASK_LIST_MAX_PAGE_SIZE))
+
+
+def _page_validators(name: str, queryset, per_page: int, cursor: str | None):
+    try:
+        window, _ = KeysetPaginator(queryset, per_page).window(cursor)
+    except InvalidCursorException:
+        return None
+    return collection_validators(window, name)
+
+
+def _task_list_validators(request: HttpRequest):
+    return _page_validators(
+        "task-list", Task.objects.all(), settings.TASK_LIST_PAGE_SIZE, request.GET.get("cursor")
+    )
+
+
+def _task_list_api_validators(request: HttpRequest):
+    limit = _list_limit(request)
+    if limit is None:
+        return None
+    return _page_validators("task-list-api", Task.objects.all(), limit, request.GET.get("cursor"))
+
+
+def _task_validators(request: HttpRequest, pk: int):
+    # The cached version answers without a query until the task is written
+    version = caching.get_version(pk)
+    if version is None:
+        version = Task.objects.filter(pk=pk).values_list("version", flat=True).first()
+        if version is None:
+            return None
+        caching.set_versions({pk: version})
+    return make_etag("task-detail", pk, version), None
+
+
+def _task_home_validators(request: HttpRequest):
+    # The board is a capped window per column plus the column totals, so the
+    # validators are taken from it and the view renders the same board
+    request._task_board = services.get_task_board()
+    return board_validators(request._task_board, "task-home")
+
+
+def _task_board_column_validators(request: HttpRequest, status: str):
+    if status not in services.BOARD_STATUSES:
+        return None
+    return _page_validators(
+        f"task-board-{status}",
+        Task.objects.filter(status=status),
+        services.BOARD_COLUMN_SIZE,
+        request.GET.get("cursor"),
+    )
 
 
-class TaskListView(ListView):
+@method_decorator(conditional_view(_task_list_validators), name="dispatch")
+class TaskListView(KeysetPaginationMixin, ListView):
     model = Task
     template_name = "task_list.html"
     context_object_name = "tasks"
+    paginate_by = settings.TASK_LIST_PAGE_SIZE
+
+
+class SprintListView(KeysetPaginationMixin, ListView):
+    """
+    Lists the sprints with their task counts per status and their progress,
+    read for the whole page with one query (see load_task_summaries).
+    """
+
+    model = Sprint
+    template_name = "tasks/sprint_list.html"
+    context_object_name = "sprints"
+    paginate_by = settings.TASK_LIST_PAGE_SIZE
+
+
+class EpicListView(KeysetPaginationMixin, ListView):
+    """
+    Lists the epics with their task counts per status and their progress,
+    read for the whole page with one query (see load_task_summaries).
+    """
+
+    model = Epic
+    template_name = "tasks/epic_list.html"
+    context_object_name = "epics"
+    paginate_by = settings.TASK_LIST_PAGE_SIZE
+
+
+@conditional_view(_task_list_api_validators)
+def task_list_api(request: HttpRequest) -> JsonResponse:
+    """
+    Returns one page of tasks as JSON, newest first.
+
+    Query parameters:
+        cursor: The ``next`` or ``previous`` cursor of a previous response.
+        limit: Page size, capped at ``TASK_LIST_MAX_PAGE_SIZE``.
+    """
+    limit = _list_limit(request)
+    if limit is None:
+        return JsonResponse({"error": "Invalid limit."}, status=400)
+
+    tasks = Task.objects.select_related("owner")
+    try:
+        page = KeysetPaginator(tasks, limit).paginate(request.GET.get("cursor"))
+    except InvalidCursorException:
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+    return JsonResponse(
+        {
+            "results": [task_to_dict(task) for task in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+    )
+
+
+def task_search_api(request: HttpRequest) -> JsonResponse:
+    """
+    Returns the tasks best matching a search term as JSON, with their rank
+    (see tasks.search).
+
+    Query parameters:
+        q: The search term, in web search syntax.
+        status: Only return the tasks in this status.
+        limit: Number of results, capped at ``TASK_LIST_MAX_PAGE_SIZE``.
+    """
+    limit = _list_limit(request)
+    if limit is None:
+        return JsonResponse({"error": "Invalid limit."}, status=400)
+    status = request.GET.get("status") or None
+    if status is not None and status not in dict(Task.STATUS_CHOICES):
+        return JsonResponse({"error": "Invalid status."}, status=400)
+
+    term = request.GET.get("q", "")
+    tasks = search.search_tasks(term, limit, status)
+    return JsonResponse(
+        {
+            "query": term,
+            "results": [{**task_to_dict(task), "rank": round(task.rank, 4)} for task in tasks],
+        }
+    )
 
 
+def watched_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Returns one page of the tasks watched by an address, newest first.
+
+    Query parameters:
+        email: The watcher's address.
+        cursor: The ``next`` or ``previous`` cursor of a previous response.
+        limit: Page size, capped at ``TASK_LIST_MAX_PAGE_SIZE``.
+    """
+    email = request.GET.get("email", "")
+    try:
+        email_validator(email)
+    except ValidationError:
+        return JsonResponse({"error": "Invalid email."}, status=400)
+    limit = _list_limit(request)
+    if limit is None:
+        return JsonResponse({"error": "Invalid limit."}, status=400)
+
+    tasks = services.get_tasks_watched_by(email)
+    try:
+        page = KeysetPaginator(tasks, limit).paginate(request.GET.get("cursor"))
+    except InvalidCursorException:
+        return JsonResponse({"error": "Invalid cursor."}, status=400)
+
+    return JsonResponse(
+        {
+            "results": [task_to_dict(task) for task in page],
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        }
+    )
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value not in (None, "") else None
+
+
+@require_POST
+def claim_next_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Claims the next unassigned tasks for the current user, oldest first.
+
+    POST parameters (all optional):
+        count: Number of tasks to claim, capped at ``TASK_CLAIM_MAX_COUNT``.
+        sprint, epic: Only claim tasks of this sprint or epic.
+        min_age, max_age: Only claim tasks created at least / at most this
+            many seconds ago.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    try:
+        count = int(request.POST.get("count", 1))
+        sprint_id = _optional_int(request.POST.get("sprint"))
+        epic_id = _optional_int(request.POST.get("epic"))
+        min_age = _optional_int(request.POST.get("min_age"))
+        max_age = _optional_int(request.POST.get("max_age"))
+    except ValueError:
+        return JsonResponse({"error": "Invalid parameters."}, status=400)
+    count = max(1, min(count, settings.TASK_CLAIM_MAX_COUNT))
+
+    tasks = services.claim_next_tasks(
+        request.user.id,
+        count,
+        sprint_id=sprint_id,
+        epic_id=epic_id,
+        min_age=timedelta(seconds=min_age) if min_age is not None else None,
+        max_age=timedelta(seconds=max_age) if max_age is not None else None,
+    )
+    for task in tasks:
+        task.owner = request.user
+    return JsonResponse({"results": [task_to_dict(task) for task in tasks]})
+
+
+def _bulk_api(request: HttpRequest, apply, status: int = 200) -> JsonResponse:
+    """
+    Runs a batch operation on the JSON array posted as request body.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+    try:
+        tasks = apply(items)
+    except BatchValidationException as exc:
+        return JsonResponse({"error": str(exc), "errors": exc.errors}, status=400)
+    return JsonResponse({"results": [task_to_dict(task) for task in tasks]}, status=status)
+
+
+@require_POST
+def bulk_create_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Creates the tasks of a JSON array of ``{"title", "description", "status",
+    "owner"}`` objects, created by the current user.
+
+    Either every task is created or, when some are invalid, none is and the
+    response lists the errors of each invalid item by index.
+    """
+    return _bulk_api(request, lambda items: batch.create_tasks(items, request.user), status=201)
+
+
+@require_POST
+def bulk_update_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Partially updates the tasks of a JSON array of ``{"id", "title",
+    "description", "owner"}`` objects. An optional ``version`` rejects the
+    update of a task modified since that version.
+
+    Either every task is updated or none is, as for bulk creation.
+    """
+    return _bulk_api(request, batch.update_tasks)
+
+
+@require_POST
+def bulk_transition_tasks_api(request: HttpRequest) -> JsonResponse:
+    """
+    Changes the status of the tasks of a JSON array of ``{"id", "status"}``
+    objects, with an optional ``version`` as for bulk updates.
+
+    Either every task is changed or none is, as for bulk creation.
+    """
+    return _bulk_api(request, batch.transition_tasks)
+
+
+async def _aiterate(iterator):
+    # Under ASGI, a sync iterator would be consumed whole before streaming.
+    # Each chunk is read in the thread of the ORM, which keeps the cursor open.
+    next_chunk = sync_to_async(lambda: next(iterator, None))
+    while (chunk := await next_chunk()) is not None:
+        yield chunk
+
+
+def export_view(request: HttpRequest, kind: str, format: str) -> HttpResponse:
+    """
+    Streams an export of all the tasks, sprints or epics as CSV or NDJSON,
+    for staff users.
+    """
+    if kind not in export.EXPORTS or format not in export.FORMATS:
+        raise Http404("Unknown export")
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Staff access required."}, status=403)
+
+    content = export.export(kind, format)
+    if isinstance(request, ASGIRequest):
+        content = _aiterate(content)
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    response = StreamingHttpResponse(content, content_type=f"{content_type}; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{kind}.{format}"'
+    return response
+
+
+@method_decorator(conditional_view(_task_validators), name="dispatch")
 class TaskDetailView(DetailView):
     model = Task
     template_name = "tasks/task_detail.html"
+    fragment_template_name = "tasks/_task_detail.html"
     context_object_name = "task"
 
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("watchers")
+
+    def get(self, request, *args, **kwargs):
+        # Served from the version-keyed cache without touching the database
+        # until the task is written (see tasks.caching)
+        fragment = caching.get_fragment(self.kwargs["pk"], "detail")
+        if fragment is None:
+            self.object = self.get_object()
+            fragment = render_to_string(
+                self.fragment_template_name, {"task": self.object}, request=request
+            )
+            caching.set_fragment(self.object, "detail", fragment)
+        return self.render_to_response({"task_html": mark_safe(fragment), "view": self})
 
+
+@method_decorator(idempotent("task", TaskFormWithRedis.idempotency_backend), name="post")
 class TaskCreateView(CreateView):
     model = Task
     template_name = "tasks/task_form.html"
@@ -42,11 +373,16 @@ class TaskCreateView(CreateView):
         return reverse_lazy("tasks:task-detail", kwargs={"pk": self.object.id})
 
 
+@method_decorator(idempotent("task", TaskFormWithRedis.idempotency_backend), name="post")
 class TaskUpdateView(SprintTaskMixin, UpdateView):
     model = Task
     template_name = "tasks/task_form.html"
     form_class = TaskFormWithRedis
 
+    def get_queryset(self):
+        # Loads the current watchers with the task for the form
+        return services.with_watcher_emails(super().get_queryset())
+
     def get_success_url(self):
         return reverse_lazy("tasks:task-detail", kwargs={"pk": self.object.id})
 
@@ -57,37 +393,70 @@ class TaskDeleteView(DeleteView):
     success_url = reverse_lazy("tasks:task-list")
 
 
+@conditional_view(_task_home_validators)
 def task_home(request):
-    # Fetch all tasks at once
-    tasks = Task.objects.filter(
-        status__in=["UNASSIGNED", "IN_PROGRESS", "DONE", "ARCHIVED"]
-    )
+    # Load a capped slice of every board column plus the column totals,
+    # unless the validators already did
+    columns = getattr(request, "_task_board", None) or services.get_task_board()
+    context = {"columns": columns}
+    return render(request, "tasks/home.html", context)
 
-    # Initialize dictionaries to hold tasks by status
-    context = defaultdict(list)
 
-    # Categorize tasks into their respective lists
-    for task in tasks:
-        if task.status == "UNASSIGNED":
-            context["unassigned_tasks"].append(task)
-        elif task.status == "IN_PROGRESS":
-            context["in_progress_tasks"].append(task)
-        elif task.status == "DONE":
-            context["done_tasks"].append(task)
-        elif task.status == "ARCHIVED":
-            context["archived_tasks"].append(task)
+@conditional_view(_task_board_column_validators)
+def task_board_column(request: HttpRequest, status: str) -> HttpResponse:
+    """
+    Renders the next slice of a board column for the "load more" button.
+    """
+    if status not in services.BOARD_STATUSES:
+        raise Http404("Unknown board column")
+    try:
+        page = services.get_task_board_column(status, cursor=request.GET.get("cursor"))
+    except InvalidCursorException:
+        return HttpResponseBadRequest("Invalid cursor.")
 
-    return render(request, "tasks/home.html", context)
+    context = {"status": status, "tasks": page.object_list, "next_cursor": page.next_cursor}
+    return render(request, "tasks/_board_column.html", context)
 
 
 def task_by_date(request: HttpRequest, by_date: date) -> HttpResponse:
-    template = loader.get_template("task_list.html")
+    template = loader.get_template("tasks/task_list.html")
     tasks = services.get_task_by_date(by_date)
     context = {"tasks": tasks}  # data to inject into the template
     html = template.render(context, request)
     return HttpResponse(html)
 
 
+def _calendar_response(first_day: date, last_day: date) -> JsonResponse:
+    days = services.get_task_calendar(first_day, last_day)
+    return JsonResponse(
+        {
+            "start": first_day.isoformat(),
+            "end": last_day.isoformat(),
+            "days": {day.isoformat(): count for day, count in days.items()},
+        }
+    )
+
+
+def task_calendar_month(request: HttpRequest, year: int, month: int) -> JsonResponse:
+    """
+    Returns the number of tasks created on each day of a month.
+    """
+    try:
+        first_day = date(year, month, 1)
+    except ValueError:
+        raise Http404("Invalid month")
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    return _calendar_response(first_day, last_day)
+
+
+def task_calendar_sprint(request: HttpRequest, sprint_id: int) -> JsonResponse:
+    """
+    Returns the number of tasks created on each day of a sprint.
+    """
+    sprint = get_object_or_404(Sprint, pk=sprint_id)
+    return _calendar_response(sprint.start_date, sprint.end_date)
+
+
 def create_task_on_sprint(request: HttpRequest, sprint_id: int) -> HttpResponseRedirect:
     if request.method == "POST":
         task_data: dict[str, str] = {
@@ -114,6 +483,8 @@ def claim_task_view(request, task_id):
         return HttpResponse("Task does not exist.", status=404)
     except services.TaskAlreadyClaimedException:
         return HttpResponse("Task is already claimed or completed.", status=400)
+    except services.TaskClaimConflictException:
+        return HttpResponse("Task is being claimed concurrently, retry later.", status=409)
 
 
 def custom_404(request, exception):
@@ -130,29 +501,40 @@ class ContactFormView(FormView):
         message = form.cleaned_data.get("message")
         from_email = form.cleaned_data.get("from_email")
 
-        # You can use Django's send_mail function,
-        # here is a simple example that sends the message to your email.
-        # Please update 'your-email@example.com' with your email and configure
-        # the EMAIL settings in your Django settings file
-        services.send_contact_email(
-            subject, message, from_email, ["your-email@example.com"]
-        )
+        # Queued in the outbox and delivered by the send_outbox worker; set
+        # CONTACT_EMAIL and the EMAIL settings in your Django settings file
+        services.send_contact_email(subject, message, from_email, settings.CONTACT_EMAIL)
 
         return super().form_valid(form)
 
 
+# The formset carries one key for the whole submission (BaseEpicFormSet.uuid)
+@idempotent("epic", TaskFormWithRedis.idempotency_backend)
 def manage_epic_tasks(request, epic_pk):
+    """
+    Edits the tasks of an epic, one page of ``TASK_EPIC_PAGE_SIZE`` tasks at
+    a time, newest first. Only the edited tasks are written on submit.
+    """
     epic = services.get_epic_by_id(epic_pk)
     if not epic:
         raise Http404("Epic does not exist")
+    tasks = services.get_tasks_for_epic(epic)
+    page = None
     if request.method == "POST":
-        formset = EpicFormSet(request.POST, queryset=services.get_tasks_for_epic(epic))
+        formset = EpicFormSet(request.POST, queryset=tasks)
         if formset.is_valid():
-            tasks = formset.save(commit=False)
-            services.save_tasks_for_epic(epic, tasks)
-            formset.save_m2m()  # handle many-to-many relations if there are any
+            formset.save(commit=False)
+            deleted = services.save_tasks_for_epic(epic, formset.changed_tasks())
+            # Sync the watchers of the edited tasks that still exist
+            for form in formset.saved_forms:
+                if form.instance.pk not in deleted:
+                    form.save_m2m()
             return redirect("tasks:task-list")
     else:
-        formset = EpicFormSet(queryset=services.get_tasks_for_epic(epic))
+        try:
+            page = KeysetPaginator(tasks, settings.TASK_EPIC_PAGE_SIZE).paginate(request.GET.get("cursor"))
+        except InvalidCursorException:
+            raise BadRequest("Invalid cursor.")
+        formset = EpicFormSet(queryset=page.object_list)
 
-    return render(request, "tasks/manage_epic.html", {"formset": formset, "epic": epic})
\ No newline at end of file
+    return render(request, "tasks/manage_epic.html", {"formset": formset, "epic": epic, "page_obj": page})
\ No newline at end of file